@@ -20,6 +20,5 @@ def run(task: Dict[str, Any], channels: Dict[str, Any], logger) -> Any:
     error = str(task.get("error", "ERROR"))
     echo = bool(task.get("echo", True))
 
-    protocol_cls = ProtocolRegistry.get("at")
-    protocol = protocol_cls(channels[channel_name], logger)
+    protocol = ProtocolRegistry.session("at", channels[channel_name], logger)
     return protocol.execute(cmd=str(cmd), timeout=timeout, terminator=terminator, ok=ok, error=error, echo=echo)
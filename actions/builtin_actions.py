@@ -5,24 +5,27 @@ from typing import Any, Dict
 
 from actions.registry import ActionRegistry
 from dsl.expression import eval_expr
+from utils.timing import Deadline
 
 
 def _eval(ctx, val):
     if isinstance(val, str) and "$" in val:
-        return eval_expr(val, ctx.vars_snapshot())
+        return eval_expr(val, ctx.vars_view())
     return val
 
 
 def action_set(ctx, args: Dict[str, Any]):
+    assigned: Dict[str, Any] = {}
     for key, val in args.items():
-        ctx.set_var(key, _eval(ctx, val))
-    return ctx.vars_snapshot()
+        assigned[key] = _eval(ctx, val)
+        ctx.set_var(key, assigned[key])
+    return assigned
 
 
 def action_log(ctx, args: Dict[str, Any]):
     msg = args.get("message") or args.get("msg") or ""
     if isinstance(msg, str) and "$" in msg:
-        msg = eval_expr(msg, ctx.vars_snapshot())
+        msg = eval_expr(msg, ctx.vars_view())
     ctx.logger.info(str(msg))
 
 
@@ -34,9 +37,9 @@ def action_wait(ctx, args: Dict[str, Any]):
 def action_wait_for_event(ctx, args: Dict[str, Any]):
     expected = args.get("event")
     timeout = float(args.get("timeout", 1.0))
-    end = time.time() + timeout
-    while time.time() < end:
-        evt = ctx.next_event(timeout=0.1)
+    deadline = Deadline(timeout)
+    while not deadline.expired():
+        evt = ctx.next_event(timeout=deadline.remaining())
         if evt is None:
             continue
         if expected is None or evt == expected:
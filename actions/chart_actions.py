@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import time
 from typing import Any, Dict
 
 from actions.chart_bridge import chart_bridge
 from actions.registry import ActionRegistry
+from utils.timing import timestamp
 
 
 def _eval(ctx, val: Any) -> Any:
@@ -22,7 +22,7 @@ def action_chart_add(ctx, args: Dict[str, Any]):
     if raw_val is None:
         raise ValueError("chart_add requires value")
     ts_arg = args.get("ts") or args.get("timestamp")
-    ts = float(_eval(ctx, ts_arg)) if ts_arg is not None else time.time()
+    ts = float(_eval(ctx, ts_arg)) if ts_arg is not None else timestamp()
     try:
         val = float(_eval(ctx, raw_val))
     except Exception as exc:
@@ -51,7 +51,7 @@ def action_chart_add3d(ctx, args: Dict[str, Any]):
     y_val = _eval(ctx, args.get("y"))
     z_val = _eval(ctx, args.get("z"))
     ts_arg = args.get("ts") or args.get("timestamp")
-    ts = float(_eval(ctx, ts_arg)) if ts_arg is not None else time.time()
+    ts = float(_eval(ctx, ts_arg)) if ts_arg is not None else timestamp()
     payload = {"ts": ts, bx: x_val, by: y_val, bz: z_val}
     if hasattr(ctx, "record_chart"):
         try:
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
 
 from actions.registry import ActionRegistry
 from dsl.expression import eval_expr
+from runtime.vars_view import Scope, VarsView
 
 
-def _vars_snapshot(ctx) -> Dict[str, Any]:
+def _vars_view(ctx) -> Mapping[str, Any]:
+    if hasattr(ctx, "vars_view"):
+        return ctx.vars_view()
     if hasattr(ctx, "vars_snapshot"):
         return ctx.vars_snapshot()
     if hasattr(ctx, "vars"):
-        return dict(ctx.vars)
+        return ctx.vars
     return {}
 
 
@@ -63,7 +66,7 @@ def action_if(ctx, args: Dict[str, Any]) -> Dict[str, Any]:
     cond_expr = args.get("when") or args.get("cond")
     if not cond_expr:
         raise ValueError("if requires 'when'")
-    cond = bool(eval_expr(str(cond_expr), _vars_snapshot(ctx)))
+    cond = bool(eval_expr(str(cond_expr), _vars_view(ctx)))
     then_items = args.get("then") or args.get("do") or []
     else_items = args.get("else") or args.get("otherwise") or []
     items = then_items if cond else else_items
@@ -79,13 +82,10 @@ def _iterable_or_error(value: Any, *, name: str) -> Iterable[Any]:
     raise ValueError(f"{name} must be a list/tuple")
 
 
-def _item_env(item: Any, index: int) -> Dict[str, Any]:
-    env: Dict[str, Any] = {"item": item, "index": index}
-    if isinstance(item, dict):
-        for k, v in item.items():
-            if isinstance(k, str) and k.isidentifier():
-                env[f"item.{k}"] = v
-    return env
+def _item_env(ctx) -> Tuple[Dict[str, Any], VarsView]:
+    """返回 item/index 作用域字典及叠加了该作用域的视图；逐项只需更新字典，不复制变量表。"""
+    names: Dict[str, Any] = {"item": None, "index": 0}
+    return names, VarsView(Scope(names), _vars_view(ctx))
 
 
 def action_list_filter(ctx, args: Dict[str, Any]) -> List[Any]:
@@ -100,10 +100,10 @@ def action_list_filter(ctx, args: Dict[str, Any]) -> List[Any]:
         raise ValueError("list_filter requires 'where'")
     limit = args.get("limit")
     out: List[Any] = []
-    base = _vars_snapshot(ctx)
+    names, env = _item_env(ctx)
     for idx, item in enumerate(_iterable_or_error(src_val, name="src")):
-        env = dict(base)
-        env.update(_item_env(item, idx))
+        names["item"] = item
+        names["index"] = idx
         if bool(eval_expr(str(where), env)):
             out.append(item)
             if limit is not None and len(out) >= int(limit):
@@ -127,10 +127,10 @@ def action_list_map(ctx, args: Dict[str, Any]) -> List[Any]:
     where = args.get("where") or args.get("when")
     limit = args.get("limit")
     out: List[Any] = []
-    base = _vars_snapshot(ctx)
+    names, env = _item_env(ctx)
     for idx, item in enumerate(_iterable_or_error(src_val, name="src")):
-        env = dict(base)
-        env.update(_item_env(item, idx))
+        names["item"] = item
+        names["index"] = idx
         if where and not bool(eval_expr(str(where), env)):
             continue
         out.append(eval_expr(str(expr), env))
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from protocols.registry import ProtocolRegistry
 
@@ -20,14 +20,16 @@ def run(task: Dict[str, Any], channels: Dict[str, Any], logger) -> Any:
     if not channel_name or channel_name not in channels:
         raise KeyError(f"未找到通道: {channel_name}")
 
+    if task.get("requests"):
+        return _run_batch(protocol_key, task, channels[channel_name], logger)
+
     function = int(task.get("function"))
     address = int(task.get("address"))
     quantity = int(task.get("quantity", 1))
     values = task.get("values")
     unit_id = int(task.get("unit_id", 1))
 
-    protocol_cls = ProtocolRegistry.get(protocol_key)
-    protocol = protocol_cls(channels[channel_name], logger)
+    protocol = ProtocolRegistry.session(protocol_key, channels[channel_name], logger)
 
     if protocol_key == "modbus_tcp":
         timeout_s = float(task.get("timeout", 2.0))
@@ -44,3 +46,28 @@ def run(task: Dict[str, Any], channels: Dict[str, Any], logger) -> Any:
         retries=retries,
         timeout=timeout_ms,
     )
+
+
+def _run_batch(protocol_key: str, task: Dict[str, Any], channel: Any, logger) -> List[Any]:
+    """requests 列表批量执行：TCP 流水线发送（max_in_flight 个同时在途），RTU/ASCII 逐个执行。"""
+    requests = []
+    for item in task["requests"]:
+        requests.append(
+            {
+                "function": int(item.get("function", task.get("function", 3))),
+                "address": int(item["address"]),
+                "quantity": int(item.get("quantity", 1)),
+                "values": item.get("values"),
+                "unit_id": int(item.get("unit_id", task.get("unit_id", 1))),
+            }
+        )
+
+    protocol = ProtocolRegistry.session(protocol_key, channel, logger)
+    if protocol_key == "modbus_tcp":
+        timeout_s = float(task.get("timeout", 2.0))
+        max_in_flight = int(task.get("max_in_flight", protocol.DEFAULT_MAX_IN_FLIGHT))
+        return protocol.execute_many(requests, timeout=timeout_s, max_in_flight=max_in_flight)
+
+    retries = int(task.get("retries", 3))
+    timeout_ms = int(task.get("timeout", 1000))
+    return [protocol.execute(retries=retries, timeout=timeout_ms, **req) for req in requests]
@@ -3,22 +3,27 @@ from __future__ import annotations
 from typing import Dict
 
 from actions.registry import ActionRegistry
+from protocols.modbus_bus import PRIORITY_NORMAL, ModbusBus
+from protocols.modbus_plan import PollPoint
 from protocols.registry import ProtocolRegistry
 from protocols import modbus_ascii, modbus_rtu, modbus_tcp  # noqa: F401
-from utils.crc16 import crc16_xmodem
-from utils.file_utils import get_file_meta, read_block
+from utils.crc import crc16_xmodem
+from utils.file_utils import resolve_file_path
 
 
 class XMODEMPacketBuilder:
     @staticmethod
-    def build_block(block_no: int, data: bytes, use_crc: bool = True) -> bytes:
-        data128 = data[:128] if len(data) >= 128 else data + b"\x1A" * (128 - len(data))
-        header = bytes([0x01, block_no & 0xFF, 0xFF - (block_no & 0xFF)])
+    def build_block(block_no: int, data: bytes, use_crc: bool = True, block_size: int = 128) -> bytes:
+        """组 XMODEM 数据块；block_size=1024 时为 XMODEM-1K（STX 帧头）。"""
+        if block_size not in {128, 1024}:
+            raise ValueError(f"不支持的块大小: {block_size}")
+        payload = data[:block_size] if len(data) >= block_size else data + b"\x1A" * (block_size - len(data))
+        header = bytes([0x02 if block_size == 1024 else 0x01, block_no & 0xFF, 0xFF - (block_no & 0xFF)])
         if use_crc:
-            crc = crc16_xmodem(data128).to_bytes(2, "big")
-            return header + data128 + crc
-        checksum = sum(data128) & 0xFF
-        return header + data128 + bytes([checksum])
+            crc = crc16_xmodem(payload).to_bytes(2, "big")
+            return header + payload + crc
+        checksum = sum(payload) & 0xFF
+        return header + payload + bytes([checksum])
 
     @staticmethod
     def build_eot() -> bytes:
@@ -26,17 +31,21 @@ class XMODEMPacketBuilder:
 
 
 def send_xmodem_block(ctx, args: Dict[str, object]):
-    meta = get_file_meta(ctx)
-    # Cache file metadata so DSL can reference $file.size / $file.block_count in transitions.
-    ctx.set_var("file", meta)
-    # Also flatten for both dot and underscore style access
-    ctx.set_var("file.block_count", meta.get("block_count"))
-    ctx.set_var("file.size", meta.get("size"))
-    ctx.set_var("file_block_count", meta.get("block_count"))
-    ctx.set_var("file_size", meta.get("size"))
+    block_size = int(ctx.eval_value(args.get("block_size", 128)))
     block = int(ctx.eval_value(args.get("block", 1)))
-    data = read_block(meta["path"], block, 128)
-    packet = XMODEMPacketBuilder.build_block(block, data)
+    # 首块时重新校验文件（mtime/大小），其余块复用已打开的句柄与预读缓冲
+    reader = ctx.open_block_file(resolve_file_path(ctx), revalidate=block <= 1)
+    meta = reader.meta(block_size)
+    if ctx.vars.get("file") is not meta:
+        # Cache file metadata so DSL can reference $file.size / $file.block_count in transitions.
+        ctx.set_var("file", meta)
+        # Also flatten for both dot and underscore style access
+        ctx.set_var("file.block_count", meta.get("block_count"))
+        ctx.set_var("file.size", meta.get("size"))
+        ctx.set_var("file_block_count", meta.get("block_count"))
+        ctx.set_var("file_size", meta.get("size"))
+    data = reader.read_block(block, block_size)
+    packet = XMODEMPacketBuilder.build_block(block, data, block_size=block_size)
     ctx.channel_write(packet)
     ctx.set_var("last_sent_block", block)
 
@@ -84,11 +93,31 @@ def _resolve_modbus_protocol(ctx, args: Dict[str, object]):
     return protocol_key
 
 
+def _modbus_client(ctx, protocol_key: str, channel):
+    """TCP 使用通道上缓存的协议会话；RTU/ASCII 经通道的 ModbusBus 调度（多站排队、退避与帧间隔）。"""
+    if protocol_key == "modbus_tcp":
+        return ProtocolRegistry.session(protocol_key, channel, ctx.logger)
+    return ModbusBus.for_channel(channel, protocol_key, ctx.logger)
+
+
+def _modbus_exec_kwargs(ctx, args: Dict[str, object], protocol_key: str) -> Dict[str, object]:
+    # TCP 的 timeout 单位为秒；RTU/ASCII 为毫秒并支持重试、优先级与截止时间（deadline_ms）
+    if protocol_key == "modbus_tcp":
+        return {"timeout": float(_eval_arg(ctx, args.get("timeout", 2.0)))}
+    kwargs: Dict[str, object] = {
+        "retries": int(_eval_arg(ctx, args.get("retries", 3))),
+        "timeout": int(_eval_arg(ctx, args.get("timeout", 1000))),
+        "priority": int(_eval_arg(ctx, args.get("priority", PRIORITY_NORMAL))),
+    }
+    if args.get("deadline_ms") is not None:
+        kwargs["deadline"] = float(_eval_arg(ctx, args["deadline_ms"])) / 1000.0
+    return kwargs
+
+
 def _run_modbus(ctx, args: Dict[str, object]):
     protocol_key = _resolve_modbus_protocol(ctx, args)
     channel = _resolve_modbus_channel(ctx, args)
-    protocol_cls = ProtocolRegistry.get(protocol_key)
-    protocol = protocol_cls(channel, ctx.logger)
+    protocol = _modbus_client(ctx, protocol_key, channel)
 
     function = int(_eval_arg(ctx, args.get("function", 3)))
     address = int(_eval_arg(ctx, args.get("address", 0)))
@@ -101,28 +130,14 @@ def _run_modbus(ctx, args: Dict[str, object]):
         quantity = len(values) if isinstance(values, (list, tuple)) else 1
     quantity = int(_eval_arg(ctx, quantity))
 
-    if protocol_key == "modbus_tcp":
-        timeout_s = float(_eval_arg(ctx, args.get("timeout", 2.0)))
-        result = protocol.execute(
-            function=function,
-            address=address,
-            quantity=quantity,
-            values=values,
-            unit_id=unit_id,
-            timeout=timeout_s,
-        )
-    else:
-        retries = int(_eval_arg(ctx, args.get("retries", 3)))
-        timeout_ms = int(_eval_arg(ctx, args.get("timeout", 1000)))
-        result = protocol.execute(
-            function=function,
-            address=address,
-            quantity=quantity,
-            values=values,
-            unit_id=unit_id,
-            retries=retries,
-            timeout=timeout_ms,
-        )
+    result = protocol.execute(
+        function=function,
+        address=address,
+        quantity=quantity,
+        values=values,
+        unit_id=unit_id,
+        **_modbus_exec_kwargs(ctx, args, protocol_key),
+    )
 
     ctx.set_var("last_modbus", result)
     save_as = args.get("save_as")
@@ -139,8 +154,52 @@ def modbus_write(ctx, args: Dict[str, object]):
     return _run_modbus(ctx, args)
 
 
+def modbus_poll(ctx, args: Dict[str, object]):
+    """按 points 声明批量读取：相邻地址合并为块读，结果按 name 写入变量并以字典返回。"""
+    protocol_key = _resolve_modbus_protocol(ctx, args)
+    channel = _resolve_modbus_channel(ctx, args)
+    raw_points = args.get("points")
+    if not isinstance(raw_points, list) or not raw_points:
+        raise ValueError("modbus_poll requires points")
+
+    default_unit = int(_eval_arg(ctx, args.get("unit_id", 1)))
+    default_function = int(_eval_arg(ctx, args.get("function", 3)))
+    points = []
+    for item in raw_points:
+        if not isinstance(item, dict) or not item.get("name"):
+            raise ValueError(f"modbus_poll point requires name/address: {item}")
+        points.append(
+            PollPoint(
+                name=str(item["name"]),
+                address=int(_eval_arg(ctx, item["address"])),
+                quantity=int(_eval_arg(ctx, item.get("quantity", 1))),
+                unit_id=int(_eval_arg(ctx, item.get("unit_id", default_unit))),
+                function=int(_eval_arg(ctx, item.get("function", default_function))),
+            )
+        )
+    plan = ctx.poll_plan(channel, protocol_key, tuple(points), int(_eval_arg(ctx, args.get("max_gap", 0))))
+
+    protocol = _modbus_client(ctx, protocol_key, channel)
+    values = plan.run(protocol, **_modbus_exec_kwargs(ctx, args, protocol_key))
+    for name, value in values.items():
+        ctx.set_var(name, value)
+    ctx.set_var("last_modbus", values)
+    return values
+
+
+def modbus_stats(ctx, args: Dict[str, object]):
+    """读取通道上 ModbusBus 的各单元统计（RTU/ASCII），结果写入 save_as（缺省 modbus_stats）。"""
+    channel = _resolve_modbus_channel(ctx, args)
+    bus = ModbusBus.get(channel)
+    stats = bus.stats() if bus is not None else {}
+    ctx.set_var(str(args.get("save_as") or "modbus_stats"), stats)
+    return stats
+
+
 def register_protocol_actions():
     ActionRegistry.register("send_xmodem_block", send_xmodem_block)
     ActionRegistry.register("send_eot", send_eot)
     ActionRegistry.register("modbus_read", modbus_read)
     ActionRegistry.register("modbus_write", modbus_write)
+    ActionRegistry.register("modbus_poll", modbus_poll)
+    ActionRegistry.register("modbus_stats", modbus_stats)
@@ -19,8 +19,7 @@ def run(task: Dict[str, Any], channels: Dict[str, Any], logger) -> Any:
     expect_response = task.get("expect_response")
     strip = bool(task.get("strip", True))
 
-    protocol_cls = ProtocolRegistry.get("scpi")
-    protocol = protocol_cls(channels[channel_name], logger)
+    protocol = ProtocolRegistry.session("scpi", channels[channel_name], logger)
     return protocol.execute(
         cmd=str(cmd),
         expect_response=expect_response,
@@ -15,7 +15,8 @@ def run(task: Dict[str, Any], channels: Dict[str, Any], logger) -> Any:
 
     retries = int(task.get("retries", 10))
     start_timeout = float(task.get("start_timeout", 10.0))
+    window = int(task.get("window", 1))
 
     protocol_cls = ProtocolRegistry.get("ymodem")
     protocol = protocol_cls(channels[channel_name], logger)
-    return protocol.execute(file_path=file_path, retries=retries, start_timeout=start_timeout)
+    return protocol.execute(file_path=file_path, retries=retries, start_timeout=start_timeout, window=window)
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Optional, Union
 
-from core.event_bus import EventBus
+from core.event_bus import DISPATCH_INLINE, EventBus
 from core.serial_manager import SerialManager
 from core.tcp_session import TcpSession
 
@@ -16,17 +16,16 @@ class CommunicationManager:
         self._bus = bus
         self._current_session: Optional[SessionType] = None
 
-        # 事件转发：底层 -> comm.*
-        self._bus.subscribe("serial.rx", lambda data: self._bus.publish("comm.rx", data))
-        self._bus.subscribe("tcp.rx", lambda data: self._bus.publish("comm.rx", data))
-
-        self._bus.subscribe("serial.tx", lambda data: self._bus.publish("comm.tx", data))
-        self._bus.subscribe("tcp.tx", lambda data: self._bus.publish("comm.tx", data))
-
-        self._bus.subscribe(
-            "serial.error", lambda reason: self._bus.publish("comm.error", reason)
-        )
-        self._bus.subscribe("tcp.error", lambda reason: self._bus.publish("comm.error", reason))
+        # 事件转发：底层 -> comm.*；转发本身只是再发布一次，直接在发布线程内执行
+        for source, target in (
+            ("serial.rx", "comm.rx"),
+            ("tcp.rx", "comm.rx"),
+            ("serial.tx", "comm.tx"),
+            ("tcp.tx", "comm.tx"),
+            ("serial.error", "comm.error"),
+            ("tcp.error", "comm.error"),
+        ):
+            self._bus.subscribe(source, self._make_forwarder(target), mode=DISPATCH_INLINE)
         # 协议帧请求发送 -> 调用当前会话发送
         self._bus.subscribe("protocol.tx", self._handle_protocol_tx)
 
@@ -70,6 +69,12 @@ class CommunicationManager:
         """返回可用串口列表，供 UI 使用。"""
         return SerialManager.list_ports()
 
+    def _make_forwarder(self, target: str):
+        def _forward(data) -> None:
+            self._bus.publish(target, data)
+
+        return _forward
+
     def _handle_protocol_tx(self, data: bytes) -> None:
         """处理协议层构造好的帧并发送。"""
         if not data:
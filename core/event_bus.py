@@ -2,58 +2,296 @@
 
 特性：
 - 订阅/取消订阅
-- 发布事件时为每个回调启动独立线程，避免阻塞
-- 简易日志输出，便于后续替换成正式日志框架
+- 订阅时可选择回调的分发方式（见 DISPATCH_*），缺省使用有界线程池，避免每个事件都新建线程
+- 高频字节流事件可开启合并窗口（coalesce），小块数据在窗口内合并为一次投递；publish_batch 一次调度投递多条
+- 日志走 logging，发布日志为 DEBUG 级别且惰性格式化，关闭时不产生开销
 """
 
 from __future__ import annotations
 
+import logging
+import os
+import time
+import queue
 import threading
 from collections import defaultdict
-from typing import Any, Callable, DefaultDict, List
+from functools import partial
+from typing import Any, Callable, DefaultDict, Dict, Iterable, List, Optional, Tuple
+
+from utils.log_utils import LazyPayload, get_logger
 
 Listener = Callable[[Any], None]
 
+# 分发方式：
+# - thread: 每个事件、每个回调新建一个线程（旧行为）
+# - pool:   共享的有界工作线程池，回调之间不保证顺序
+# - topic:  每个事件名一个工作线程，同一事件名的回调按发布顺序串行执行
+# - ordered: 每个订阅者独占一个队列和工作线程，该订阅者按发布顺序收到事件，且不受其他订阅者拖慢
+# - inline: 在 publish 调用线程中同步执行，适合转发/入队等轻量回调
+DISPATCH_THREAD = "thread"
+DISPATCH_POOL = "pool"
+DISPATCH_TOPIC = "topic"
+DISPATCH_ORDERED = "ordered"
+DISPATCH_INLINE = "inline"
+
+_Task = Tuple[str, Listener, Any]
+
+logger = get_logger("EventBus")
+
+
+class _WorkQueue:
+    """固定数量的守护工作线程共享一个任务队列，线程按需懒启动。"""
+
+    def __init__(self, invoke: Callable[[str, Listener, Any], None], workers: int, name: str) -> None:
+        self._invoke = invoke
+        self._workers = max(1, workers)
+        self._name = name
+        self._queue: "queue.SimpleQueue[Optional[_Task]]" = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+        # 已提交但尚未执行完的任务数；多于线程数时再启动线程（连续提交不会都排在同一个空闲线程后面）
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, event_name: str, callback: Listener, data: Any) -> None:
+        self._queue.put((event_name, callback, data))
+        with self._lock:
+            self._pending += 1
+            if self._pending <= len(self._threads) or len(self._threads) >= self._workers:
+                return
+            thread = threading.Thread(
+                target=self._worker, name=f"{self._name}-{len(self._threads)}", daemon=True
+            )
+            self._threads.append(thread)
+        thread.start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            count = len(self._threads)
+        for _ in range(count):
+            self._queue.put(None)
+
+    def _worker(self) -> None:
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            self._invoke(*task)
+            with self._lock:
+                self._pending -= 1
+
+
+class _Coalescer:
+    """单个事件名的合并缓冲：攒够 max_bytes 或首块到达后 window 秒即整体投递。"""
+
+    def __init__(self, window_s: float, max_bytes: int) -> None:
+        self.window_s = window_s
+        self.max_bytes = max(1, max_bytes)
+        self.buffer = bytearray()
+        self.deadline: Optional[float] = None
+        # 投递在锁内完成，保证合并块之间以及与非字节事件之间的顺序
+        self.lock = threading.RLock()
+
 
 class EventBus:
-    def __init__(self) -> None:
-        self._subs: DefaultDict[str, List[Listener]] = defaultdict(list)
+    def __init__(self, default_mode: str = DISPATCH_POOL, max_workers: Optional[int] = None) -> None:
+        # 每个订阅：(回调, 分发方式, ordered 模式下该订阅独占的队列)
+        self._subs: DefaultDict[str, List[Tuple[Listener, str, Optional[_WorkQueue]]]] = defaultdict(list)
         self._lock = threading.RLock()
+        self._default_mode = self._check_mode(default_mode)
+        self._pool = _WorkQueue(self._safe_invoke, max_workers or min(32, (os.cpu_count() or 1) + 4), "EventBus-pool")
+        self._topic_queues: Dict[str, _WorkQueue] = {}
+        self._coalescers: Dict[str, _Coalescer] = {}
+        self._flush_cond = threading.Condition()
+        self._flush_thread: Optional[threading.Thread] = None
+        self._flush_kick = False
+        self._closed = False
 
-    def subscribe(self, event_name: str, callback: Listener) -> None:
-        """订阅事件。"""
+    def subscribe(self, event_name: str, callback: Listener, mode: Optional[str] = None) -> None:
+        """订阅事件；mode 为 DISPATCH_* 之一，缺省使用总线的 default_mode。"""
+        mode = self._check_mode(mode or self._default_mode)
         with self._lock:
-            if callback not in self._subs[event_name]:
-                self._subs[event_name].append(callback)
-        self._log(f"subscribe -> {event_name}: {callback}")
+            listeners = self._subs[event_name]
+            if all(cb != callback for cb, _, _ in listeners):
+                own_queue = None
+                if mode == DISPATCH_ORDERED:
+                    own_queue = _WorkQueue(self._safe_invoke, 1, f"EventBus-{event_name}-ordered")
+                listeners.append((callback, mode, own_queue))
+        logger.debug("subscribe -> %s: %s mode=%s", event_name, callback, mode)
 
     def unsubscribe(self, event_name: str, callback: Listener) -> None:
         """取消订阅。"""
         with self._lock:
             listeners = self._subs.get(event_name, [])
-            if callback in listeners:
-                listeners.remove(callback)
-        self._log(f"unsubscribe -> {event_name}: {callback}")
+            removed = [sub for sub in listeners if sub[0] == callback]
+            listeners[:] = [sub for sub in listeners if sub[0] != callback]
+        for _, _, own_queue in removed:
+            if own_queue is not None:
+                own_queue.shutdown()
+        logger.debug("unsubscribe -> %s: %s", event_name, callback)
 
     def publish(self, event_name: str, data: Any = None) -> None:
-        """发布事件，为每个回调启动独立线程，避免阻塞主流程。"""
+        """发布事件，按订阅时选择的方式分发给每个回调。"""
+        coalescer = self._coalescers.get(event_name)
+        if coalescer is not None:
+            self._publish_coalesced(event_name, coalescer, data)
+            return
+        self._deliver(event_name, data)
+
+    def publish_batch(self, event_name: str, items: Iterable[Any]) -> None:
+        """批量发布：每个订阅者只调度一次，并在这一次调度内按顺序处理全部 items。"""
+        batch = list(items)
+        if not batch:
+            return
+        coalescer = self._coalescers.get(event_name)
+        if coalescer is None:
+            self._dispatch_batch(event_name, batch)
+            return
+        if all(isinstance(item, (bytes, bytearray)) for item in batch):
+            self.publish(event_name, b"".join(batch))
+            return
+        # 含非 bytes 数据：与 _publish_coalesced 相同，先发出已缓冲的数据再投递本批，保证顺序
+        with coalescer.lock:
+            self._flush_coalescer(event_name, coalescer)
+            self._dispatch_batch(event_name, batch)
+
+    def _dispatch_batch(self, event_name: str, batch: List[Any]) -> None:
         with self._lock:
             listeners = list(self._subs.get(event_name, []))
-        self._log(f"publish -> {event_name}, listeners={len(listeners)}, data={data!r}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("publish_batch -> %s, listeners=%d, items=%d", event_name, len(listeners), len(batch))
 
-        for callback in listeners:
-            thread = threading.Thread(
-                target=self._safe_invoke, args=(event_name, callback, data), daemon=True
-            )
+        for callback, mode, own_queue in listeners:
+            self._dispatch(event_name, partial(self._invoke_batch, event_name, callback), mode, own_queue, batch)
+
+    def coalesce(self, event_name: str, window_ms: float = 5.0, max_bytes: int = 4096) -> None:
+        """为字节流事件开启合并：window_ms 内或累计到 max_bytes 的小块合并成一次投递。
+
+        非 bytes 数据不参与合并，投递前会先把已缓冲的数据发出，保证顺序不变。
+        """
+        with self._lock:
+            self._coalescers[event_name] = _Coalescer(window_ms / 1000.0, max_bytes)
+            if self._flush_thread is None:
+                self._flush_thread = threading.Thread(target=self._flush_loop, name="EventBus-coalesce", daemon=True)
+                self._flush_thread.start()
+
+    def flush(self, event_name: Optional[str] = None) -> None:
+        """立即投递合并缓冲中尚未发出的数据。"""
+        names = [event_name] if event_name else list(self._coalescers)
+        for name in names:
+            coalescer = self._coalescers.get(name)
+            if coalescer is None:
+                continue
+            with coalescer.lock:
+                self._flush_coalescer(name, coalescer)
+
+    def shutdown(self) -> None:
+        """投递合并缓冲，并通知所有工作线程在处理完已入队的事件后退出。"""
+        self.flush()
+        with self._flush_cond:
+            self._closed = True
+            self._flush_cond.notify()
+        with self._lock:
+            queues = [self._pool, *self._topic_queues.values()]
+            queues.extend(q for subs in self._subs.values() for _, _, q in subs if q is not None)
+            self._topic_queues.clear()
+        for work_queue in queues:
+            work_queue.shutdown()
+
+    def _deliver(self, event_name: str, data: Any) -> None:
+        with self._lock:
+            listeners = list(self._subs.get(event_name, []))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("publish -> %s, listeners=%d, data=%s", event_name, len(listeners), LazyPayload(data))
+
+        for callback, mode, own_queue in listeners:
+            self._dispatch(event_name, callback, mode, own_queue, data)
+
+    def _dispatch(
+        self, event_name: str, callback: Listener, mode: str, own_queue: Optional[_WorkQueue], data: Any
+    ) -> None:
+        if own_queue is not None:
+            own_queue.submit(event_name, callback, data)
+        elif mode == DISPATCH_INLINE:
+            self._safe_invoke(event_name, callback, data)
+        elif mode == DISPATCH_POOL:
+            self._pool.submit(event_name, callback, data)
+        elif mode == DISPATCH_TOPIC:
+            self._topic_queue(event_name).submit(event_name, callback, data)
+        else:
+            thread = threading.Thread(target=self._safe_invoke, args=(event_name, callback, data), daemon=True)
             thread.start()
 
+    def _publish_coalesced(self, event_name: str, coalescer: _Coalescer, data: Any) -> None:
+        with coalescer.lock:
+            if not isinstance(data, (bytes, bytearray)):
+                self._flush_coalescer(event_name, coalescer)
+                self._deliver(event_name, data)
+                return
+            coalescer.buffer.extend(data)
+            if len(coalescer.buffer) >= coalescer.max_bytes:
+                self._flush_coalescer(event_name, coalescer)
+                return
+            if coalescer.deadline is not None:
+                return
+            coalescer.deadline = time.monotonic() + coalescer.window_s
+        with self._flush_cond:
+            self._flush_kick = True
+            self._flush_cond.notify()
+
+    def _flush_coalescer(self, event_name: str, coalescer: _Coalescer) -> None:
+        # 调用方需持有 coalescer.lock
+        coalescer.deadline = None
+        if not coalescer.buffer:
+            return
+        data = bytes(coalescer.buffer)
+        coalescer.buffer.clear()
+        self._deliver(event_name, data)
+
+    def _flush_loop(self) -> None:
+        while True:
+            now = time.monotonic()
+            next_deadline: Optional[float] = None
+            for name, coalescer in list(self._coalescers.items()):
+                deadline = coalescer.deadline
+                if deadline is None:
+                    continue
+                if deadline <= now:
+                    with coalescer.lock:
+                        if coalescer.deadline is not None and coalescer.deadline <= now:
+                            self._flush_coalescer(name, coalescer)
+                elif next_deadline is None or deadline < next_deadline:
+                    next_deadline = deadline
+            with self._flush_cond:
+                if self._closed:
+                    return
+                if self._flush_kick:
+                    # 扫描期间有新的截止时间加入，重新扫描而不是进入等待
+                    self._flush_kick = False
+                    continue
+                timeout = None if next_deadline is None else max(0.0, next_deadline - time.monotonic())
+                if timeout is None or timeout > 0:
+                    self._flush_cond.wait(timeout)
+
+    def _invoke_batch(self, event_name: str, callback: Listener, items: List[Any]) -> None:
+        for item in items:
+            self._safe_invoke(event_name, callback, item)
+
+    def _topic_queue(self, event_name: str) -> _WorkQueue:
+        with self._lock:
+            work_queue = self._topic_queues.get(event_name)
+            if work_queue is None:
+                work_queue = _WorkQueue(self._safe_invoke, 1, f"EventBus-{event_name}")
+                self._topic_queues[event_name] = work_queue
+            return work_queue
+
     def _safe_invoke(self, event_name: str, callback: Listener, data: Any) -> None:
         try:
             callback(data)
         except Exception as exc:
-            self._log(f"[ERROR] callback failed: {event_name} {callback} exc={exc}")
+            logger.error("callback failed: %s %s exc=%s", event_name, callback, exc)
 
     @staticmethod
-    def _log(message: str) -> None:
-        # 简易日志；后续可替换成 logging
-        print(f"[EventBus] {message}")
+    def _check_mode(mode: str) -> str:
+        if mode not in {DISPATCH_THREAD, DISPATCH_POOL, DISPATCH_TOPIC, DISPATCH_ORDERED, DISPATCH_INLINE}:
+            raise ValueError(f"未知分发方式: {mode}")
+        return mode
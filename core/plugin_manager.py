@@ -11,8 +11,11 @@ from types import ModuleType
 from typing import Dict, List, Optional
 
 from core.event_bus import EventBus
+from utils.log_utils import get_logger
 from utils.path_utils import resolve_resource_path
 
+logger = get_logger("PluginManager")
+
 
 class PluginManager:
     def __init__(self, bus: EventBus, plugin_dir: str | Path | None = None, protocol=None) -> None:
@@ -24,7 +27,7 @@ class PluginManager:
     def load_all(self) -> None:
         """遍历目录加载全部插件。"""
         if not self.plugin_dir.exists():
-            self._log(f"[WARN] 插件目录不存在: {self.plugin_dir}")
+            logger.warning("插件目录不存在: %s", self.plugin_dir)
             return
         for path in self.plugin_dir.glob("*.py"):
             if path.name.startswith("_"):
@@ -44,7 +47,7 @@ class PluginManager:
                 raise AttributeError(f"插件缺少 register: {name}")
             self._call_register(module)
             self._plugins[name] = module
-            self._log(f"插件已加载: {name}")
+            logger.info("插件已加载: %s", name)
             self.bus.publish("plugin.loaded", name)
         except Exception as exc:
             self._publish_error(f"加载插件失败 {name}: {exc}")
@@ -64,7 +67,7 @@ class PluginManager:
                 raise AttributeError(f"插件缺少 register: {name}")
             self._call_register(reloaded)
             self._plugins[name] = reloaded
-            self._log(f"插件已重载: {name}")
+            logger.info("插件已重载: %s", name)
             self.bus.publish("plugin.loaded", name)
         except Exception as exc:
             self._publish_error(f"重载插件失败 {name}: {exc}")
@@ -90,9 +93,5 @@ class PluginManager:
         return module
 
     def _publish_error(self, message: str) -> None:
-        self._log(f"[ERROR] {message}")
+        logger.error("%s", message)
         self.bus.publish("plugin.error", message)
-
-    @staticmethod
-    def _log(msg: str) -> None:
-        print(f"[PluginManager] {msg}")
@@ -7,40 +7,18 @@ CRC 计算范围：cmd + length + payload
 
 from __future__ import annotations
 
-import time
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 import yaml
 
-from core.event_bus import EventBus
+from core.event_bus import DISPATCH_ORDERED, EventBus
+from utils.crc import CrcEngine, get_crc
+from utils.log_utils import get_logger
 from utils.path_utils import resolve_resource_path
+from utils.timing import timestamp
 
-
-def crc16_modbus(data: bytes) -> int:
-    """标准 CRC16-Modbus，多项式 0xA001，初值 0xFFFF。"""
-    crc = 0xFFFF
-    for byte in data:
-        crc ^= byte
-        for _ in range(8):
-            if crc & 0x0001:
-                crc = (crc >> 1) ^ 0xA001
-            else:
-                crc >>= 1
-    return crc & 0xFFFF
-
-
-def crc8(data: bytes, poly: int = 0x07, init: int = 0x00) -> int:
-    """简单 CRC8 实现，缺省多项式 0x07。"""
-    crc = init
-    for byte in data:
-        crc ^= byte
-        for _ in range(8):
-            if crc & 0x80:
-                crc = ((crc << 1) ^ poly) & 0xFF
-            else:
-                crc = (crc << 1) & 0xFF
-    return crc & 0xFF
+logger = get_logger("ProtocolLoader")
 
 
 class ProtocolLoader:
@@ -52,11 +30,12 @@ class ProtocolLoader:
         self._header = b""
         self._tail: bytes | None = None
         self._crc_kind: Optional[str] = None
+        self._crc: Optional[CrcEngine] = None
         self._max_length: int = 1024
         self._cmd_map: Dict[int, str] = {}
         self.load_config()
-        # 订阅串口接收事件
-        self.bus.subscribe("serial.rx", self.parse)
+        # 订阅串口接收事件；parse 依赖内部缓冲，必须按发布顺序串行执行，且不被其他订阅者拖慢
+        self.bus.subscribe("serial.rx", self.parse, mode=DISPATCH_ORDERED)
 
     def load_config(self) -> None:
         """加载 YAML 配置，并缓存关键字段。"""
@@ -70,66 +49,86 @@ class ProtocolLoader:
         tail_hex = frame_cfg.get("tail")
         self._tail = self._hex_to_bytes(tail_hex) if tail_hex else None
         self._crc_kind = frame_cfg.get("crc")
+        self._crc = None
+        if self._crc_kind:
+            try:
+                self._crc = get_crc(self._crc_kind)
+            except KeyError:
+                logger.warning("未知 CRC 类型，忽略校验: %s", self._crc_kind)
         self._max_length = int(frame_cfg.get("max_length", 1024))
 
         commands = self.config.get("commands", {}) or {}
         self._cmd_map = {int(v.get("cmd", 0)): k for k, v in commands.items()}
 
     def parse(self, data: bytes) -> None:
-        """增量解析串口字节流，提取完整帧并发布事件。"""
+        """增量解析串口字节流，提取完整帧并发布事件。
+
+        解析时只移动读指针，本次数据处理完后再一次性丢弃已消费部分；
+        帧校验在 memoryview 上进行，每帧只拷贝一次 payload。
+        """
         if not data:
             return
-        self._buffer.extend(data)
-
-        while True:
-            # 查找头
-            start = self._find_header(self._buffer)
-            if start < 0:
-                self._buffer.clear()
-                return
-            if start > 0:
-                del self._buffer[:start]
-
-            if len(self._buffer) < len(self._header) + 3:  # header + cmd(1) + len(2)
-                return
-
-            header_len = len(self._header)
-            cmd = self._buffer[header_len]
-            length = int.from_bytes(self._buffer[header_len + 1 : header_len + 3], "big")
-
-            crc_len = 2 if self._crc_kind == "crc16_modbus" else 1 if self._crc_kind == "crc8" else 0
-            tail_len = len(self._tail) if self._tail else 0
-
-            frame_len = header_len + 1 + 2 + length + crc_len + tail_len
-            if frame_len > self._max_length:
-                self._log(f"[WARN] 超过最大帧长，丢弃: {frame_len}")
-                del self._buffer[: header_len]  # 跳过头部，继续查找
-                continue
-
-            if len(self._buffer) < frame_len:
-                return  # 等待更多数据
-
-            frame = bytes(self._buffer[:frame_len])
-            del self._buffer[:frame_len]
-
-            if not self._validate_tail(frame, tail_len):
-                self._log("[WARN] tail 校验失败，继续下一帧")
-                continue
-
-            payload_start = header_len + 1 + 2
-            payload_end = payload_start + length
-            payload = frame[payload_start:payload_end]
-
-            if not self._validate_crc(frame, header_len, length, crc_len):
-                self._log("[WARN] CRC 校验失败，继续下一帧")
-                continue
+        buf = self._buffer
+        buf.extend(data)
 
+        header = self._header
+        header_len = len(header)
+        crc_len = self._crc.size if self._crc else 0
+        tail_len = len(self._tail) if self._tail else 0
+        size = len(buf)
+        pos = 0
+        frames = []
+
+        with memoryview(buf) as view:
+            while True:
+                # 查找头
+                start = buf.find(header, pos) if header else pos
+                if start < 0:
+                    # 保留可能被拆到下一块数据里的半个帧头
+                    pos = max(pos, size - (header_len - 1))
+                    break
+                pos = start
+
+                if size - pos < header_len + 3:  # header + cmd(1) + len(2)
+                    break
+
+                cmd = buf[pos + header_len]
+                length = (buf[pos + header_len + 1] << 8) | buf[pos + header_len + 2]
+
+                frame_len = header_len + 1 + 2 + length + crc_len + tail_len
+                if frame_len > self._max_length:
+                    logger.warning("超过最大帧长，丢弃: %d", frame_len)
+                    pos += max(1, header_len)  # 跳过头部，继续查找
+                    continue
+
+                if size - pos < frame_len:
+                    break  # 等待更多数据
+
+                frame = view[pos : pos + frame_len]
+                pos += frame_len
+
+                if not self._validate_tail(frame, tail_len):
+                    logger.warning("tail 校验失败，继续下一帧")
+                    continue
+
+                if not self._validate_crc(frame, header_len, length, crc_len):
+                    logger.warning("CRC 校验失败，继续下一帧")
+                    continue
+
+                payload_start = header_len + 1 + 2
+                frames.append((cmd, bytes(frame[payload_start : payload_start + length])))
+            frame = None
+
+        if pos:
+            del buf[:pos]
+
+        for cmd, payload in frames:
             cmd_name = self._cmd_map.get(cmd, f"unknown_{cmd:#02x}")
             frame_dict = {
                 "cmd": cmd_name,
                 "raw_cmd": cmd,
                 "payload": payload,
-                "timestamp": time.time(),
+                "timestamp": timestamp(),
             }
             self.bus.publish("protocol.frame", frame_dict)
 
@@ -144,11 +143,7 @@ class ProtocolLoader:
         length_bytes = len(payload).to_bytes(2, "big")
         body = bytes([raw_cmd]) + length_bytes + payload
 
-        crc_bytes = b""
-        if self._crc_kind == "crc16_modbus":
-            crc_bytes = crc16_modbus(body).to_bytes(2, "little")
-        elif self._crc_kind == "crc8":
-            crc_bytes = bytes([crc8(body)])
+        crc_bytes = self._crc.digest(body) if self._crc else b""
 
         tail = self._tail or b""
         frame = header + body + crc_bytes + tail
@@ -156,28 +151,19 @@ class ProtocolLoader:
         self.bus.publish("protocol.tx", frame)
         return frame
 
-    def _find_header(self, buf: bytearray) -> int:
-        if not self._header:
-            return 0
-        return buf.find(self._header)
-
-    def _validate_tail(self, frame: bytes, tail_len: int) -> bool:
+    def _validate_tail(self, frame: memoryview, tail_len: int) -> bool:
         if tail_len == 0 or not self._tail:
             return True
         return frame[-tail_len:] == self._tail
 
-    def _validate_crc(self, frame: bytes, header_len: int, length: int, crc_len: int) -> bool:
+    def _validate_crc(self, frame: memoryview, header_len: int, length: int, crc_len: int) -> bool:
         if crc_len == 0:
             return True
         body = frame[header_len : header_len + 1 + 2 + length]
         crc_bytes = frame[header_len + 1 + 2 + length : header_len + 1 + 2 + length + crc_len]
-        if self._crc_kind == "crc16_modbus":
-            expected = crc16_modbus(body).to_bytes(2, "little")
-        elif self._crc_kind == "crc8":
-            expected = bytes([crc8(body)])
-        else:
+        if not self._crc:
             return True
-        return expected == crc_bytes
+        return self._crc.digest(body) == crc_bytes
 
     @staticmethod
     def _hex_to_bytes(hex_str: str) -> bytes:
@@ -187,7 +173,3 @@ class ProtocolLoader:
         if len(hex_str) % 2 != 0:
             hex_str = "0" + hex_str
         return bytes.fromhex(hex_str)
-
-    @staticmethod
-    def _log(msg: str) -> None:
-        print(f"[ProtocolLoader] {msg}")
@@ -11,6 +11,9 @@ from serial import SerialException
 from serial.tools import list_ports
 
 from core.event_bus import EventBus
+from utils.log_utils import get_logger
+
+logger = get_logger("SerialManager")
 
 
 class SerialManager:
@@ -22,27 +25,45 @@ class SerialManager:
         self._lock = threading.RLock()
         self._port: Optional[str] = None
         self._baudrate: Optional[int] = None
+        self._read_timeout = 0.1
+        self._inter_byte_timeout: Optional[float] = None
+        self._rx_chunk_size = 4096
 
     @staticmethod
     def list_ports() -> List[str]:
         """返回系统可用串口列表。"""
         return [port.device for port in list_ports.comports()]
 
-    def open(self, port: str, baudrate: int) -> None:
-        """打开串口并启动接收线程。"""
+    def open(
+        self,
+        port: str,
+        baudrate: int,
+        read_timeout: float = 0.1,
+        inter_byte_timeout: Optional[float] = None,
+        rx_chunk_size: int = 4096,
+    ) -> None:
+        """打开串口并启动接收线程。
+
+        read_timeout 为接收线程单次阻塞等待的上限（同时决定 close 的响应速度）；
+        设置 inter_byte_timeout 后，一次读取在字节间隔超时或收满 rx_chunk_size 时返回，
+        便于按帧间隙切分数据。
+        """
         with self._lock:
             self._port, self._baudrate = port, baudrate
+            self._read_timeout = read_timeout
+            self._inter_byte_timeout = inter_byte_timeout
+            self._rx_chunk_size = max(1, rx_chunk_size)
             if self._ser and self._ser.is_open:
                 self.close()
             try:
-                self._ser = serial.Serial(port=port, baudrate=baudrate, timeout=0.1)
+                self._ser = self._open_port()
                 self._running = True
                 self._rx_thread = threading.Thread(target=self._rx_loop, daemon=True)
                 self._rx_thread.start()
-                self._log(f"串口打开: {port} @ {baudrate}")
+                logger.info("串口打开: %s @ %s", port, baudrate)
                 self.bus.publish("serial.opened", port)
             except SerialException as exc:
-                self._log(f"[ERROR] 打开串口失败: {exc}")
+                logger.error("打开串口失败: %s", exc)
                 self.bus.publish("serial.error", str(exc))
 
     def close(self) -> None:
@@ -57,7 +78,7 @@ class SerialManager:
                 except Exception:
                     pass
                 self._ser = None
-            self._log("串口关闭")
+            logger.info("串口关闭")
             self.bus.publish("serial.closed")
 
     def send(self, data: bytes) -> None:
@@ -65,18 +86,18 @@ class SerialManager:
         with self._lock:
             ser = self._ser
         if not ser or not ser.is_open:
-            self._log("[WARN] 串口未打开，发送忽略")
+            logger.warning("串口未打开，发送忽略")
             return
         try:
             ser.write(data)
-            self._log(f"串口发送 {len(data)} bytes")
+            logger.debug("串口发送 %d bytes", len(data))
             self.bus.publish("serial.tx", data)
         except SerialException as exc:
-            self._log(f"[ERROR] 发送失败: {exc}")
+            logger.error("发送失败: %s", exc)
             self.bus.publish("serial.error", str(exc))
 
     def _rx_loop(self) -> None:
-        """接收线程：非阻塞读取，异常时尝试自动重连。"""
+        """接收线程：阻塞等待数据到达（POSIX 下 pyserial 内部使用 select），异常时尝试自动重连。"""
         while self._running:
             ser = self._ser
             if not ser:
@@ -87,25 +108,36 @@ class SerialManager:
                 if not ser.is_open:
                     raise SerialException("串口未打开")
 
-                waiting = ser.in_waiting or 0
-                if waiting == 0:
-                    # 轻量 sleep，避免空转占用 CPU
-                    time.sleep(0.02)
-                    continue
-
-                data = ser.read(waiting)
+                if self._inter_byte_timeout is not None:
+                    # 收满一块、字节间隔超时或整体超时即返回
+                    data = ser.read(self._rx_chunk_size)
+                else:
+                    # 阻塞等待首字节，随后一次取走驱动缓冲区中已到达的全部数据
+                    data = ser.read(1)
+                    if data:
+                        waiting = ser.in_waiting or 0
+                        if waiting:
+                            data += ser.read(waiting)
                 if data:
                     self.bus.publish("serial.rx", data)
             except SerialException as exc:
-                self._log(f"[ERROR] 接收异常: {exc}")
+                logger.error("接收异常: %s", exc)
                 self.bus.publish("serial.error", str(exc))
                 self._attempt_reconnect()
             except Exception as exc:
                 # 防止线程崩溃
-                self._log(f"[ERROR] 未知接收异常: {exc}")
+                logger.error("未知接收异常: %s", exc)
                 self.bus.publish("serial.error", str(exc))
                 time.sleep(0.1)
 
+    def _open_port(self) -> serial.Serial:
+        return serial.Serial(
+            port=self._port,
+            baudrate=self._baudrate,
+            timeout=self._read_timeout,
+            inter_byte_timeout=self._inter_byte_timeout,
+        )
+
     def _attempt_reconnect(self) -> None:
         """自动重连，不阻塞关闭操作。"""
         if not self._running:
@@ -115,22 +147,17 @@ class SerialManager:
         if not port or not baudrate:
             return
 
-        self._log(f"尝试重连串口: {port}")
+        logger.info("尝试重连串口: %s", port)
         while self._running:
             try:
                 with self._lock:
                     if self._ser and self._ser.is_open:
                         return
-                    self._ser = serial.Serial(port=port, baudrate=baudrate, timeout=0.1)
-                self._log(f"重连成功: {port}")
+                    self._ser = self._open_port()
+                logger.info("重连成功: %s", port)
                 self.bus.publish("serial.opened", port)
                 return
             except SerialException as exc:
-                self._log(f"[WARN] 重连失败: {exc}")
+                logger.warning("重连失败: %s", exc)
                 self.bus.publish("serial.error", f"reconnect failed: {exc}")
                 time.sleep(1)
-
-    @staticmethod
-    def _log(msg: str) -> None:
-        # 简易日志，后续可换成 loguru/logging
-        print(f"[SerialManager] {msg}")
@@ -8,6 +8,9 @@ import time
 from typing import Optional
 
 from core.event_bus import EventBus
+from utils.log_utils import get_logger
+
+logger = get_logger("TcpSession")
 
 
 class TcpSession:
@@ -31,10 +34,10 @@ class TcpSession:
                 self._running = True
                 self._rx_thread = threading.Thread(target=self._rx_loop, daemon=True)
                 self._rx_thread.start()
-                self._log(f"TCP 已连接 {ip}:{port}")
+                logger.info("TCP 已连接 %s:%s", ip, port)
                 self.bus.publish("tcp.connected", f"{ip}:{port}")
             except OSError as exc:
-                self._log(f"[ERROR] 连接失败: {exc}")
+                logger.error("连接失败: %s", exc)
                 self.bus.publish("tcp.error", str(exc))
 
     def close(self) -> None:
@@ -56,13 +59,13 @@ class TcpSession:
         with self._lock:
             sock = self._sock
         if not sock:
-            self._log("[WARN] TCP 未连接，发送忽略")
+            logger.warning("TCP 未连接，发送忽略")
             return
         try:
             sock.sendall(data)
             self.bus.publish("tcp.tx", data)
         except OSError as exc:
-            self._log(f"[ERROR] 发送失败: {exc}")
+            logger.error("发送失败: %s", exc)
             self.bus.publish("tcp.error", str(exc))
 
     def _rx_loop(self) -> None:
@@ -75,7 +78,7 @@ class TcpSession:
             try:
                 chunk = sock.recv(4096)
                 if not chunk:
-                    self._log("对端关闭连接")
+                    logger.info("对端关闭连接")
                     self.bus.publish("tcp.disconnected")
                     self.close()
                     return
@@ -83,11 +86,7 @@ class TcpSession:
             except socket.timeout:
                 continue  # 正常轮询
             except OSError as exc:
-                self._log(f"[ERROR] 接收异常: {exc}")
+                logger.error("接收异常: %s", exc)
                 self.bus.publish("tcp.error", str(exc))
                 self.close()
                 return
-
-    @staticmethod
-    def _log(msg: str) -> None:
-        print(f"[TcpSession] {msg}")
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from actions.registry import ActionRegistry
+from dsl.ast_nodes import ActionCall, ScriptAST, State
+from dsl.expression import CompiledExpr, compile_expr, is_constant_expr
+
+# 跳转到未声明的 done 状态：直接结束
+DONE = -1
+TERMINAL_STATE = "done"
+
+
+@dataclass
+class CompiledAction:
+    name: str
+    fn: Callable[..., Any]
+    args: Dict[str, Any]
+
+
+@dataclass
+class CompiledState:
+    """编译后的状态：跳转目标为状态表下标，动作已绑定函数，when 已编译。"""
+
+    index: int
+    name: str
+    source: State
+    actions: List[CompiledAction] = field(default_factory=list)
+    on_event: Dict[Any, int] = field(default_factory=dict)
+    timeout_s: Optional[float] = None
+    on_timeout: Optional[int] = None
+    when: Optional[CompiledExpr] = None
+    goto: Optional[int] = None
+    else_goto: Optional[int] = None
+    terminal: bool = False
+
+
+@dataclass
+class CompiledMachine:
+    states: List[CompiledState]
+    initial: int
+    index: Dict[str, int]
+
+
+def compile_state_machine(ast: ScriptAST, registry=ActionRegistry) -> CompiledMachine:
+    """parse_script 之后的编译步骤：建立状态下标表、预绑定动作、预编译 when。
+
+    未注册的动作、未声明的跳转目标（隐式的 done 除外）、无法解析的 when 在此处直接报错，
+    而不是运行到该状态时才失败。需要在动作注册完成后调用。
+    """
+    sm = ast.state_machine
+    index = {name: idx for idx, name in enumerate(sm.states)}
+
+    def target(state: State, kind: str, name: Optional[str]) -> Optional[int]:
+        if not name:
+            return None
+        if name in index:
+            return index[name]
+        if name == TERMINAL_STATE:
+            return DONE
+        raise ValueError(f"状态 {state.name} 的 {kind} 指向未定义的状态: {name}")
+
+    states: List[CompiledState] = []
+    for idx, state in enumerate(sm.states.values()):
+        compiled = CompiledState(
+            index=idx,
+            name=state.name,
+            source=state,
+            actions=[_compile_action(state, action, registry) for action in state.actions],
+            on_event={evt: target(state, "on_event", dst) for evt, dst in state.on_event.items()},
+            timeout_s=state.timeout / 1000.0 if state.timeout else None,
+            on_timeout=target(state, "on_timeout", state.on_timeout),
+            goto=target(state, "goto", state.goto),
+            else_goto=target(state, "else_goto", state.else_goto),
+            terminal=state.name == TERMINAL_STATE,
+        )
+        if state.when:
+            compiled.when = _compile_condition(state, str(state.when))
+        states.append(compiled)
+
+    return CompiledMachine(states=states, initial=index[sm.initial], index=index)
+
+
+def _compile_action(state: State, action: ActionCall, registry) -> CompiledAction:
+    try:
+        fn = registry.get(action.name)
+    except KeyError as exc:
+        raise ValueError(f"状态 {state.name} 使用了未注册的动作: {action.name}") from exc
+    args = action.args or {}
+    # 预热参数中表达式的编译缓存；log 等参数允许非表达式文本，解析失败时留给动作自行处理
+    for value in args.values():
+        if isinstance(value, str) and "$" in value:
+            try:
+                compile_expr(value)
+            except SyntaxError:
+                pass
+    return CompiledAction(name=action.name, fn=fn, args=args)
+
+
+def _compile_condition(state: State, expr: str) -> CompiledExpr:
+    compiled = _compile_or_raise(state, expr)
+    if is_constant_expr(expr):
+        # 常量条件在加载时折叠为固定结果
+        value = bool(compiled({}))
+        return lambda env: value
+    return lambda env: bool(compiled(env))
+
+
+def _compile_or_raise(state: State, expr: str) -> CompiledExpr:
+    try:
+        return compile_expr(expr)
+    except SyntaxError as exc:
+        raise ValueError(f"状态 {state.name} 的表达式无法解析: {expr!r} ({exc.msg})") from exc
@@ -1,20 +1,26 @@
 from __future__ import annotations
 
-import time
+import logging
 from typing import Optional
 
 from dsl.ast_nodes import ScriptAST, State
-from dsl.expression import eval_expr
+from dsl.compiler import DONE, CompiledMachine, CompiledState, compile_state_machine
 from runtime.context import RuntimeContext
+from utils.timing import Deadline
 
 
 class StateMachineExecutor:
-    """简单的状态机虚拟机：执行 do -> 事件/超时 -> 条件跳转。"""
+    """简单的状态机虚拟机：执行 do -> 事件/超时 -> 条件跳转。
 
-    def __init__(self, ast: ScriptAST, context: RuntimeContext) -> None:
+    运行前先经 compile_state_machine 编译：跳转按下标进行，动作函数与 when 条件已预先绑定。
+    """
+
+    def __init__(self, ast: ScriptAST, context: RuntimeContext, machine: Optional[CompiledMachine] = None) -> None:
         self.ast = ast
         self.ctx = context
-        self.current: Optional[State] = ast.state_machine.states[ast.state_machine.initial]
+        self.machine = machine or compile_state_machine(ast)
+        self._state: Optional[CompiledState] = self.machine.states[self.machine.initial]
+        self.current: Optional[State] = self._state.source
         self.done = False
 
     def run(self) -> None:
@@ -23,58 +29,76 @@ class StateMachineExecutor:
                 self.ctx.record_state(self.current.name)
             except Exception:
                 pass
-        while not self.done and self.current:
-            state = self.current
-            self.ctx.logger.info(f"[STATE] {state.name}")
+        while not self.done and self._state:
+            state = self._state
+            self.ctx.logger.info("[STATE] %s", state.name)
             self._run_actions(state)
 
             # 条件 goto
-            if state.goto:
-                if state.when:
-                    cond = bool(eval_expr(state.when, self.ctx.vars_snapshot()))
-                    target = state.goto if cond else state.else_goto
-                    if target:
-                        self._goto(target)
-                        continue
-                else:
-                    self._goto(state.goto)
-                    continue
+            target = self._next_by_goto(state)
+            if target is not None:
+                self._enter(target)
+                continue
 
             # 事件/超时
             next_state = self._wait_event_or_timeout(state)
-            if next_state:
-                self._goto(next_state)
+            if next_state is not None:
+                self._enter(next_state)
             else:
                 self.done = True
 
-    def _run_actions(self, state: State) -> None:
+    def _run_actions(self, state: CompiledState) -> None:
+        debug = self.ctx.logger.isEnabledFor(logging.DEBUG)
         for action in state.actions:
-            self.ctx.logger.debug(f"  do: {action.name} {action.args}")
-            self.ctx.run_action(action.name, action.args)
+            if debug:
+                self.ctx.logger.debug("  do: %s %s", action.name, action.args)
+            self.ctx.run_action(action.name, action.args, fn=action.fn)
+
+    def _next_by_goto(self, state: CompiledState) -> Optional[int]:
+        if state.goto is None:
+            return None
+        if state.when is None:
+            return state.goto
+        return state.goto if state.when(self.ctx.vars_view()) else state.else_goto
 
-    def _wait_event_or_timeout(self, state: State) -> Optional[str]:
-        if not state.on_event and not state.timeout:
+    def _wait_event_or_timeout(self, state: CompiledState) -> Optional[int]:
+        if not state.on_event and not state.timeout_s:
             return None
-        deadline = time.time() + (state.timeout / 1000.0 if state.timeout else 1e9)
-        while time.time() <= deadline and not self.done:
-            evt = self.ctx.next_event(timeout=0.1)
+        # 无超时的状态一直等待事件；next_event 按剩余时间阻塞，不再以 100ms 为粒度轮询
+        deadline = Deadline(state.timeout_s or None)
+        while not self.done and not self._should_stop():
+            if deadline.expired():
+                break
+            evt = self.ctx.next_event(timeout=deadline.remaining())
             if evt is None:
                 continue
-            self.ctx.logger.debug(f"  event: {evt}")
+            self.ctx.logger.debug("  event: %s", evt)
             if evt in state.on_event:
                 return state.on_event[evt]
         return state.on_timeout
 
-    def _goto(self, name: str) -> None:
-        if name not in self.ast.state_machine.states:
-            self.ctx.logger.warning(f"未知状态: {name}")
+    def _should_stop(self) -> bool:
+        """子类可覆盖以支持外部停止；停止时应调用 ctx.wakeup() 打断等待。"""
+        return False
+
+    def _enter(self, index: int) -> None:
+        if index == DONE:
             self.done = True
             return
-        self.current = self.ast.state_machine.states[name]
-        if self.current and hasattr(self.ctx, "record_state"):
+        self._state = self.machine.states[index]
+        self.current = self._state.source
+        if hasattr(self.ctx, "record_state"):
             try:
                 self.ctx.record_state(self.current.name)
             except Exception:
                 pass
-        if self.current.name == "done":
+        if self._state.terminal:
+            self.done = True
+
+    def _goto(self, name: str) -> None:
+        index = self.machine.index.get(name)
+        if index is None:
+            self.ctx.logger.warning(f"未知状态: {name}")
             self.done = True
+            return
+        self._enter(index)
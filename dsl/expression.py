@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import ast
 import operator
-import time
-from typing import Any, Dict
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Mapping, Tuple
+
+from utils.timing import timestamp_ns
 
 
 _OPS = {
@@ -98,27 +101,133 @@ class SafeEvaluator(ast.NodeVisitor):
         raise ValueError(f"不支持的表达式: {type(node).__name__}")
 
 
+_VAR_RE = re.compile(r"\$([A-Za-z_][\w\.]*)")
+
+# 编译后的表达式：传入变量环境（任意 Mapping，键可为 a.b 或 a__b 形式）返回结果
+CompiledExpr = Callable[[Mapping[str, Any]], Any]
+
+
 def _prepare_expr(expr: str) -> str:
     """将 $var 或 $a.b 转换为合法变量名格式。"""
-    import re
+    return _VAR_RE.sub(lambda match: match.group(1).replace(".", "__"), expr)
+
+
+@lru_cache(maxsize=1024)
+def compile_expr(expr: str) -> CompiledExpr:
+    """预处理并编译表达式为闭包，按源文本缓存。
+
+    变量在求值时才从环境中按需查找，不再复制/改名整个变量表；
+    求值语义与 SafeEvaluator 一致（and/or 两侧都会求值，now 为当前毫秒时间戳）。
+    """
+    tree = ast.parse(_prepare_expr(expr), mode="eval")
+    return _compile_node(tree.body)
+
+
+def eval_expr(expr: str, env: Mapping[str, Any]) -> Any:
+    return compile_expr(expr)(env)
+
+
+def is_constant_expr(expr: str) -> bool:
+    """表达式不引用任何变量（含 now）时返回 True，可在加载时直接求值。"""
+    tree = ast.parse(_prepare_expr(expr), mode="eval")
+    return not any(isinstance(node, ast.Name) for node in ast.walk(tree))
+
+
+def _raise(exc: Exception) -> CompiledExpr:
+    # 不支持的语法保持与逐次解释相同的行为：求值到该节点时才报错
+    def run(env: Mapping[str, Any]) -> Any:
+        raise exc
+
+    return run
+
 
-    def repl(match: re.Match[str]) -> str:
-        name = match.group(1)
-        return name.replace(".", "__")
+def _compile_name(name: str) -> CompiledExpr:
+    if name == "now":
+        return lambda env: timestamp_ns() // 1_000_000
+    dotted = name.replace("__", ".")
+    keys: Tuple[str, ...] = (name,) if dotted == name else (name, dotted)
 
-    return re.sub(r"\$([A-Za-z_][\w\.]*)", repl, expr)
+    def load(env: Mapping[str, Any]) -> Any:
+        for key in keys:
+            try:
+                return env[key]
+            except KeyError:
+                continue
+        raise NameError(f"未知变量: {name}")
 
+    return load
 
-def _build_vars(env: Dict[str, Any]) -> Dict[str, Any]:
-    result: Dict[str, Any] = {}
-    for k, v in env.items():
-        result[k.replace(".", "__")] = v
-    result["now"] = int(time.time() * 1000)
-    return result
 
+def _compile_node(node: ast.AST) -> CompiledExpr:
+    if isinstance(node, ast.Name):
+        return _compile_name(node.id)
 
-def eval_expr(expr: str, env: Dict[str, Any]) -> Any:
-    prepared = _prepare_expr(expr)
-    vars_map = _build_vars(env)
-    evaluator = SafeEvaluator(vars_map)
-    return evaluator.eval(prepared)
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda env: value
+
+    if isinstance(node, ast.UnaryOp):
+        op = _OPS.get(type(node.op))
+        if op is None:
+            return _raise(ValueError("不支持的单目运算"))
+        operand = _compile_node(node.operand)
+        return lambda env: op(operand(env))
+
+    if isinstance(node, ast.BoolOp):
+        op = _OPS.get(type(node.op))
+        if op is None:
+            return _raise(ValueError("不支持的布尔运算"))
+        parts = [_compile_node(v) for v in node.values]
+
+        def bool_op(env: Mapping[str, Any]) -> Any:
+            values = [part(env) for part in parts]
+            result = values[0]
+            for v in values[1:]:
+                result = op(result, v)
+            return result
+
+        return bool_op
+
+    if isinstance(node, ast.BinOp):
+        op = _OPS.get(type(node.op))
+        if op is None:
+            return _raise(ValueError("不支持的运算符"))
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda env: op(left(env), right(env))
+
+    if isinstance(node, ast.Compare):
+        left = _compile_node(node.left)
+        chain = []
+        for op_node, comparator in zip(node.ops, node.comparators):
+            op = _OPS.get(type(op_node))
+            chain.append((op, _compile_node(comparator)))
+        if len(chain) == 1 and chain[0][0] is not None:
+            op, right = chain[0]
+            return lambda env: bool(op(left(env), right(env)))
+
+        def compare(env: Mapping[str, Any]) -> Any:
+            lhs = left(env)
+            for op, right in chain:
+                if op is None:
+                    raise ValueError("不支持的比较运算")
+                rhs = right(env)
+                if not op(lhs, rhs):
+                    return False
+                lhs = rhs
+            return True
+
+        return compare
+
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = _compile_node(node.test), _compile_node(node.body), _compile_node(node.orelse)
+        return lambda env: body(env) if test(env) else orelse(env)
+
+    if isinstance(node, ast.Attribute):
+        value, attr = _compile_node(node.value), node.attr
+        return lambda env: getattr(value(env), attr)
+
+    if isinstance(node, ast.Subscript):
+        value, key = _compile_node(node.value), _compile_node(node.slice)
+        return lambda env: value(env)[key(env)]
+
+    return _raise(ValueError(f"不支持的表达式: {type(node).__name__}"))
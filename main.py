@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import logging
 import sys
 
 try:
@@ -19,7 +20,12 @@ from ui.main_window import MainWindow
 
 
 def main() -> None:
+    # 组件日志统一走 logging；需要排查总线收发时把级别调到 DEBUG
+    logging.basicConfig(level=logging.INFO, format="[%(name)s] %(message)s")
     bus = EventBus()
+    # 高波特率下 RX 循环会产生大量小块，合并后再分发给 comm.rx / 协议解析 / UI
+    bus.coalesce("serial.rx", window_ms=5, max_bytes=4096)
+    bus.coalesce("tcp.rx", window_ms=5, max_bytes=4096)
     comm = CommunicationManager(bus)
     protocol = ProtocolLoader(bus)
     plugins = PluginManager(bus, protocol=protocol)
@@ -2,105 +2,17 @@ from __future__ import annotations
 
 import argparse
 import logging
-import socket
 import sys
-import time
 from typing import Any, Dict
 
 import yaml
 
 from actions import at_command, modbus_request, scpi_command, xmodem_send, ymodem_send
 from protocols import at, modbus_ascii, modbus_rtu, modbus_tcp, scpi, xmodem, ymodem  # noqa: F401 触发注册
+from protocols.registry import ProtocolRegistry
+from runtime.channels import BaseChannel, SerialChannel, TcpChannel
 from utils.path_utils import resolve_resource_path
 
-try:
-    import serial
-except ImportError:  # pragma: no cover
-    serial = None
-
-
-class BaseChannel:
-    def write(self, data: bytes | str) -> None:  # pragma: no cover - 接口
-        raise NotImplementedError()
-
-    def read(self, size: int = 1, timeout: float = 1.0) -> bytes:  # pragma: no cover - 接口
-        raise NotImplementedError()
-
-    def read_until(self, terminator: bytes, timeout: float = 1.0) -> bytes:
-        buf = bytearray()
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            chunk = self.read(1, timeout=max(0.01, deadline - time.time()))
-            if chunk:
-                buf.extend(chunk)
-                if buf.endswith(terminator):
-                    break
-            else:
-                time.sleep(0.01)
-        return bytes(buf)
-
-    def close(self) -> None:  # pragma: no cover - 接口
-        pass
-
-
-class SerialChannel(BaseChannel):
-    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 1.0) -> None:
-        if serial is None:
-            raise ImportError("pyserial 未安装，无法创建串口通道")
-        self.ser = serial.Serial(port=port, baudrate=baudrate, timeout=0)
-        self._timeout = timeout
-
-    def write(self, data: bytes | str) -> None:
-        payload = data.encode() if isinstance(data, str) else data
-        self.ser.write(payload)
-
-    def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
-        deadline = time.time() + timeout
-        buf = bytearray()
-        while len(buf) < size and time.time() < deadline:
-            chunk = self.ser.read(size - len(buf))
-            if chunk:
-                buf.extend(chunk)
-            else:
-                time.sleep(0.01)
-        return bytes(buf)
-
-    def close(self) -> None:
-        try:
-            self.ser.close()
-        except Exception:
-            pass
-
-
-class TcpChannel(BaseChannel):
-    def __init__(self, host: str, port: int, timeout: float = 2.0) -> None:
-        self.sock = socket.create_connection((host, port), timeout=timeout)
-        self.sock.settimeout(0.5)
-
-    def write(self, data: bytes | str) -> None:
-        payload = data.encode() if isinstance(data, str) else data
-        self.sock.sendall(payload)
-
-    def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
-        deadline = time.time() + timeout
-        buf = bytearray()
-        while len(buf) < size and time.time() < deadline:
-            try:
-                chunk = self.sock.recv(size - len(buf))
-                if chunk:
-                    buf.extend(chunk)
-                else:
-                    time.sleep(0.01)
-            except socket.timeout:
-                continue
-        return bytes(buf)
-
-    def close(self) -> None:
-        try:
-            self.sock.close()
-        except Exception:
-            pass
-
 
 ACTIONS = {
     "at_command": at_command.run,
@@ -121,17 +33,12 @@ def build_channels(config: Dict[str, Any]) -> Dict[str, BaseChannel]:
     channels: Dict[str, BaseChannel] = {}
     for name, cfg in channels_cfg.items():
         ctype = str(cfg.get("type", "serial")).lower()
+        # 与 DSL 共用 runtime.channels 的带缓冲通道；tasks 配置中串口字段名为 port
         if ctype == "serial":
-            channels[name] = SerialChannel(
-                port=cfg["port"],
-                baudrate=int(cfg.get("baudrate", 115200)),
-                timeout=float(cfg.get("timeout", 1.0)),
-            )
+            channels[name] = SerialChannel({"device": cfg["port"], "baudrate": int(cfg.get("baudrate", 115200))})
         elif ctype == "tcp":
             channels[name] = TcpChannel(
-                host=cfg["host"],
-                port=int(cfg["port"]),
-                timeout=float(cfg.get("timeout", 2.0)),
+                {"host": cfg["host"], "port": int(cfg["port"]), "timeout": float(cfg.get("timeout", 2.0))}
             )
         else:
             raise ValueError(f"不支持的通道类型: {ctype}")
@@ -180,6 +87,8 @@ def main(argv: list[str] | None = None) -> int:
         return 1
     finally:
         for ch in channels.values():
+            # 任务动作按通道缓存协议会话，通道关闭前一并丢弃
+            ProtocolRegistry.discard_sessions(ch)
             try:
                 ch.close()
             except Exception:
@@ -0,0 +1,312 @@
+"""asyncio 协议实现：配合 runtime.async_channels 使用，execute 为协程。
+
+各类继承对应的同步实现，组帧/解析/校验（build_request、parse_response、_build_frame、_unwrap、
+PacketBuffer 等）完全复用，只把读写改为 await；XMODEM/YMODEM 的传输逻辑是同步实现中的
+收发步骤生成器（_transfer），这里由 run_steps_async 逐步 await 执行。一次事务期间持有 channel.lock，
+同一通道上的并发协程依次执行，不同通道之间互不阻塞。
+
+    channels = await open_async_channels(cfg)
+    rtu = ProtocolRegistry.get_async("modbus_rtu")(channels["bus"])
+    result = await rtu.execute(function=3, address=0, quantity=2, unit_id=1)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from protocols.at import ATProtocol
+from protocols.modbus_ascii import ModbusASCII
+from protocols.modbus_rtu import ModbusRTU
+from protocols.modbus_tcp import ModbusTCP
+from protocols.registry import ProtocolRegistry
+from protocols.scpi import SCPIProtocol
+from protocols.xmodem import Steps, XModem
+from protocols.ymodem import YModem
+from utils.timing import Deadline
+
+
+class AsyncModbusRTU(ModbusRTU):
+    async def execute(
+        self,
+        function: int,
+        address: int,
+        quantity: int = 1,
+        values=None,
+        unit_id: int = 1,
+        retries: int = 3,
+        timeout: int = 1000,
+    ):
+        frame = self._build_frame(function, address, quantity, values, unit_id)
+        last_error: Optional[Exception] = None
+        async with self.channel.lock:
+            for attempt in range(1, retries + 1):
+                self._log("info", f"RTU TX 尝试 {attempt}/{retries}")
+                await self._wait_silent()
+                await self.channel.write(frame)
+                resp = await self._read_frame(timeout / 1000.0)
+                self._idle_since = time.monotonic()
+                try:
+                    pdu = self._unwrap(resp, unit_id)
+                except (TimeoutError, ValueError) as exc:
+                    last_error = exc
+                    continue
+                return self.parse_response(pdu)
+
+        if last_error:
+            raise last_error
+        raise TimeoutError("Modbus RTU 重试耗尽")
+
+    async def _wait_silent(self) -> None:
+        if self.silent_interval > 0:
+            wait = self._idle_since + self.silent_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def _read_frame(self, timeout_s: float) -> Optional[bytes]:
+        deadline = Deadline(timeout_s)
+        buf = bytearray(await self.channel.read_exact(3, timeout=deadline.remaining()))
+        if len(buf) < 3:
+            return bytes(buf) if buf else None
+        expected_len = self._guess_length(buf)
+        if expected_len is None:
+            await self._read_until_gap(buf, deadline)
+            return bytes(buf)
+        if expected_len > len(buf) and not deadline.expired():
+            buf.extend(await self.channel.read_exact(expected_len - len(buf), timeout=deadline.remaining()))
+        return bytes(buf)
+
+    async def _read_until_gap(self, buf: bytearray, deadline: Deadline) -> None:
+        while not deadline.expired():
+            chunk = await self.channel.read_some(256, timeout=min(self._t15, deadline.remaining()))
+            if chunk:
+                buf.extend(chunk)
+                continue
+            if len(buf) >= 4 and self._check_crc(buf):
+                return
+            chunk = await self.channel.read_some(256, timeout=min(self._t35 - self._t15, deadline.remaining()))
+            if not chunk:
+                return
+            buf.extend(chunk)
+
+
+class AsyncModbusASCII(ModbusASCII):
+    async def execute(
+        self,
+        function: int,
+        address: int,
+        quantity: int = 1,
+        values=None,
+        unit_id: int = 1,
+        retries: int = 3,
+        timeout: int = 1000,
+    ):
+        frame = self._build_frame(function, address, quantity, values, unit_id)
+        last_error: Optional[Exception] = None
+        async with self.channel.lock:
+            for attempt in range(1, retries + 1):
+                self._log("info", f"ASCII TX 尝试 {attempt}/{retries}")
+                await self.channel.write(frame)
+                raw_line = await self.channel.read_until(b"\r\n", timeout=timeout / 1000.0)
+                try:
+                    pdu = self._unwrap(raw_line, unit_id)
+                except (TimeoutError, ValueError) as exc:
+                    last_error = exc
+                    continue
+                return self.parse_response(pdu)
+
+        if last_error:
+            raise last_error
+        raise TimeoutError("Modbus ASCII 重试耗尽")
+
+
+class AsyncModbusTCP(ModbusTCP):
+    """流水线与 TID 匹配同 ModbusTCP；execute_many 期间独占通道。"""
+
+    async def execute(
+        self,
+        function: int,
+        address: int,
+        quantity: int = 1,
+        values=None,
+        unit_id: int = 1,
+        timeout: float = 2.0,
+    ):
+        request = {"function": function, "address": address, "quantity": quantity, "values": values, "unit_id": unit_id}
+        return (await self.execute_many([request], timeout=timeout, max_in_flight=1))[0]
+
+    async def execute_many(
+        self,
+        requests: Iterable[Dict[str, Any]],
+        timeout: float = 2.0,
+        max_in_flight: int = ModbusTCP.DEFAULT_MAX_IN_FLIGHT,
+    ) -> List[Any]:
+        frames = [self._build_frame(**req) for req in requests]
+        results: List[Any] = [None] * len(frames)
+        in_flight: Dict[int, Tuple[int, int]] = {}
+        window = max(1, int(max_in_flight))
+        next_index = 0
+        remaining = len(frames)
+
+        async with self.channel.lock:
+            while remaining:
+                if next_index < len(frames) and len(in_flight) < window:
+                    batch = bytearray()
+                    while next_index < len(frames) and len(in_flight) < window:
+                        tid, unit_id, frame = frames[next_index]
+                        in_flight[tid] = (next_index, unit_id)
+                        batch.extend(frame)
+                        next_index += 1
+                    await self.channel.write(bytes(batch))
+
+                resp_tid, resp_uid, pdu_resp = await self._read_response(timeout)
+                slot = in_flight.pop(resp_tid, None)
+                if slot is None:
+                    self._log("warning", f"Modbus TCP 丢弃未知事务的响应: tid={resp_tid}")
+                    continue
+                index, unit_id = slot
+                if resp_uid != unit_id:
+                    raise ValueError(f"Modbus TCP 单元号不匹配: {resp_uid}")
+                results[index] = self.parse_response(pdu_resp)
+                remaining -= 1
+        return results
+
+    async def _read_response(self, timeout: float) -> Tuple[int, int, bytes]:
+        resp_tid, resp_uid, pdu_len = self._parse_header(await self.channel.read_exact(7, timeout=timeout))
+        pdu_resp = await self.channel.read_exact(pdu_len, timeout=timeout)
+        if len(pdu_resp) != pdu_len:
+            raise TimeoutError("Modbus TCP 读取 PDU 超时")
+        return resp_tid, resp_uid, pdu_resp
+
+
+class AsyncATProtocol(ATProtocol):
+    async def execute(
+        self,
+        cmd: str,
+        timeout: float = 2.0,
+        terminator: bytes | str = b"\r\n",
+        ok: str = "OK",
+        error: str = "ERROR",
+        echo: bool = True,
+    ):
+        terminator_bytes = terminator if isinstance(terminator, (bytes, bytearray)) else str(terminator).encode()
+        payload = self._build_command(cmd, terminator_bytes)
+        deadline = Deadline(timeout)
+        lines: List[str] = []
+        async with self.channel.lock:
+            await self.channel.write(payload)
+            while not deadline.expired():
+                line = await self.channel.read_until(terminator_bytes, timeout=deadline.remaining())
+                if not line:
+                    continue
+                result = self._handle_line(line, cmd, ok, error, echo, lines)
+                if result is not None:
+                    return result
+        raise TimeoutError("AT command timeout waiting for OK/ERROR")
+
+
+class AsyncSCPIProtocol(SCPIProtocol):
+    async def execute(
+        self,
+        cmd: str,
+        expect_response: bool | None = None,
+        timeout: float = 2.0,
+        terminator: bytes | str = b"\n",
+        strip: bool = True,
+    ) -> Dict[str, Any]:
+        term_bytes = terminator if isinstance(terminator, (bytes, bytearray)) else str(terminator).encode()
+        payload = self._build_command(cmd, term_bytes)
+        should_read = expect_response
+        if should_read is None:
+            should_read = "?" in cmd
+        async with self.channel.lock:
+            await self.channel.write(payload)
+            if not should_read:
+                return {"ok": True, "raw": b"", "text": None}
+            resp = await self._read_response(term_bytes, timeout)
+        if resp is None:
+            raise TimeoutError("SCPI response timeout")
+        return self._parse(resp, strip)
+
+    async def _read_response(self, terminator: bytes, timeout: float) -> bytes | None:
+        deadline = Deadline(timeout)
+        first = await self._read_exact(1, deadline)
+        if not first:
+            return None
+
+        if first == b"#":
+            length_info = await self._read_exact(1, deadline)
+            if not length_info or not length_info.isdigit():
+                return first + (length_info or b"")
+            digits = int(length_info.decode())
+            len_bytes = await self._read_exact(digits, deadline) if digits > 0 else b""
+            try:
+                data_len = int(len_bytes.decode()) if len_bytes else 0
+            except ValueError:
+                data_len = 0
+            data = await self._read_exact(data_len, deadline) if data_len > 0 else b""
+            tail = await self._read_until_terminator(terminator, deadline)
+            return b"".join([first, length_info, len_bytes or b"", data or b"", tail])
+
+        rest = await self._read_until_terminator(terminator, deadline)
+        return first + (rest or b"")
+
+    async def _read_until_terminator(self, terminator: bytes, deadline: Deadline) -> bytes:
+        buf = bytearray()
+        while not deadline.expired():
+            chunk = await self.channel.read_until(terminator, timeout=deadline.remaining())
+            if chunk:
+                buf.extend(chunk)
+                if buf.endswith(terminator):
+                    break
+        return bytes(buf)
+
+    async def _read_exact(self, size: int, deadline: Deadline) -> bytes | None:
+        data = await self.channel.read_exact(size, timeout=deadline.remaining())
+        return data if len(data) == size else None
+
+
+async def run_steps_async(channel: Any, steps: Steps) -> Any:
+    """在 asyncio 通道上执行 XMODEM/YMODEM 的收发步骤（见 protocols.xmodem.run_steps）。"""
+    reply: Optional[bytes] = None
+    while True:
+        try:
+            step = steps.send(reply)
+        except StopIteration as stop:
+            return stop.value
+        if step[0] == "write":
+            await channel.write(step[1])
+            reply = None
+        else:
+            reply = await channel.read(step[1], timeout=step[2])
+
+
+class AsyncXModem(XModem):
+    async def execute(
+        self,
+        file_path: str,
+        retries: int = 10,
+        start_timeout: float = 10.0,
+        block_size: int = 128,
+        fallback_after: int = 3,
+    ):
+        async with self.channel.lock:
+            return await run_steps_async(
+                self.channel, self._transfer(file_path, retries, start_timeout, block_size, fallback_after)
+            )
+
+
+class AsyncYModem(YModem):
+    async def execute(self, file_path: str, retries: int = 10, start_timeout: float = 10.0, window: int = 1):
+        async with self.channel.lock:
+            return await run_steps_async(self.channel, self._transfer(file_path, retries, start_timeout, window))
+
+
+ProtocolRegistry.register_async("modbus_rtu", AsyncModbusRTU)
+ProtocolRegistry.register_async("modbus_ascii", AsyncModbusASCII)
+ProtocolRegistry.register_async("modbus_tcp", AsyncModbusTCP)
+ProtocolRegistry.register_async("at", AsyncATProtocol)
+ProtocolRegistry.register_async("scpi", AsyncSCPIProtocol)
+ProtocolRegistry.register_async("xmodem", AsyncXModem)
+ProtocolRegistry.register_async("ymodem", AsyncYModem)
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import time
 from typing import List
 
 from protocols.base import BaseProtocol
 from protocols.registry import ProtocolRegistry
+from utils.timing import Deadline
 
 
 class ATProtocol(BaseProtocol):
@@ -23,31 +23,35 @@ class ATProtocol(BaseProtocol):
         payload = self._build_command(cmd, terminator_bytes)
         self.channel.write(payload)
 
-        deadline = time.time() + timeout
+        deadline = Deadline(timeout)
         lines: List[str] = []
 
-        while time.time() < deadline:
+        while not deadline.expired():
             line = self._read_line(deadline, terminator_bytes)
             if line is None:
                 continue
 
-            text = line.decode(errors="ignore").strip()
-            if not text:
-                continue
-
-            if echo and text.upper() == cmd.strip().upper():
-                continue
-
-            if text.upper() == ok.upper():
-                return {"ok": True, "lines": lines}
-
-            if text.upper().startswith(error.upper()):
-                return {"ok": False, "lines": lines, "error": text}
-
-            lines.append(text)
+            result = self._handle_line(line, cmd, ok, error, echo, lines)
+            if result is not None:
+                return result
 
         raise TimeoutError("AT command timeout waiting for OK/ERROR")
 
+    @staticmethod
+    def _handle_line(line: bytes, cmd: str, ok: str, error: str, echo: bool, lines: List[str]):
+        """处理一行响应：遇到 OK/ERROR 返回结果，其余内容追加到 lines 并返回 None。"""
+        text = line.decode(errors="ignore").strip()
+        if not text:
+            return None
+        if echo and text.upper() == cmd.strip().upper():
+            return None
+        if text.upper() == ok.upper():
+            return {"ok": True, "lines": lines}
+        if text.upper().startswith(error.upper()):
+            return {"ok": False, "lines": lines, "error": text}
+        lines.append(text)
+        return None
+
     def _build_command(self, cmd: str, terminator: bytes) -> bytes:
         cmd_txt = cmd.strip()
         if not cmd_txt.upper().startswith("AT"):
@@ -57,11 +61,10 @@ class ATProtocol(BaseProtocol):
             cmd_bytes += terminator
         return cmd_bytes
 
-    def _read_line(self, deadline: float, terminator: bytes) -> bytes | None:
-        remaining = deadline - time.time()
-        if remaining <= 0:
+    def _read_line(self, deadline: Deadline, terminator: bytes) -> bytes | None:
+        if deadline.expired():
             return None
-        data = self.channel.read_until(terminator, timeout=remaining)
+        data = self.channel.read_until(terminator, timeout=deadline.remaining())
         return data if data else None
 
 
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import time
-
 from protocols.modbus_base import ModbusBase
 from protocols.registry import ProtocolRegistry
 from utils.lrc import lrc_modbus_ascii
@@ -20,40 +18,43 @@ class ModbusASCII(ModbusBase):
         retries: int = 3,
         timeout: int = 1000,
     ):
-        request_pdu = self.build_request(function, address, quantity, values, unit_id)
-        payload = bytes([unit_id & 0xFF]) + request_pdu
-        lrc = lrc_modbus_ascii(payload)
-        frame = f":{payload.hex().upper()}{lrc:02X}\r\n".encode("ascii")
+        frame = self._build_frame(function, address, quantity, values, unit_id)
 
         last_error: Exception | None = None
         for attempt in range(1, retries + 1):
             self._log("info", f"ASCII TX 尝试 {attempt}/{retries}")
             self.channel.write(frame)
             raw_line = self._read_line(timeout / 1000.0)
-            if not raw_line:
-                last_error = TimeoutError("Modbus ASCII 超时未响应")
-                continue
-
-            decoded = self._decode_frame(raw_line)
-            if not decoded:
-                last_error = ValueError("Modbus ASCII 解码失败")
-                continue
-
-            if not self._check_lrc(decoded):
-                last_error = ValueError("Modbus ASCII LRC 校验失败")
+            try:
+                pdu = self._unwrap(raw_line, unit_id)
+            except (TimeoutError, ValueError) as exc:
+                last_error = exc
                 continue
-
-            data = decoded[:-1]  # 去掉 LRC
-            if data[0] != (unit_id & 0xFF):
-                last_error = ValueError(f"Modbus ASCII 单元号不匹配: {data[0]}")
-                continue
-
-            return self.parse_response(data[1:])
+            return self.parse_response(pdu)
 
         if last_error:
             raise last_error
         raise TimeoutError("Modbus ASCII 重试耗尽")
 
+    def _build_frame(self, function: int, address: int, quantity: int, values, unit_id: int) -> bytes:
+        payload = bytes([unit_id & 0xFF]) + self.build_request(function, address, quantity, values, unit_id)
+        lrc = lrc_modbus_ascii(payload)
+        return f":{payload.hex().upper()}{lrc:02X}\r\n".encode("ascii")
+
+    def _unwrap(self, raw_line: bytes | None, unit_id: int) -> bytes:
+        """解码并校验响应行（LRC/单元号），返回 PDU；同步与 asyncio 实现共用。"""
+        if not raw_line:
+            raise TimeoutError("Modbus ASCII 超时未响应")
+        decoded = self._decode_frame(raw_line)
+        if not decoded:
+            raise ValueError("Modbus ASCII 解码失败")
+        if not self._check_lrc(decoded):
+            raise ValueError("Modbus ASCII LRC 校验失败")
+        data = decoded[:-1]  # 去掉 LRC
+        if data[0] != (unit_id & 0xFF):
+            raise ValueError(f"Modbus ASCII 单元号不匹配: {data[0]}")
+        return data[1:]
+
     def _read_line(self, timeout_s: float):
         return self.channel.read_until(b"\r\n", timeout=timeout_s)
 
@@ -0,0 +1,311 @@
+"""Modbus RTU/ASCII 多站总线调度：每个通道一个调度器，由它独占通道串行收发。
+
+- 请求按优先级、截止时间排队；同一优先级在各单元之间轮转，某个单元的大量请求不会饿死其他单元；
+- 排队期间已过截止时间的请求不再发送，直接以 TimeoutError 结束；
+- 单元出现超时后只尝试一次（不再按 retries 重试），连续超时达到阈值进入退避期（指数增长），
+  退避期内该单元的请求立即以 ModbusUnitUnavailable 失败；到期后放行一次探测，成功即恢复；
+- RTU 帧之间保证 t3.5 静默间隔（ModbusRTU 按串口波特率在发送前等待）；
+- 每个单元统计请求、成功/超时/错误/快速失败次数、排队等待与总线占用时间。
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from protocols.modbus_rtu import ModbusRTU
+from protocols.registry import ProtocolRegistry
+from utils.log_utils import get_logger
+from utils.timing import now_ns
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+logger = get_logger("ModbusBus")
+
+
+class ModbusUnitUnavailable(RuntimeError):
+    """单元处于退避期（连续无响应），请求未发送即失败。"""
+
+    def __init__(self, unit_id: int, retry_in: float) -> None:
+        super().__init__(f"Modbus 单元 {unit_id} 无响应，退避中（{retry_in:.1f}s 后重试）")
+        self.unit_id = unit_id
+        self.retry_in = retry_in
+
+
+@dataclass
+class UnitStats:
+    unit_id: int
+    requests: int = 0
+    ok: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    fast_failed: int = 0
+    expired: int = 0
+    wait_ns: int = 0
+    busy_ns: int = 0
+    max_busy_ns: int = 0
+    consecutive_timeouts: int = 0
+    backoff_until: float = 0.0  # time.monotonic()
+
+    def as_dict(self, elapsed_ns: int) -> Dict[str, Any]:
+        served = self.ok + self.timeouts + self.errors
+        return {
+            "requests": self.requests,
+            "ok": self.ok,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "fast_failed": self.fast_failed,
+            "expired": self.expired,
+            "avg_wait_ms": self.wait_ns / served / 1e6 if served else 0.0,
+            "avg_busy_ms": self.busy_ns / served / 1e6 if served else 0.0,
+            "max_busy_ms": self.max_busy_ns / 1e6,
+            "busy_share": self.busy_ns / max(1, elapsed_ns),
+            "backoff_s": max(0.0, self.backoff_until - time.monotonic()),
+        }
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    deadline_at: float
+    seq: int
+    unit_id: int = field(compare=False)
+    request: Dict[str, Any] = field(compare=False)
+    retries: int = field(compare=False)
+    timeout_ms: float = field(compare=False)
+    future: Future = field(compare=False)
+    enqueued_ns: int = field(compare=False)
+
+
+class ModbusBus:
+    """单个通道上的多站调度器；通过 for_channel 获取，同一通道共享同一实例。"""
+
+    FAIL_THRESHOLD = 2
+    BACKOFF_INITIAL_S = 1.0
+    BACKOFF_MAX_S = 30.0
+
+    # 通道 -> 调度器；调度器引用着通道，关闭通道前须调用 discard（RuntimeContext.close）
+    _buses: Dict[Any, "ModbusBus"] = {}
+    _buses_lock = threading.Lock()
+
+    def __init__(self, channel: Any, protocol: str = "modbus_rtu", logger: Any = None, baudrate: Optional[int] = None) -> None:
+        self.protocol_name = protocol
+        self.protocol = ProtocolRegistry.session(protocol, channel, logger)
+        if baudrate and isinstance(self.protocol, ModbusRTU):
+            # 缺省由 ModbusRTU 从串口通道取波特率；非串口（如 RTU over TCP 网关）时由网关负责帧间隔
+            self.protocol.configure_timing(baudrate)
+        self._lock = threading.Lock()
+        self._pending: Dict[int, List[_Job]] = {}
+        self._order: Deque[int] = deque()  # 有排队请求的单元，按轮转顺序
+        self._stats: Dict[int, UnitStats] = {}
+        self._seq = itertools.count()
+        self._worker: Optional[threading.Thread] = None
+        self._started_ns = now_ns()
+        self._closed = False
+
+    @classmethod
+    def for_channel(
+        cls, channel: Any, protocol: str = "modbus_rtu", logger: Any = None, baudrate: Optional[int] = None
+    ) -> "ModbusBus":
+        with cls._buses_lock:
+            bus = cls._buses.get(channel)
+            if bus is not None and bus.protocol_name != protocol:
+                raise ValueError(f"通道已按 {bus.protocol_name} 调度，不能混用 {protocol}")
+            if bus is None or bus._closed:
+                bus = cls(channel, protocol, logger, baudrate)
+                cls._buses[channel] = bus
+            return bus
+
+    @classmethod
+    def get(cls, channel: Any) -> Optional["ModbusBus"]:
+        with cls._buses_lock:
+            return cls._buses.get(channel)
+
+    @classmethod
+    def discard(cls, channel: Any) -> None:
+        """通道关闭时调用：结束调度器并移除缓存。"""
+        with cls._buses_lock:
+            bus = cls._buses.pop(channel, None)
+        if bus is not None:
+            bus.close()
+
+    def submit(
+        self,
+        function: int,
+        address: int,
+        quantity: int = 1,
+        values=None,
+        unit_id: int = 1,
+        *,
+        retries: int = 3,
+        timeout: float = 1000,
+        priority: int = PRIORITY_NORMAL,
+        deadline: Optional[float] = None,
+    ) -> Future:
+        """排队一个请求，返回 Future；timeout 为单次应答超时（毫秒），deadline 为最晚发送时间（秒，相对现在）。"""
+        future: Future = Future()
+        request = {"function": function, "address": address, "quantity": quantity, "values": values, "unit_id": unit_id}
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ModbusBus 已关闭")
+            stats = self._unit_stats(unit_id)
+            stats.requests += 1
+            retry_in = stats.backoff_until - time.monotonic()
+            if retry_in > 0:
+                stats.fast_failed += 1
+                future.set_exception(ModbusUnitUnavailable(unit_id, retry_in))
+                return future
+            job = _Job(
+                priority=int(priority),
+                deadline_at=time.monotonic() + deadline if deadline is not None else math.inf,
+                seq=next(self._seq),
+                unit_id=unit_id,
+                request=request,
+                retries=max(1, int(retries)),
+                timeout_ms=float(timeout),
+                future=future,
+                enqueued_ns=now_ns(),
+            )
+            heap = self._pending.get(unit_id)
+            if heap is None:
+                heap = self._pending[unit_id] = []
+                self._order.append(unit_id)
+            heapq.heappush(heap, job)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="ModbusBus", daemon=True)
+                self._worker.start()
+        return future
+
+    def execute(self, function: int, address: int, quantity: int = 1, values=None, unit_id: int = 1, **kwargs: Any):
+        """同步执行：与协议的 execute 参数一致，另可传 priority / deadline。"""
+        return self.submit(function, address, quantity, values, unit_id, **kwargs).result()
+
+    def execute_many(self, requests: Iterable[Dict[str, Any]], **kwargs: Any) -> List[Any]:
+        """一次排队多个请求（可跨单元），全部结束后按顺序返回；有失败时抛出第一个异常。"""
+        futures = [self.submit(**req, **kwargs) for req in requests]
+        errors = [fut.exception() for fut in futures]
+        for exc in errors:
+            if exc is not None:
+                raise exc
+        return [fut.result() for fut in futures]
+
+    def stats(self) -> Dict[int, Dict[str, Any]]:
+        with self._lock:
+            elapsed = now_ns() - self._started_ns
+            return {unit_id: stats.as_dict(elapsed) for unit_id, stats in sorted(self._stats.items())}
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            jobs = [job for heap in self._pending.values() for job in heap]
+            self._pending.clear()
+            self._order.clear()
+        for job in jobs:
+            job.future.set_exception(RuntimeError("ModbusBus 已关闭"))
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                job = self._next_job()
+                if job is None:
+                    # 空闲即退出，下一次 submit 重新启动
+                    self._worker = None
+                    return
+            self._serve(job)
+
+    def _next_job(self) -> Optional[_Job]:
+        # 调用方需持有 _lock；各单元队首中取 (优先级, 截止时间) 最小者，相同时按轮转顺序
+        best_unit = None
+        best: Optional[_Job] = None
+        for unit_id in self._order:
+            head = self._pending[unit_id][0]
+            if best is None or (head.priority, head.deadline_at) < (best.priority, best.deadline_at):
+                best, best_unit = head, unit_id
+        if best is None:
+            return None
+        heap = self._pending[best_unit]
+        heapq.heappop(heap)
+        self._order.remove(best_unit)
+        if heap:
+            self._order.append(best_unit)
+        else:
+            del self._pending[best_unit]
+        return best
+
+    def _serve(self, job: _Job) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            return
+        with self._lock:
+            stats = self._stats[job.unit_id]
+            now = time.monotonic()
+            retry_in = stats.backoff_until - now
+            if retry_in > 0:
+                stats.fast_failed += 1
+            elif job.deadline_at <= now:
+                stats.expired += 1
+            else:
+                start_ns = now_ns()
+                stats.wait_ns += start_ns - job.enqueued_ns
+                # 最近超时过的单元只试一次，避免无响应的设备占用总线 retries × timeout
+                retries = 1 if stats.consecutive_timeouts else job.retries
+        if retry_in > 0:
+            job.future.set_exception(ModbusUnitUnavailable(job.unit_id, retry_in))
+            return
+        if job.deadline_at <= now:
+            job.future.set_exception(TimeoutError(f"Modbus 请求排队超过截止时间: unit={job.unit_id}"))
+            return
+
+        timeout_ms = job.timeout_ms
+        if job.deadline_at != math.inf:
+            timeout_ms = max(1.0, min(timeout_ms, (job.deadline_at - now) * 1000.0))
+        error: Optional[BaseException] = None
+        result: Any = None
+        try:
+            result = self.protocol.execute(**job.request, retries=retries, timeout=timeout_ms)
+        except Exception as exc:
+            error = exc
+        busy_ns = now_ns() - start_ns
+
+        with self._lock:
+            stats.busy_ns += busy_ns
+            stats.max_busy_ns = max(stats.max_busy_ns, busy_ns)
+            if error is None:
+                stats.ok += 1
+                stats.consecutive_timeouts = 0
+                stats.backoff_until = 0.0
+            elif isinstance(error, TimeoutError):
+                stats.timeouts += 1
+                stats.consecutive_timeouts += 1
+                if stats.consecutive_timeouts >= self.FAIL_THRESHOLD:
+                    backoff = min(
+                        self.BACKOFF_MAX_S,
+                        self.BACKOFF_INITIAL_S * 2 ** (stats.consecutive_timeouts - self.FAIL_THRESHOLD),
+                    )
+                    stats.backoff_until = time.monotonic() + backoff
+                    logger.warning(
+                        "Modbus 单元 %s 连续 %d 次无响应，退避 %.1fs", job.unit_id, stats.consecutive_timeouts, backoff
+                    )
+            else:
+                # CRC/长度错误说明单元在线但线路有干扰，不计入无响应
+                stats.errors += 1
+
+        if error is None:
+            job.future.set_result(result)
+        else:
+            job.future.set_exception(error)
+
+    def _unit_stats(self, unit_id: int) -> UnitStats:
+        stats = self._stats.get(unit_id)
+        if stats is None:
+            stats = self._stats[unit_id] = UnitStats(unit_id)
+        return stats
+
@@ -0,0 +1,150 @@
+"""Modbus 轮询计划：把按名称声明的读点合并为尽量少的块读请求，读回后再按名称拆分。
+
+同一单元、同一功能码（01/02/03/04）的读点按地址排序，相邻或间隔不超过 max_gap 的
+合并为一次读取，单次数量不超过协议上限（寄存器 125 个，线圈/离散输入 2000 个）。
+合并块若因跨过不存在的地址而返回异常响应，该块会被拆分（先去掉空闲地址，再拆为单点）后重读，
+之后的轮询沿用拆分后的计划。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+MAX_READ_REGISTERS = 125
+MAX_READ_BITS = 2000
+
+_BIT_FUNCTIONS = {0x01, 0x02}
+_REGISTER_FUNCTIONS = {0x03, 0x04}
+
+
+@dataclass(frozen=True)
+class PollPoint:
+    """一个命名读点：quantity 为 1 时结果为单个值，否则为列表。"""
+
+    name: str
+    address: int
+    quantity: int = 1
+    unit_id: int = 1
+    function: int = 0x03
+
+    @property
+    def end(self) -> int:
+        return self.address + self.quantity
+
+
+@dataclass
+class ReadBlock:
+    unit_id: int
+    function: int
+    address: int
+    quantity: int
+    points: List[PollPoint] = field(default_factory=list)
+
+    def request(self) -> Dict[str, Any]:
+        return {"function": self.function, "address": self.address, "quantity": self.quantity, "unit_id": self.unit_id}
+
+    def scatter(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """把块读结果按读点拆分为 {name: value}。"""
+        values: Sequence[Any] = result.get("bits" if self.function in _BIT_FUNCTIONS else "registers") or []
+        out: Dict[str, Any] = {}
+        for point in self.points:
+            offset = point.address - self.address
+            chunk = list(values[offset : offset + point.quantity])
+            if len(chunk) < point.quantity:
+                raise ValueError(f"Modbus 响应数据不足: {point.name}")
+            out[point.name] = chunk[0] if point.quantity == 1 else chunk
+        return out
+
+
+def max_quantity(function: int) -> int:
+    if function in _BIT_FUNCTIONS:
+        return MAX_READ_BITS
+    if function in _REGISTER_FUNCTIONS:
+        return MAX_READ_REGISTERS
+    raise ValueError(f"轮询只支持读功能码 01/02/03/04: {function}")
+
+
+def plan_reads(points: Iterable[PollPoint], max_gap: int = 0) -> List[ReadBlock]:
+    """按单元/功能码分组、按地址排序后贪心合并；间隔不超过 max_gap 的读点合入同一块。"""
+    groups: Dict[tuple, List[PollPoint]] = {}
+    for point in points:
+        limit = max_quantity(point.function)
+        if point.quantity <= 0 or point.quantity > limit:
+            raise ValueError(f"读点 {point.name} 数量超出范围 1..{limit}: {point.quantity}")
+        groups.setdefault((point.unit_id, point.function), []).append(point)
+
+    blocks: List[ReadBlock] = []
+    for (unit_id, function), group in groups.items():
+        limit = max_quantity(function)
+        block: Optional[ReadBlock] = None
+        for point in sorted(group, key=lambda p: (p.address, p.quantity)):
+            if block is not None:
+                end = block.address + block.quantity
+                new_end = max(end, point.end)
+                if point.address - end <= max_gap and new_end - block.address <= limit:
+                    block.quantity = new_end - block.address
+                    block.points.append(point)
+                    continue
+            block = ReadBlock(unit_id, function, point.address, point.quantity, [point])
+            blocks.append(block)
+    return blocks
+
+
+class PollPlan:
+    """一组读点的执行计划；同一计划可反复执行（每个轮询周期调用一次 run）。"""
+
+    def __init__(self, points: Iterable[PollPoint], max_gap: int = 0) -> None:
+        self.points = list(points)
+        self.max_gap = max(0, int(max_gap))
+        self.blocks = plan_reads(self.points, self.max_gap)
+
+    @property
+    def request_count(self) -> int:
+        return len(self.blocks)
+
+    def run(self, protocol: Any, **kwargs: Any) -> Dict[str, Any]:
+        """执行一次轮询，返回 {name: value}；kwargs（timeout/retries 等）透传给协议。
+
+        协议支持 execute_many（Modbus TCP）时所有块流水线发送，否则逐块执行。
+        读点本身的异常响应抛出 ValueError。
+        """
+        values, failed = self._read_blocks(protocol, self.blocks, kwargs)
+        while failed:
+            # 合并块跨过了设备不支持的地址：拆分后重读，并更新计划供后续周期使用
+            failed_ids = {id(b) for b in failed}
+            parts = [part for block in failed for part in self._split(block)]
+            self.blocks = [b for b in self.blocks if id(b) not in failed_ids] + parts
+            retry_values, failed = self._read_blocks(protocol, parts, kwargs)
+            values.update(retry_values)
+        return values
+
+    @staticmethod
+    def _split(block: ReadBlock) -> List[ReadBlock]:
+        # 先去掉读点之间的空闲地址；已无空闲地址时拆为单个读点
+        parts = plan_reads(block.points, 0)
+        if len(parts) > 1:
+            return parts
+        return [ReadBlock(p.unit_id, p.function, p.address, p.quantity, [p]) for p in block.points]
+
+    @staticmethod
+    def _read_blocks(
+        protocol: Any, blocks: List[ReadBlock], kwargs: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], List[ReadBlock]]:
+        requests = [block.request() for block in blocks]
+        if hasattr(protocol, "execute_many"):
+            results = protocol.execute_many(requests, **kwargs)
+        else:
+            results = [protocol.execute(**req, **kwargs) for req in requests]
+
+        values: Dict[str, Any] = {}
+        failed: List[ReadBlock] = []
+        for block, result in zip(blocks, results):
+            if result.get("exception") is None:
+                values.update(block.scatter(result))
+            elif len(block.points) > 1:
+                failed.append(block)
+            else:
+                point = block.points[0]
+                raise ValueError(f"Modbus 读点 {point.name} 异常响应: code={result['exception']}")
+        return values, failed
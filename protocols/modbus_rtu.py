@@ -5,11 +5,62 @@ from typing import Optional
 
 from protocols.modbus_base import ModbusBase
 from protocols.registry import ProtocolRegistry
-from utils.crc16 import crc16_modbus
+from utils.crc import crc16_modbus
+from utils.timing import Deadline
+
+
+def silent_interval(baudrate: int) -> float:
+    """帧间静默时间 t3.5（秒）：3.5 个字符时间（每字符 11 位）；波特率高于 19200 时规范固定为 1.75ms。"""
+    if baudrate > 19200:
+        return 0.00175
+    return 3.5 * 11 / max(1, int(baudrate))
+
+
+def inter_char_timeout(baudrate: int) -> float:
+    """帧内字符间最大间隔 t1.5（秒）；波特率高于 19200 时规范固定为 0.75ms。"""
+    if baudrate > 19200:
+        return 0.00075
+    return 1.5 * 11 / max(1, int(baudrate))
+
+
+def channel_baudrate(channel) -> Optional[int]:
+    """取串口通道的波特率；包装通道（LoggingChannel 等）通过 inner 指向实际通道，非串口返回 None。"""
+    while hasattr(channel, "inner"):
+        channel = channel.inner
+    baud = getattr(getattr(channel, "ser", None), "baudrate", None)
+    return int(baud) if baud else None
+
+
+# 响应为 addr+func+byte_count+数据+CRC 的功能码
+_BYTE_COUNT_FUNCTIONS = {0x01, 0x02, 0x03, 0x04, 0x0C, 0x11, 0x14, 0x15, 0x17}
+# 定长响应：addr(1)+func(1)+字段+CRC(2)
+_FIXED_LENGTHS = {0x05: 8, 0x06: 8, 0x07: 5, 0x08: 8, 0x0B: 8, 0x0F: 8, 0x10: 8, 0x16: 10}
 
 
 class ModbusRTU(ModbusBase):
-    """Modbus RTU：带 CRC16 的二进制帧。"""
+    """Modbus RTU：带 CRC16 的二进制帧。
+
+    收帧时先按地址/功能码/字节数推算帧长（快速路径，收齐即返回）；功能码未知时按字符间隔判帧：
+    静默超过 t1.5 且 CRC 正确，或静默达到 t3.5，即认为帧结束。
+    """
+
+    # 操作系统/USB 转串口驱动的交付延迟远大于字符时间，判帧间隔需加上这部分余量
+    GAP_ALLOWANCE = 0.005
+
+    # 发送前保证总线已静默的时间（秒），0 表示不等待；串口通道按波特率自动设置
+    silent_interval = 0.0
+    _idle_since = 0.0
+
+    def __init__(self, channel, logger=None) -> None:
+        super().__init__(channel, logger)
+        self.configure_timing(channel_baudrate(channel))
+
+    def configure_timing(self, baudrate: Optional[int]) -> None:
+        """按波特率设置 t1.5/t3.5；波特率未知（如 RTU over TCP 网关）时不等待静默，判帧按 19200 以上的规范值。"""
+        self.baudrate = baudrate
+        self.silent_interval = silent_interval(baudrate) if baudrate else 0.0
+        self._t15 = (inter_char_timeout(baudrate) if baudrate else 0.00075) + self.GAP_ALLOWANCE
+        self._t35 = (silent_interval(baudrate) if baudrate else 0.00175) + self.GAP_ALLOWANCE
 
     def execute(
         self,
@@ -21,37 +72,48 @@ class ModbusRTU(ModbusBase):
         retries: int = 3,
         timeout: int = 1000,
     ):
-        request_pdu = self.build_request(function, address, quantity, values, unit_id)
-        frame = bytes([unit_id & 0xFF]) + request_pdu
-        frame += crc16_modbus(frame).to_bytes(2, "little")
+        frame = self._build_frame(function, address, quantity, values, unit_id)
 
         last_error: Optional[Exception] = None
         for attempt in range(1, retries + 1):
             self._log("info", f"RTU TX 尝试 {attempt}/{retries}")
+            self._wait_silent()
             self.channel.write(frame)
             resp = self._read_frame(timeout / 1000.0)
-            if not resp:
-                last_error = TimeoutError("Modbus RTU 超时未响应")
-                continue
-
-            if len(resp) < 5:
-                last_error = ValueError("Modbus RTU 响应长度不足")
+            self._idle_since = time.monotonic()
+            try:
+                pdu = self._unwrap(resp, unit_id)
+            except (TimeoutError, ValueError) as exc:
+                last_error = exc
                 continue
-
-            if not self._check_crc(resp):
-                last_error = ValueError("Modbus RTU CRC 校验失败")
-                continue
-
-            if resp[0] != (unit_id & 0xFF):
-                last_error = ValueError(f"Modbus RTU 单元号不匹配: {resp[0]}")
-                continue
-
-            return self.parse_response(resp[1:-2])
+            return self.parse_response(pdu)
 
         if last_error:
             raise last_error
         raise TimeoutError("Modbus RTU 重试耗尽")
 
+    def _build_frame(self, function: int, address: int, quantity: int, values, unit_id: int) -> bytes:
+        frame = bytes([unit_id & 0xFF]) + self.build_request(function, address, quantity, values, unit_id)
+        return frame + crc16_modbus(frame).to_bytes(2, "little")
+
+    def _unwrap(self, resp: Optional[bytes], unit_id: int) -> bytes:
+        """校验响应帧（长度/CRC/单元号），返回 PDU；同步与 asyncio 实现共用。"""
+        if not resp:
+            raise TimeoutError("Modbus RTU 超时未响应")
+        if len(resp) < 5:
+            raise ValueError("Modbus RTU 响应长度不足")
+        if not self._check_crc(resp):
+            raise ValueError("Modbus RTU CRC 校验失败")
+        if resp[0] != (unit_id & 0xFF):
+            raise ValueError(f"Modbus RTU 单元号不匹配: {resp[0]}")
+        return resp[1:-2]
+
+    def _wait_silent(self) -> None:
+        if self.silent_interval > 0:
+            wait = self._idle_since + self.silent_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
     def _check_crc(self, frame: bytes) -> bool:
         if len(frame) < 3:
             return False
@@ -59,35 +121,58 @@ class ModbusRTU(ModbusBase):
         return calc == frame[-2:]
 
     def _read_frame(self, timeout_s: float) -> Optional[bytes]:
-        deadline = time.time() + timeout_s
-        buf = bytearray()
-        while time.time() < deadline:
-            chunk = self.channel.read(256, timeout=max(0.01, deadline - time.time()))
+        # 先读 3 字节（地址/功能码/字节数或异常码）推算帧长，再一次读够剩余部分；
+        # 通道的 read_exact 按剩余时间阻塞，数据到齐立即返回
+        deadline = Deadline(timeout_s)
+        buf = bytearray(self._read_exact(3, deadline))
+        if len(buf) < 3:
+            return bytes(buf) if buf else None
+        expected_len = self._guess_length(buf)
+        if expected_len is None:
+            # 未知功能码：按字符间隔判帧
+            self._read_until_gap(buf, deadline)
+            return bytes(buf)
+        buf.extend(self._read_exact(expected_len - len(buf), deadline))
+        return bytes(buf)
+
+    def _read_until_gap(self, buf: bytearray, deadline: Deadline) -> None:
+        while not deadline.expired():
+            chunk = self._read_some(min(self._t15, deadline.remaining()))
             if chunk:
                 buf.extend(chunk)
-                expected_len = self._guess_length(buf)
-                if expected_len and len(buf) >= expected_len:
-                    return bytes(buf[:expected_len])
-            else:
-                time.sleep(0.01)
-        return bytes(buf) if buf else None
+                continue
+            # 已静默 t1.5：CRC 正确即为完整帧，否则再等到 t3.5 以容忍驱动分段交付
+            if len(buf) >= 4 and self._check_crc(buf):
+                return
+            chunk = self._read_some(min(self._t35 - self._t15, deadline.remaining()))
+            if not chunk:
+                return
+            buf.extend(chunk)
+
+    def _read_exact(self, size: int, deadline: Deadline) -> bytes:
+        if size <= 0 or deadline.expired():
+            return b""
+        if hasattr(self.channel, "read_exact"):
+            return self.channel.read_exact(size, timeout=deadline.remaining())
+        return self.channel.read(size, timeout=deadline.remaining())
+
+    def _read_some(self, timeout: float) -> bytes:
+        reader = getattr(self.channel, "read_some", None)
+        if reader is not None:
+            return reader(256, timeout=timeout)
+        return self.channel.read(1, timeout=timeout)
 
     @staticmethod
     def _guess_length(buf: bytearray) -> Optional[int]:
         if len(buf) < 3:
             return None
         func = buf[1]
-        if func in {0x01, 0x02, 0x03, 0x04} and len(buf) >= 3:
-            byte_count = buf[2]
-            return 3 + byte_count + 2
-        if func in {0x05, 0x06, 0x0F, 0x10}:
-            return 8  # 固定长度：addr(1)+func(1)+address(2)+qty/value(2)+CRC(2)
-        if func == 0x11 and len(buf) >= 3:
-            byte_count = buf[2]
-            return 3 + byte_count + 2
         if func & 0x80:
             return 5  # 异常响应：addr+func+code+CRC
-        return None
+        if func in _BYTE_COUNT_FUNCTIONS:
+            byte_count = buf[2]
+            return 3 + byte_count + 2
+        return _FIXED_LENGTHS.get(func)
 
 
 ProtocolRegistry.register("modbus_rtu", ModbusRTU)
@@ -1,18 +1,23 @@
 from __future__ import annotations
 
 import itertools
-import time
+from typing import Any, Dict, Iterable, List, Tuple
 
 from protocols.modbus_base import ModbusBase
 from protocols.registry import ProtocolRegistry
+from utils.timing import Deadline
 
 
 class ModbusTCP(ModbusBase):
-    """Modbus TCP：MBAP 头 + PDU，无需 CRC。"""
+    """Modbus TCP：MBAP 头 + PDU，无需 CRC。
 
-    def __init__(self, channel, logger=None) -> None:
-        super().__init__(channel, logger)
-        self._tid = itertools.count(1)
+    同一连接上可以有多个未完成事务（流水线）：响应按事务号（TID）匹配回请求，
+    不属于在途事务的响应（例如此前超时放弃的请求迟到的响应）直接丢弃。
+    """
+
+    DEFAULT_MAX_IN_FLIGHT = 16
+    # 事务号在所有实例间共享递增：新实例不会复用旧实例刚用过的 TID，迟到的旧响应不会被误配
+    _tids = itertools.count(1)
 
     def execute(
         self,
@@ -23,46 +28,89 @@ class ModbusTCP(ModbusBase):
         unit_id: int = 1,
         timeout: float = 2.0,
     ):
+        request = {"function": function, "address": address, "quantity": quantity, "values": values, "unit_id": unit_id}
+        return self.execute_many([request], timeout=timeout, max_in_flight=1)[0]
+
+    def execute_many(
+        self,
+        requests: Iterable[Dict[str, Any]],
+        timeout: float = 2.0,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> List[Any]:
+        """批量执行请求，最多 max_in_flight 个同时在途；返回结果与 requests 顺序一致。
+
+        requests 每项为 execute 的参数字典（function/address/quantity/values/unit_id）。
+        timeout 为等待下一个响应的时间（秒），超时抛出 TimeoutError。
+        """
+        frames = [self._build_frame(**req) for req in requests]
+        results: List[Any] = [None] * len(frames)
+        in_flight: Dict[int, Tuple[int, int]] = {}  # tid -> (请求序号, unit_id)
+        window = max(1, int(max_in_flight))
+        next_index = 0
+        remaining = len(frames)
+
+        while remaining:
+            if next_index < len(frames) and len(in_flight) < window:
+                # 补满窗口；多帧合并为一次写入
+                batch = bytearray()
+                while next_index < len(frames) and len(in_flight) < window:
+                    tid, unit_id, frame = frames[next_index]
+                    in_flight[tid] = (next_index, unit_id)
+                    batch.extend(frame)
+                    next_index += 1
+                self.channel.write(bytes(batch))
+
+            resp_tid, resp_uid, pdu_resp = self._read_response(timeout)
+            slot = in_flight.pop(resp_tid, None)
+            if slot is None:
+                self._log("warning", f"Modbus TCP 丢弃未知事务的响应: tid={resp_tid}")
+                continue
+            index, unit_id = slot
+            if resp_uid != unit_id:
+                raise ValueError(f"Modbus TCP 单元号不匹配: {resp_uid}")
+            results[index] = self.parse_response(pdu_resp)
+            remaining -= 1
+
+        return results
+
+    def _build_frame(
+        self, function: int, address: int, quantity: int = 1, values=None, unit_id: int = 1
+    ) -> Tuple[int, int, bytes]:
         pdu = self.build_request(function, address, quantity, values, unit_id)
-        tid = next(self._tid) & 0xFFFF
+        tid = next(self._tids) & 0xFFFF
         length = len(pdu) + 1  # UnitID + PDU
         header = tid.to_bytes(2, "big") + b"\x00\x00" + length.to_bytes(2, "big") + bytes([unit_id & 0xFF])
-        frame = header + pdu
-
-        self.channel.write(frame)
+        return tid, unit_id & 0xFF, header + pdu
 
+    def _read_response(self, timeout: float) -> Tuple[int, int, bytes]:
         header_resp = self._read_exact(7, timeout)
+        resp_tid, resp_uid, pdu_len = self._parse_header(header_resp)
+        pdu_resp = self._read_exact(pdu_len, timeout)
+        if pdu_resp is None or len(pdu_resp) != pdu_len:
+            raise TimeoutError("Modbus TCP 读取 PDU 超时")
+        return resp_tid, resp_uid, pdu_resp
+
+    @staticmethod
+    def _parse_header(header_resp: bytes | None) -> Tuple[int, int, int]:
+        """解析 MBAP 头，返回 (tid, unit_id, PDU 长度)。"""
         if not header_resp or len(header_resp) != 7:
             raise TimeoutError("Modbus TCP 响应头超时")
-
         resp_tid = int.from_bytes(header_resp[0:2], "big")
         proto_id = int.from_bytes(header_resp[2:4], "big")
         length_resp = int.from_bytes(header_resp[4:6], "big")
-        resp_uid = header_resp[6]
-
-        if resp_tid != tid:
-            raise ValueError(f"Modbus TCP 事务号不匹配: {resp_tid} != {tid}")
         if proto_id != 0:
             raise ValueError(f"Modbus TCP protocol_id 异常: {proto_id}")
-        if resp_uid != (unit_id & 0xFF):
-            raise ValueError(f"Modbus TCP 单元号不匹配: {resp_uid}")
-
-        pdu_len = max(0, length_resp - 1)
-        pdu_resp = self._read_exact(pdu_len, timeout)
-        if pdu_resp is None or len(pdu_resp) != pdu_len:
-            raise TimeoutError("Modbus TCP 读取 PDU 超时")
-
-        return self.parse_response(pdu_resp)
+        return resp_tid, header_resp[6], max(0, length_resp - 1)
 
     def _read_exact(self, size: int, timeout: float) -> bytes | None:
+        # 通道读取按剩余时间阻塞，这里不再额外休眠
         buf = bytearray()
-        deadline = time.time() + timeout
-        while len(buf) < size and time.time() < deadline:
-            chunk = self.channel.read(size - len(buf), timeout=max(0.01, deadline - time.time()))
+        deadline = Deadline(timeout)
+        read = getattr(self.channel, "read_exact", None) or self.channel.read
+        while len(buf) < size and not deadline.expired():
+            chunk = read(size - len(buf), timeout=deadline.remaining())
             if chunk:
                 buf.extend(chunk)
-            else:
-                time.sleep(0.01)
         return bytes(buf) if len(buf) == size else None
 
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Dict, Type
+import threading
+from typing import Any, Dict, Tuple, Type
 
 from protocols.base import BaseProtocol
 
@@ -9,6 +10,12 @@ class ProtocolRegistry:
     """协议注册表，按名称查找具体实现。"""
 
     _registry: Dict[str, Type[BaseProtocol]] = {}
+    # asyncio 实现（protocols.async_protocols），与同步实现同名
+    _async_registry: Dict[str, Type[BaseProtocol]] = {}
+    # 通道 -> {(协议名, 构造参数): 实例}；协议实例引用着通道，不会随通道自动回收，
+    # 关闭通道的一方须调用 discard_sessions（RuntimeContext.close、main_runtime 的清理）
+    _sessions: Dict[Any, Dict[Tuple[str, tuple], BaseProtocol]] = {}
+    _sessions_lock = threading.Lock()
 
     @classmethod
     def register(cls, name: str, protocol_cls: Type[BaseProtocol]) -> None:
@@ -20,6 +27,38 @@ class ProtocolRegistry:
             raise KeyError(f"未注册协议: {name}")
         return cls._registry[name]
 
+    @classmethod
+    def register_async(cls, name: str, protocol_cls: Type[BaseProtocol]) -> None:
+        cls._async_registry[name] = protocol_cls
+
+    @classmethod
+    def get_async(cls, name: str) -> Type[BaseProtocol]:
+        if name not in cls._async_registry:
+            raise KeyError(f"未注册 asyncio 协议: {name}")
+        return cls._async_registry[name]
+
     @classmethod
     def list(cls) -> Dict[str, Type[BaseProtocol]]:
         return dict(cls._registry)
+
+    @classmethod
+    def session(cls, name: str, channel: Any, logger: Any = None, **options: Any) -> BaseProtocol:
+        """取通道上的协议会话：同一 (通道, 协议, 构造参数) 复用同一实例，不再每次调用重新构造。
+
+        logger 以首次创建时为准；options 须可哈希，原样传给协议构造函数。
+        """
+        key = (name, tuple(sorted(options.items())))
+        with cls._sessions_lock:
+            sessions = cls._sessions.get(channel)
+            if sessions is None:
+                sessions = cls._sessions[channel] = {}
+            protocol = sessions.get(key)
+            if protocol is None:
+                protocol = sessions[key] = cls.get(name)(channel, logger, **options)
+            return protocol
+
+    @classmethod
+    def discard_sessions(cls, channel: Any) -> None:
+        """通道关闭时调用：丢弃其上缓存的协议会话。"""
+        with cls._sessions_lock:
+            cls._sessions.pop(channel, None)
@@ -7,7 +7,7 @@ from typing import Any, Dict, List, Optional
 
 import yaml
 
-from utils.crc16 import crc16_modbus
+from utils.crc import get_crc
 from utils.path_utils import resolve_resource_path
 
 
@@ -53,11 +53,12 @@ class FrameDef:
 
     @property
     def crc_size(self) -> int:
-        if self.crc == "crc16_modbus":
-            return 2
-        if self.crc == "crc8":
-            return 1
-        return 0
+        if not self.crc:
+            return 0
+        try:
+            return get_crc(self.crc).size
+        except KeyError:
+            return 0
 
     def fixed_length(self) -> Optional[int]:
         total = len(self.header) + len(self.tail) + self.crc_size
@@ -202,30 +203,14 @@ class ProtocolSchema:
         return result
 
     def _calc_crc(self, fd: FrameDef, payload: bytes) -> bytes:
-        if fd.crc == "crc16_modbus":
-            return crc16_modbus(payload).to_bytes(2, "little")
-        if fd.crc == "crc8":
-            return bytes([self._crc8(payload)])
-        return b""
+        if not fd.crc_size:
+            return b""
+        return get_crc(str(fd.crc)).digest(payload)
 
     def _verify_crc(self, fd: FrameDef, payload: bytes, crc_part: bytes) -> bool:
-        if fd.crc == "crc16_modbus":
-            return crc_part == crc16_modbus(payload).to_bytes(2, "little")
-        if fd.crc == "crc8":
-            return crc_part == bytes([self._crc8(payload)])
-        return True
-
-    @staticmethod
-    def _crc8(data: bytes, poly: int = 0x07, init: int = 0x00) -> int:
-        crc = init
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x80:
-                    crc = ((crc << 1) ^ poly) & 0xFF
-                else:
-                    crc = (crc << 1) & 0xFF
-        return crc & 0xFF
+        if not fd.crc_size:
+            return True
+        return crc_part == get_crc(str(fd.crc)).digest(payload)
 
     def dump(self) -> str:
         return json.dumps(
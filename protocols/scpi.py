@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import time
 from typing import Any, Dict
 
 from protocols.base import BaseProtocol
 from protocols.registry import ProtocolRegistry
+from utils.timing import Deadline
 
 
 class SCPIProtocol(BaseProtocol):
@@ -31,7 +31,10 @@ class SCPIProtocol(BaseProtocol):
         resp = self._read_response(term_bytes, timeout)
         if resp is None:
             raise TimeoutError("SCPI response timeout")
+        return self._parse(resp, strip)
 
+    @staticmethod
+    def _parse(resp: bytes, strip: bool) -> Dict[str, Any]:
         parsed: Dict[str, Any] = {"ok": True, "raw": resp}
         if strip:
             resp = resp.rstrip(b"\r\n")
@@ -53,7 +56,7 @@ class SCPIProtocol(BaseProtocol):
         return cmd_bytes
 
     def _read_response(self, terminator: bytes, timeout: float) -> bytes | None:
-        deadline = time.time() + timeout
+        deadline = Deadline(timeout)
         first = self._read_exact(1, deadline)
         if not first:
             return None
@@ -75,30 +78,27 @@ class SCPIProtocol(BaseProtocol):
         rest = self._read_until_terminator(terminator, deadline)
         return first + (rest or b"")
 
-    def _read_until_terminator(self, terminator: bytes, deadline: float) -> bytes:
+    # 通道读取按剩余时间阻塞，不再额外休眠
+    def _read_until_terminator(self, terminator: bytes, deadline: Deadline) -> bytes:
         buf = bytearray()
-        while time.time() < deadline:
-            chunk = self.channel.read_until(terminator, timeout=max(0.01, deadline - time.time()))
+        while not deadline.expired():
+            chunk = self.channel.read_until(terminator, timeout=deadline.remaining())
             if chunk:
                 buf.extend(chunk)
                 if buf.endswith(terminator):
                     break
-            else:
-                time.sleep(0.01)
         return bytes(buf)
 
-    def _read_exact(self, size: int, deadline: float) -> bytes | None:
+    def _read_exact(self, size: int, deadline: Deadline) -> bytes | None:
         buf = bytearray()
-        while len(buf) < size and time.time() < deadline:
-            chunk = b""
+        while len(buf) < size and not deadline.expired():
+            remaining = deadline.remaining()
             if hasattr(self.channel, "read_exact"):
-                chunk = self.channel.read_exact(size - len(buf), timeout=max(0.01, deadline - time.time()))  # type: ignore[attr-defined]
+                chunk = self.channel.read_exact(size - len(buf), timeout=remaining)  # type: ignore[attr-defined]
             else:
-                chunk = self.channel.read(size - len(buf), timeout=max(0.01, deadline - time.time()))
+                chunk = self.channel.read(size - len(buf), timeout=remaining)
             if chunk:
                 buf.extend(chunk)
-            else:
-                time.sleep(0.01)
         return bytes(buf) if len(buf) == size else None
 
 
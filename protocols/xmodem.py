@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-import time
 from pathlib import Path
+from typing import Any, BinaryIO, Generator, Optional, Tuple
 
 from protocols.base import BaseProtocol
 from protocols.registry import ProtocolRegistry
-from utils.crc16 import crc16_xmodem
+from utils.timing import Deadline
+from utils.crc import crc16_xmodem
 
 
 SOH = 0x01
+STX = 0x02
 EOT = 0x04
 ACK = 0x06
 NAK = 0x15
@@ -16,33 +18,135 @@ CAN = 0x18
 CRC_REQ = 0x43  # 'C'
 
 
-class XModem(BaseProtocol):
-    """XMODEM 固件发送（128 字节帧，CRC/XOR 校验）。"""
-
-    def execute(self, file_path: str, retries: int = 10, start_timeout: float = 10.0):
-        data = Path(file_path).read_bytes()
-        crc_mode = self._wait_start(start_timeout)
-        block_no = 1
-        offset = 0
+class PacketBuffer:
+    """预分配的 XMODEM/YMODEM 数据包缓冲。
+
+    数据块直接 readinto 到包内，原地填充、计算校验，发送时复用同一块内存，
+    峰值内存与文件大小无关。
+    """
+
+    def __init__(self, block_size: int = 128, crc_mode: bool = True) -> None:
+        if block_size not in {128, 1024}:
+            raise ValueError(f"不支持的块大小: {block_size}")
+        self.block_size = block_size
+        self.crc_mode = crc_mode
+        self.packet = bytearray(3 + block_size + (2 if crc_mode else 1))
+        self.packet[0] = STX if block_size == 1024 else SOH
+        self._view = memoryview(self.packet)
+        self._data = self._view[3 : 3 + block_size]
+
+    def fill_from(self, fh: BinaryIO, block_no: int, pad: int = 0x1A) -> int:
+        """从文件读取下一块并组包，返回读取的字节数（0 表示文件结束）。"""
+        count = fh.readinto(self._data) or 0
+        if count:
+            self._finish(block_no, count, pad)
+        return count
+
+    def fill(self, block_no: int, data: bytes, pad: int = 0x1A) -> int:
+        count = min(len(data), self.block_size)
+        self._data[:count] = data[:count]
+        self._finish(block_no, count, pad)
+        return count
+
+    def _finish(self, block_no: int, count: int, pad: int) -> None:
+        size = self.block_size
+        if count < size:
+            self._data[count:] = bytes([pad]) * (size - count)
+        self.packet[1] = block_no & 0xFF
+        self.packet[2] = 0xFF - (block_no & 0xFF)
+        if self.crc_mode:
+            self.packet[3 + size : 5 + size] = crc16_xmodem(self._data).to_bytes(2, "big")
+        else:
+            self.packet[3 + size] = sum(self._data) & 0xFF
+
+
+# 收发步骤：传输逻辑写成生成器，yield 出 ("write", data) 或 ("read", size, timeout)，
+# 读操作的结果（bytes）由 send 送回；同步实现用 run_steps 驱动，asyncio 实现用 await 驱动同一套步骤
+Step = Tuple[Any, ...]
+Steps = Generator[Step, Optional[bytes], Any]
+
+
+def _write(data: bytes | bytearray) -> Step:
+    return ("write", data)
+
+
+def _read(size: int, timeout: float) -> Step:
+    return ("read", size, timeout)
+
+
+def run_steps(channel: Any, steps: Steps) -> Any:
+    """在同步通道上执行收发步骤，返回生成器的返回值。"""
+    reply: Optional[bytes] = None
+    while True:
+        try:
+            step = steps.send(reply)
+        except StopIteration as stop:
+            return stop.value
+        if step[0] == "write":
+            channel.write(step[1])
+            reply = None
+        else:
+            reply = channel.read(step[1], timeout=step[2])
 
-        while offset < len(data):
-            chunk = data[offset : offset + 128]
-            packet = self._make_packet(block_no, chunk, crc_mode)
-            if not self._send_with_ack(packet, retries):
-                raise TimeoutError(f"XMODEM 数据块 {block_no} 重试耗尽")
-            offset += len(chunk)
-            block_no = (block_no % 255) + 1
 
-        if not self._finish(retries):
+class XModem(BaseProtocol):
+    """XMODEM 固件发送（CRC/累加和校验），按块流式读取文件。
+
+    block_size=1024 时使用 XMODEM-1K（STX 帧，仅 CRC 模式）；某个 1K 块连续
+    fallback_after 次被 NAK 时，从该块起始偏移改用 128 字节块发送剩余数据。
+    超时不触发回退（对端可能已收下该块而 ACK 丢失），按原块重试到 retries 次。
+    """
+
+    def execute(
+        self,
+        file_path: str,
+        retries: int = 10,
+        start_timeout: float = 10.0,
+        block_size: int = 128,
+        fallback_after: int = 3,
+    ):
+        return run_steps(self.channel, self._transfer(file_path, retries, start_timeout, block_size, fallback_after))
+
+    def _transfer(self, file_path: str, retries: int, start_timeout: float, block_size: int, fallback_after: int) -> Steps:
+        path = Path(file_path)
+        crc_mode = yield from self._wait_start(start_timeout)
+        if block_size == 1024 and not crc_mode:
+            self._log("info", "XMODEM 接收端使用累加和模式，1K 块回退为 128 字节")
+            block_size = 128
+        packet = PacketBuffer(block_size, crc_mode)
+        block_no = 1
+        blocks = 0
+        sent = 0
+
+        with path.open("rb") as fh:
+            while True:
+                offset = fh.tell()
+                count = packet.fill_from(fh, block_no)
+                if not count:
+                    break
+                large = packet.block_size == 1024
+                status = yield from self._send_with_ack(packet.packet, retries, fallback_after if large else 0)
+                if status == NAK:
+                    self._log("info", f"XMODEM 1K 块 {blocks + 1} 连续被拒收，回退为 128 字节块")
+                    packet = PacketBuffer(128, crc_mode)
+                    fh.seek(offset)
+                    continue
+                if status != ACK:
+                    raise TimeoutError(f"XMODEM 数据块 {blocks + 1} 重试耗尽")
+                sent += count
+                blocks += 1
+                block_no = (block_no + 1) & 0xFF
+
+        if not (yield from self._finish(retries)):
             raise TimeoutError("XMODEM 结束握手失败")
 
-        return {"blocks": block_no - 1, "bytes": len(data)}
+        return {"blocks": blocks, "bytes": sent, "block_size": packet.block_size}
 
-    def _wait_start(self, timeout: float) -> bool:
+    def _wait_start(self, timeout: float) -> Steps:
         """等待接收端发出 'C' 或 NAK，返回是否使用 CRC 模式。"""
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            char = self.channel.read(1, timeout=max(0.5, deadline - time.time()))
+        deadline = Deadline(timeout)
+        while not deadline.expired():
+            char = yield _read(1, deadline.remaining())
             if not char:
                 continue
             code = char[0]
@@ -53,33 +157,35 @@ class XModem(BaseProtocol):
                 raise RuntimeError("XMODEM 被对端取消")
         raise TimeoutError("XMODEM 启动握手超时")
 
-    def _send_with_ack(self, packet: bytes, retries: int) -> bool:
-        for _ in range(retries):
-            self.channel.write(packet)
-            resp = self.channel.read(1, timeout=1.0)
-            if resp and resp[0] == ACK:
-                return True
-            if resp and resp[0] == CAN:
+    def _send_with_ack(self, packet: bytes | bytearray, retries: int, nak_fallback: int = 0) -> Steps:
+        """发送数据块直到收到 ACK；返回 ACK，重试耗尽返回 0。
+
+        nak_fallback > 0 时，前 nak_fallback 次发送全部收到明确的 NAK 则提前返回 NAK，调用方可改用小块重发。
+        只要有一次超时或收到无法识别的应答，对端就可能已收下该块、只是 ACK 丢失，
+        此时改变块大小会让对端把后续数据当作新块写入，因此只能按原块继续重试。
+        """
+        naks_only = nak_fallback > 0
+        for attempt in range(1, retries + 1):
+            yield _write(packet)
+            resp = yield _read(1, 1.0)
+            code = resp[0] if resp else None
+            if code == ACK:
+                return ACK
+            if code == CAN:
                 raise RuntimeError("XMODEM 被对端取消")
-        return False
+            if code != NAK:
+                naks_only = False
+            elif naks_only and attempt >= min(nak_fallback, retries):
+                return NAK
+        return 0
 
-    def _finish(self, retries: int) -> bool:
+    def _finish(self, retries: int) -> Steps:
         for _ in range(retries):
-            self.channel.write(bytes([EOT]))
-            resp = self.channel.read(1, timeout=1.0)
+            yield _write(bytes([EOT]))
+            resp = yield _read(1, 1.0)
             if resp and resp[0] == ACK:
                 return True
         return False
 
-    @staticmethod
-    def _make_packet(block_no: int, chunk: bytes, crc_mode: bool) -> bytes:
-        data = chunk + b"\x1A" * (128 - len(chunk)) if len(chunk) < 128 else chunk[:128]
-        header = bytes([SOH, block_no & 0xFF, 0xFF - (block_no & 0xFF)])
-        if crc_mode:
-            crc = crc16_xmodem(data).to_bytes(2, "big")
-            return header + data + crc
-        checksum = sum(data) & 0xFF
-        return header + data + bytes([checksum])
-
 
 ProtocolRegistry.register("xmodem", XModem)
@@ -1,102 +1,173 @@
 from __future__ import annotations
 
-import time
 from pathlib import Path
 
 from protocols.base import BaseProtocol
 from protocols.registry import ProtocolRegistry
-from utils.crc16 import crc16_xmodem
+from utils.timing import Deadline
+from protocols.xmodem import PacketBuffer, Steps, _read, _write, run_steps
 
 
-SOH = 0x01
-STX = 0x02
 EOT = 0x04
 ACK = 0x06
 NAK = 0x15
 CAN = 0x18
 CRC_REQ = 0x43  # 'C'
+G_REQ = 0x47  # 'G'，YMODEM-G 流式模式
+
+# YMODEM-G 下每发送多少块检查一次对端 CAN
+STREAM_CANCEL_CHECK = 16
 
 
 class YModem(BaseProtocol):
-    """YMODEM 文件发送（1024 字节帧 + 文件名）。"""
+    """YMODEM 文件发送（1024 字节帧 + 文件名），按块流式读取文件。
+
+    - 接收端以 'G' 发起时使用 YMODEM-G 流式模式：数据块连续发送，不等待逐块 ACK，
+      仅在发送间隙检查对端 CAN。
+    - 接收端以 'C' 发起时使用带 ACK 的模式；window > 1 时为滑动窗口（Go-Back-N），
+      最多 window 个块在途，收到 NAK/超时则从最早未确认块重发。仅用于支持连续
+      接收的对端，缺省 window=1 即标准 YMODEM 停等。
+    """
+
+    def execute(self, file_path: str, retries: int = 10, start_timeout: float = 10.0, window: int = 1):
+        return run_steps(self.channel, self._transfer(file_path, retries, start_timeout, window))
 
-    def execute(self, file_path: str, retries: int = 10, start_timeout: float = 10.0):
+    def _transfer(self, file_path: str, retries: int, start_timeout: float, window: int) -> Steps:
         path = Path(file_path)
-        data = path.read_bytes()
         file_name = path.name
-        file_size = len(data)
+        file_size = path.stat().st_size
 
-        self._wait_start(start_timeout)
+        streaming = yield from self._wait_start(start_timeout)
 
+        packet = PacketBuffer(1024, crc_mode=True)
         header_payload = f"{file_name}\0{file_size}\0".encode("ascii", errors="ignore")
-        header_block = self._make_packet(0, header_payload, use_1k=True)
-        if not self._send_with_ack(header_block, retries):
+        packet.fill(0, header_payload, pad=0x00)
+        if not (yield from self._send_header(packet.packet, retries, streaming)):
             raise TimeoutError("YMODEM 头块发送失败")
 
-        # 接收端通常会再发一次 'C' 提示继续
-        _ = self.channel.read(1, timeout=1.0)
+        with path.open("rb") as fh:
+            if streaming:
+                blocks, sent = yield from self._stream_blocks(fh, packet)
+            else:
+                blocks, sent = yield from self._send_window(fh, max(1, int(window)), retries)
 
-        block_no = 1
-        offset = 0
-        while offset < len(data):
-            chunk = data[offset : offset + 1024]
-            packet = self._make_packet(block_no, chunk, use_1k=True)
-            if not self._send_with_ack(packet, retries):
-                raise TimeoutError(f"YMODEM 数据块 {block_no} 发送失败")
-            offset += len(chunk)
-            block_no = (block_no % 255) + 1
-
-        if not self._finish(retries):
+        if not (yield from self._finish(retries)):
             raise TimeoutError("YMODEM 结束握手失败")
 
         # 发送尾包（空文件名）收尾
-        tail_block = self._make_packet(0, b"", use_1k=True)
-        self._send_with_ack(tail_block, retries)
+        packet.fill(0, b"", pad=0x00)
+        yield from self._send_with_ack(packet.packet, retries)
 
-        return {"blocks": block_no - 1, "bytes": len(data)}
+        return {"blocks": blocks, "bytes": sent, "mode": "ymodem-g" if streaming else f"window={max(1, int(window))}"}
 
-    def _wait_start(self, timeout: float) -> None:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            char = self.channel.read(1, timeout=max(0.5, deadline - time.time()))
+    def _wait_start(self, timeout: float) -> Steps:
+        """等待接收端发起，返回是否为 YMODEM-G 流式模式。"""
+        deadline = Deadline(timeout)
+        while not deadline.expired():
+            char = yield _read(1, deadline.remaining())
             if not char:
                 continue
             code = char[0]
-            if code == CRC_REQ:
-                self._log("info", "YMODEM 启动握手 OK")
-                return
+            if code in {CRC_REQ, G_REQ}:
+                self._log("info", f"YMODEM 启动握手 OK: {chr(code)}")
+                return code == G_REQ
             if code == CAN:
                 raise RuntimeError("YMODEM 被对端取消")
         raise TimeoutError("YMODEM 启动握手超时")
 
-    def _send_with_ack(self, packet: bytes, retries: int) -> bool:
+    def _send_header(self, packet: bytearray, retries: int, streaming: bool) -> Steps:
+        """发送头块：ACK（及随后的 'C'/'G'）表示已收到；YMODEM-G 下接收端也可能直接发 'G'。
+
+        'C' 模式下接收端在头块丢失或超时后会再发 'C'，此时与 NAK、超时一样重发头块。
+        """
         for _ in range(retries):
-            self.channel.write(packet)
-            resp = self.channel.read(1, timeout=1.0)
+            yield _write(packet)
+            resp = yield _read(1, 1.0)
             if resp and resp[0] == ACK:
+                # 接收端通常会再发一次 'C'/'G' 提示继续
+                _ = yield _read(1, 1.0)
+                return True
+            if resp and streaming and resp[0] == G_REQ:
                 return True
             if resp and resp[0] == CAN:
                 raise RuntimeError("YMODEM 被对端取消")
         return False
 
-    def _finish(self, retries: int) -> bool:
+    def _stream_blocks(self, fh, packet: PacketBuffer) -> Steps:
+        block_no = 1
+        blocks = 0
+        sent = 0
+        while True:
+            count = packet.fill_from(fh, block_no)
+            if not count:
+                break
+            yield _write(packet.packet)
+            sent += count
+            blocks += 1
+            block_no = (block_no + 1) & 0xFF
+            if blocks % STREAM_CANCEL_CHECK == 0:
+                yield from self._check_cancel()
+        yield from self._check_cancel()
+        return blocks, sent
+
+    def _send_window(self, fh, window: int, retries: int) -> Steps:
+        # 每个在途块占用一个包缓冲；序号 seq 从 0 递增，块号为 (seq + 1) & 0xFF
+        slots = [PacketBuffer(1024, crc_mode=True) for _ in range(window)]
+        counts = [0] * window
+        base = 0
+        next_seq = 0
+        sent = 0
+        eof = False
+        errors = 0
+        while True:
+            while not eof and next_seq - base < window:
+                slot = next_seq % window
+                count = slots[slot].fill_from(fh, (next_seq + 1) & 0xFF)
+                if not count:
+                    eof = True
+                    break
+                counts[slot] = count
+                yield _write(slots[slot].packet)
+                next_seq += 1
+            if base == next_seq:
+                return next_seq, sent
+
+            resp = yield _read(1, 1.0)
+            if resp and resp[0] == ACK:
+                sent += counts[base % window]
+                base += 1
+                errors = 0
+                continue
+            if resp and resp[0] == CAN:
+                raise RuntimeError("YMODEM 被对端取消")
+            errors += 1
+            if errors >= retries:
+                raise TimeoutError(f"YMODEM 数据块 {base + 1} 发送失败")
+            for seq in range(base, next_seq):
+                yield _write(slots[seq % window].packet)
+
+    def _check_cancel(self) -> Steps:
+        resp = yield _read(1, 0.001)
+        if resp and resp[0] == CAN:
+            raise RuntimeError("YMODEM 被对端取消")
+
+    def _send_with_ack(self, packet: bytes | bytearray, retries: int) -> Steps:
         for _ in range(retries):
-            self.channel.write(bytes([EOT]))
-            resp = self.channel.read(1, timeout=1.0)
+            yield _write(packet)
+            resp = yield _read(1, 1.0)
             if resp and resp[0] == ACK:
                 return True
+            if resp and resp[0] == CAN:
+                raise RuntimeError("YMODEM 被对端取消")
         return False
 
-    @staticmethod
-    def _make_packet(block_no: int, chunk: bytes, use_1k: bool) -> bytes:
-        size = 1024 if use_1k else 128
-        data = chunk[:size]
-        if len(data) < size:
-            pad_byte = b"\x00" if block_no == 0 else b"\x1A"
-            data = data + pad_byte * (size - len(data))
-        header = bytes([STX if use_1k else SOH, block_no & 0xFF, 0xFF - (block_no & 0xFF)])
-        crc = crc16_xmodem(data).to_bytes(2, "big")
-        return header + data + crc
+    def _finish(self, retries: int) -> Steps:
+        for _ in range(retries):
+            yield _write(bytes([EOT]))
+            resp = yield _read(1, 1.0)
+            if resp and resp[0] == ACK:
+                return True
+        return False
 
 
 ProtocolRegistry.register("ymodem", YModem)
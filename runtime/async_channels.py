@@ -0,0 +1,371 @@
+"""asyncio 通道：与 runtime.channels 接口一致（write/read/read_exact/read_until/read_some/read_event），
+方法均为协程，超时语义相同（秒，超时返回已收到的数据或 b""）。
+
+- 串口：pyserial 以非阻塞方式打开，通过 loop.add_reader 在 fd 可读时直接读入接收缓冲，
+  写入遇到 EAGAIN 时等待 fd 可写（仅 POSIX；Windows 的 Proactor 事件循环不支持 add_reader）；
+- TCP：asyncio streams，后台任务把收到的数据读入接收缓冲；断线后下一次读写自动重连，
+  连续连接失败按指数退避。
+
+一个事件循环即可同时驱动任意数量的通道，无需每个端口一个线程。
+同一通道上的并发协程通过 channel.lock 串行完成各自的事务（async 协议实现会自动加锁）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from runtime.channels import _enable_keepalive
+from runtime.event_framers import EventFramer, build_framer
+from utils.log_utils import get_logger
+from utils.timing import Deadline
+
+try:
+    import serial
+except ImportError:  # pragma: no cover
+    serial = None
+
+logger = get_logger("AsyncChannels")
+
+
+class AsyncChannel:
+    """asyncio 通道基类：接收数据由子类的后台读取（add_reader 回调或任务）写入 _rx。"""
+
+    framer: Optional[EventFramer] = None
+    RX_LIMIT = 1 << 20
+
+    def __init__(self) -> None:
+        self._rx = bytearray()
+        self._ready = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        # 一次事务（请求 + 应答）期间独占通道
+        self.lock = asyncio.Lock()
+
+    async def open(self) -> "AsyncChannel":
+        return self
+
+    async def write(self, data: bytes | str) -> None:
+        raise NotImplementedError()
+
+    async def close(self) -> None:
+        return None
+
+    def set_framer(self, framer: Optional[EventFramer]) -> None:
+        self.framer = framer
+        self._events: Deque[Any] = deque()
+
+    def _feed(self, data: bytes) -> None:
+        self._rx.extend(data)
+        if len(self._rx) > self.RX_LIMIT:
+            # 长时间无人读取时丢弃最旧的数据，避免缓冲无限增长
+            del self._rx[: len(self._rx) - self.RX_LIMIT]
+        self._ready.set()
+
+    def _feed_error(self, exc: BaseException) -> None:
+        self._error = exc
+        self._ready.set()
+
+    async def _fill(self, timeout: Optional[float]) -> int:
+        """等待新数据到达，最多 timeout 秒；返回新到达的字节数。"""
+        if self._error is not None:
+            raise self._error
+        if timeout is not None and timeout <= 0:
+            return 0
+        before = len(self._rx)
+        self._ready.clear()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return 0
+        if self._error is not None and len(self._rx) == before:
+            raise self._error
+        return len(self._rx) - before
+
+    def _take(self, size: int) -> bytes:
+        data = bytes(self._rx[:size])
+        del self._rx[:size]
+        return data
+
+    async def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
+        deadline = Deadline(timeout)
+        while len(self._rx) < size:
+            remaining = deadline.remaining()
+            if not await self._fill(remaining) and remaining is not None and remaining <= 0:
+                break
+        return self._take(size)
+
+    async def read_exact(self, size: int, timeout: float = 1.0) -> bytes:
+        return await self.read(size, timeout)
+
+    async def read_until(self, terminator: bytes, timeout: float = 1.0) -> bytes:
+        """读到 terminator（含）为止；超时返回已收到的全部数据。"""
+        deadline = Deadline(timeout)
+        start = 0
+        while True:
+            idx = self._rx.find(terminator, start)
+            if idx >= 0:
+                return self._take(idx + len(terminator))
+            start = max(0, len(self._rx) - len(terminator) + 1)
+            remaining = deadline.remaining()
+            if not await self._fill(remaining) and remaining is not None and remaining <= 0:
+                return self._take(len(self._rx))
+
+    async def read_some(self, max_bytes: int = 4096, timeout: float = 0.1) -> bytes:
+        if not self._rx:
+            await self._fill(timeout)
+        return self._take(max_bytes)
+
+    def has_pending_event(self) -> bool:
+        return bool(self._rx) or bool(self.framer is not None and self._events)
+
+    async def read_event(self, timeout: float = 0.1):
+        framer = self.framer
+        if framer is None:
+            data = await self.read(1, timeout=timeout)
+            if not data:
+                return None
+            return data.decode(errors="ignore")
+
+        events = self._events
+        deadline = Deadline(timeout)
+        while not events:
+            data = await self.read_some(timeout=deadline.remaining())
+            if data:
+                events.extend(framer.feed(data))
+            elif deadline.expired():
+                return None
+        return events.popleft()
+
+
+class AsyncSerialChannel(AsyncChannel):
+    """非阻塞串口：fd 可读时由事件循环回调读取，不占用线程。"""
+
+    READ_SIZE = 4096
+
+    def __init__(self, cfg: Dict[str, Any]) -> None:
+        if serial is None:
+            raise ImportError("未安装 pyserial，无法使用串口通道")
+        super().__init__()
+        self._cfg = cfg
+        self.ser = None
+        self._fd: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def open(self) -> "AsyncSerialChannel":
+        self._loop = asyncio.get_running_loop()
+        self.ser = serial.Serial(
+            port=self._cfg["device"],
+            baudrate=int(self._cfg.get("baudrate", 115200)),
+            timeout=0,
+        )
+        try:
+            fd = self.ser.fileno()
+        except (AttributeError, OSError, ValueError):
+            self.ser.close()
+            raise RuntimeError("当前平台的串口不支持 add_reader，请使用同步 SerialChannel") from None
+        os.set_blocking(fd, False)
+        self._fd = fd
+        self._loop.add_reader(fd, self._on_readable)
+        return self
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._fd, self.READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as exc:
+            self._detach()
+            self._feed_error(ConnectionError(f"串口读取失败: {exc}"))
+            return
+        if data:
+            self._feed(data)
+        else:
+            # 设备已拔出
+            self._detach()
+            self._feed_error(ConnectionError("串口已断开"))
+
+    async def write(self, data: bytes | str) -> None:
+        if self._fd is None:
+            raise self._error or ConnectionError("串口未打开")
+        payload = memoryview(data.encode() if isinstance(data, str) else bytes(data))
+        while payload:
+            try:
+                written = os.write(self._fd, payload)
+            except BlockingIOError:
+                written = 0
+            payload = payload[written:]
+            if payload:
+                await self._writable()
+
+    async def _writable(self) -> None:
+        ready = self._loop.create_future()
+        self._loop.add_writer(self._fd, ready.set_result, None)
+        try:
+            await ready
+        finally:
+            self._loop.remove_writer(self._fd)
+
+    def _detach(self) -> None:
+        if self._fd is not None and self._loop is not None:
+            self._loop.remove_reader(self._fd)
+        self._fd = None
+
+    async def close(self) -> None:
+        self._detach()
+        if self.ser is not None:
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+
+
+class AsyncTcpChannel(AsyncChannel):
+    """asyncio streams 上的 TCP 通道；断线后下一次读写自动重连，连接失败按指数退避。"""
+
+    RECV_SIZE = 65536
+    RETRY_INITIAL = 0.5
+    RETRY_MAX = 10.0
+
+    def __init__(self, cfg: Dict[str, Any]) -> None:
+        super().__init__()
+        self.host = str(cfg["host"])
+        self.port = int(cfg["port"])
+        self._io_timeout = float(cfg.get("timeout", 2.0))
+        self._keepalive = float(cfg.get("keepalive", 30.0))
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pump: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+        self._backoff = 0.0
+        self.reconnects = 0
+
+    async def open(self) -> "AsyncTcpChannel":
+        await self._connect()
+        return self
+
+    async def _connect(self) -> None:
+        retry_in = self._retry_at - time.monotonic()
+        if retry_in > 0:
+            raise ConnectionError(f"TCP {self.host}:{self.port} 连接失败，{retry_in:.1f}s 后重试")
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self._io_timeout
+            )
+        except (OSError, asyncio.TimeoutError) as exc:
+            self._backoff = min(self.RETRY_MAX, self._backoff * 2) if self._backoff else self.RETRY_INITIAL
+            self._retry_at = time.monotonic() + self._backoff
+            raise ConnectionError(f"TCP {self.host}:{self.port} 连接失败: {exc!r}") from exc
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._error = None
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self._keepalive > 0:
+                try:
+                    _enable_keepalive(sock, self._keepalive)
+                except OSError:
+                    pass
+        self._pump = asyncio.get_running_loop().create_task(self._pump_rx(self._reader))
+
+    async def _pump_rx(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                chunk = await reader.read(self.RECV_SIZE)
+                if not chunk:
+                    break
+                self._feed(chunk)
+        except asyncio.CancelledError:
+            raise
+        except OSError as exc:
+            logger.warning("TCP %s:%s 接收失败: %s", self.host, self.port, exc)
+        if reader is self._reader:
+            # 对端已关闭：下一次读写时重连
+            self._drop()
+            self._ready.set()
+
+    def _drop(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        self._pump = None
+
+    async def _ensure_connected(self) -> bool:
+        if self._writer is not None:
+            return True
+        try:
+            await self._connect()
+        except ConnectionError:
+            return False
+        self.reconnects += 1
+        logger.info("TCP %s:%s 已重连", self.host, self.port)
+        return True
+
+    async def _fill(self, timeout: Optional[float]) -> int:
+        if not await self._ensure_connected():
+            # 仍处于重连退避期：等到退避结束或超时（取较早者）再返回，避免调用方空转卡住事件循环
+            wait = max(0.0, self._retry_at - time.monotonic())
+            if timeout is not None:
+                wait = min(wait, timeout)
+            await asyncio.sleep(wait)
+            return 0
+        return await super()._fill(timeout)
+
+    async def write(self, data: bytes | str) -> None:
+        payload = data.encode() if isinstance(data, str) else bytes(data)
+        if self._writer is None:
+            await self._connect()
+            self.reconnects += 1
+        try:
+            self._writer.write(payload)
+            await asyncio.wait_for(self._writer.drain(), self._io_timeout)
+        except (ConnectionError, OSError) as exc:
+            logger.warning("TCP %s:%s 发送失败（%s），重连", self.host, self.port, exc)
+            self._cancel_pump()
+            self._drop()
+            self._rx.clear()
+            await self._connect()
+            self.reconnects += 1
+            self._writer.write(payload)
+            await asyncio.wait_for(self._writer.drain(), self._io_timeout)
+
+    def _cancel_pump(self) -> None:
+        if self._pump is not None:
+            self._pump.cancel()
+
+    async def close(self) -> None:
+        self._cancel_pump()
+        writer = self._writer
+        self._drop()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except (OSError, asyncio.CancelledError):
+                pass
+
+
+async def open_async_channels(cfg: Dict[str, Any]) -> Dict[str, AsyncChannel]:
+    """按 DSL channels 配置并发打开所有通道（须在事件循环中调用）。"""
+    channels: Dict[str, AsyncChannel] = {}
+    for name, ch_cfg in cfg.items():
+        typ = ch_cfg.get("type", "uart")
+        if typ in {"uart", "serial"}:
+            channel: AsyncChannel = AsyncSerialChannel(ch_cfg)
+        elif typ == "tcp":
+            channel = AsyncTcpChannel(ch_cfg)
+        else:
+            raise ValueError(f"未知通道类型: {typ}")
+        framer = build_framer(ch_cfg.get("framer"))
+        if framer is not None:
+            channel.set_framer(framer)
+        channels[name] = channel
+    try:
+        await asyncio.gather(*(channel.open() for channel in channels.values()))
+    except BaseException:
+        await asyncio.gather(*(channel.close() for channel in channels.values()), return_exceptions=True)
+        raise
+    return channels
@@ -1,61 +1,160 @@
 from __future__ import annotations
 
+import select
 import socket
+import threading
 import time
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from runtime.event_framers import EventFramer, FramedEvent, build_framer
+from utils.log_utils import get_logger
+from utils.timing import Deadline, timestamp
 
 try:
     import serial
 except ImportError:  # pragma: no cover
     serial = None
 
+logger = get_logger("Channels")
+
 
 class BaseChannel:
+    # 事件切分器；为 None 时 read_event 保持逐字节读取（不预读，不影响 read/read_until 等直接读取）
+    framer: Optional[EventFramer] = None
+
     def write(self, data: bytes | str):
         raise NotImplementedError()
 
+    def set_framer(self, framer: Optional[EventFramer]) -> None:
+        self.framer = framer
+        self._events: Deque[Any] = deque()
+
+    def fileno(self) -> Optional[int]:
+        """可用于 select 的文件描述符；不支持时返回 None（调用方退化为轮询）。"""
+        return None
+
     def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
         raise NotImplementedError()
 
+    # 通用实现：read 本身按 timeout 阻塞等待，这里只按剩余时间循环，不额外休眠
     def read_exact(self, size: int, timeout: float = 1.0) -> bytes:
         buf = bytearray()
-        deadline = time.time() + timeout
-        while len(buf) < size and time.time() < deadline:
-            chunk = self.read(size - len(buf), timeout=max(0.01, deadline - time.time()))
+        deadline = Deadline(timeout)
+        while len(buf) < size and not deadline.expired():
+            chunk = self.read(size - len(buf), timeout=deadline.remaining())
             if chunk:
                 buf.extend(chunk)
-            else:
-                time.sleep(0.01)
         return bytes(buf)
 
     def read_until(self, terminator: bytes, timeout: float = 1.0) -> bytes:
         buf = bytearray()
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            chunk = self.read(1, timeout=max(0.01, deadline - time.time()))
+        deadline = Deadline(timeout)
+        while not deadline.expired():
+            chunk = self.read(1, timeout=deadline.remaining())
             if chunk:
                 buf.extend(chunk)
                 if buf.endswith(terminator):
                     break
-            else:
-                time.sleep(0.01)
         return bytes(buf)
 
+    def read_some(self, max_bytes: int = 4096, timeout: float = 0.1) -> bytes:
+        """读取当前已到达的数据（最多 max_bytes）；无数据时最多等待 timeout，超时返回 b""。"""
+        return self.read(1, timeout=timeout)
+
+    def has_pending_event(self) -> bool:
+        """framer 已切分出但尚未取走的事件。"""
+        return bool(self.framer is not None and self._events)
+
     def read_event(self, timeout: float = 0.1):
-        data = self.read(1, timeout=timeout)
-        if not data:
-            return None
-        try:
-            return data.decode(errors="ignore")
-        except Exception:
-            return data.hex().upper()
+        framer = self.framer
+        if framer is None:
+            data = self.read(1, timeout=timeout)
+            if not data:
+                return None
+            try:
+                return data.decode(errors="ignore")
+            except Exception:
+                return data.hex().upper()
+
+        events = self._events
+        deadline = Deadline(timeout)
+        while not events:
+            data = self.read_some(timeout=deadline.remaining())
+            if data:
+                events.extend(framer.feed(data))
+            elif deadline.expired():
+                return None
+        return events.popleft()
+
+
+class BufferedChannel(BaseChannel):
+    """带接收缓冲的通道：每次把已到达的数据整块读入 _rx，read/read_until/read_exact 直接在缓冲中查找。
 
+    子类只需实现 _fill：无数据时最多等待 timeout，有数据时一次读完并追加到 _rx。
+    """
+
+    def __init__(self) -> None:
+        self._rx = bytearray()
+
+    def _fill(self, timeout: Optional[float]) -> int:
+        raise NotImplementedError()
+
+    def _take(self, size: int) -> bytes:
+        data = bytes(self._rx[:size])
+        del self._rx[:size]
+        return data
+
+    def _read_done(self, complete: bool) -> None:
+        """read/read_until 返回前调用；complete 表示调用方要的数据已收齐（未超时）。"""
+
+    def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
+        deadline = Deadline(timeout)
+        while len(self._rx) < size:
+            remaining = deadline.remaining()
+            if not self._fill(remaining) and remaining is not None and remaining <= 0:
+                break
+        complete = len(self._rx) >= size
+        data = self._take(size)
+        self._read_done(complete)
+        return data
+
+    def read_exact(self, size: int, timeout: float = 1.0) -> bytes:
+        return self.read(size, timeout)
 
-class SerialChannel(BaseChannel):
+    def read_until(self, terminator: bytes, timeout: float = 1.0) -> bytes:
+        """读到 terminator（含）为止；超时返回已收到的全部数据。"""
+        deadline = Deadline(timeout)
+        start = 0
+        while True:
+            idx = self._rx.find(terminator, start)
+            if idx >= 0:
+                data = self._take(idx + len(terminator))
+                self._read_done(True)
+                return data
+            # 下次只搜索新到达的数据（保留可能跨块的终止符前缀）
+            start = max(0, len(self._rx) - len(terminator) + 1)
+            remaining = deadline.remaining()
+            if not self._fill(remaining) and remaining is not None and remaining <= 0:
+                data = self._take(len(self._rx))
+                self._read_done(False)
+                return data
+
+    def read_some(self, max_bytes: int = 4096, timeout: float = 0.1) -> bytes:
+        if not self._rx:
+            self._fill(timeout)
+        return self._take(max_bytes)
+
+    def has_pending_event(self) -> bool:
+        return bool(self._rx) or super().has_pending_event()
+
+
+class SerialChannel(BufferedChannel):
     def __init__(self, cfg: Dict[str, Any]) -> None:
         if serial is None:
             raise ImportError("未安装 pyserial，无法使用串口通道")
+        super().__init__()
         self.ser = serial.Serial(
             port=cfg["device"],
             baudrate=int(cfg.get("baudrate", 115200)),
@@ -66,40 +165,295 @@ class SerialChannel(BaseChannel):
         payload = data.encode() if isinstance(data, str) else data
         self.ser.write(payload)
 
-    def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
-        deadline = time.time() + timeout
-        buf = bytearray()
-        while len(buf) < size and time.time() < deadline:
-            chunk = self.ser.read(size - len(buf))
-            if chunk:
-                buf.extend(chunk)
+    def fileno(self) -> Optional[int]:
+        # POSIX 下 pyserial 提供 fileno；Windows 不支持 select 串口句柄
+        try:
+            return self.ser.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def _fill(self, timeout: Optional[float]) -> int:
+        fd = self.fileno()
+        if fd is not None:
+            # POSIX：在串口 fd 上按剩余时间阻塞等待，数据到达即返回
+            waiting = self.ser.in_waiting
+            if not waiting:
+                readable, _, _ = select.select([fd], [], [], timeout)
+                if not readable:
+                    return 0
+                waiting = self.ser.in_waiting
+            chunk = self.ser.read(max(waiting, 1))
+        else:
+            # 无 fd（Windows）：用驱动超时阻塞读首字节，再取走已到达的其余数据
+            self.ser.timeout = timeout
+            chunk = self.ser.read(1)
+            if chunk and self.ser.in_waiting:
+                chunk += self.ser.read(self.ser.in_waiting)
+        self._rx.extend(chunk)
+        return len(chunk)
+
+    def close(self) -> None:
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+
+
+def _enable_keepalive(sock: socket.socket, idle: float) -> None:
+    """开启 TCP keep-alive：空闲 idle 秒后开始探测，约 idle + 3 × idle/3 秒内发现断线。"""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    idle_s = max(1, int(idle))
+    interval = max(1, idle_s // 3)
+    if hasattr(socket, "TCP_KEEPIDLE"):  # Linux
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle_s)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+    elif hasattr(socket, "TCP_KEEPALIVE"):  # macOS
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle_s)
+    elif hasattr(socket, "SIO_KEEPALIVE_VALS"):  # Windows
+        sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, idle_s * 1000, interval * 1000))
+
+
+class TcpConnectionPool:
+    """按 (host, port) 复用 TCP 连接，并限制重连频率。
+
+    - 通道关闭时把干净的连接（无未读数据）放回池中，下一次运行脚本/建立通道直接取用，
+      不再重新握手；空闲超过 idle_timeout 的连接在下次存取时关闭；
+    - 取出时先检查连接：对端已关闭或残留未读数据的连接直接丢弃；
+    - 连接失败后按指数退避（retry_initial → retry_max），退避期内的连接请求立即抛出 ConnectionError，
+      避免设备离线时大量通道同时反复握手。
+    """
+
+    def __init__(
+        self,
+        max_idle: int = 4,
+        idle_timeout: float = 60.0,
+        retry_initial: float = 0.5,
+        retry_max: float = 10.0,
+    ) -> None:
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, int], List[Tuple[socket.socket, float]]] = {}
+        self._retry: Dict[Tuple[str, int], Tuple[float, float]] = {}  # endpoint -> (retry_at, 下次退避秒数)
+
+    def acquire(self, host: str, port: int, timeout: float = 2.0, keepalive: float = 30.0) -> socket.socket:
+        endpoint = (host, int(port))
+        with self._lock:
+            self._expire_idle()
+            idle = self._idle.get(endpoint) or []
+            while idle:
+                sock, _ = idle.pop()
+                if self._usable(sock):
+                    return sock
+                _close_socket(sock)
+            retry_at, _ = self._retry.get(endpoint, (0.0, 0.0))
+        retry_in = retry_at - time.monotonic()
+        if retry_in > 0:
+            raise ConnectionError(f"TCP {host}:{port} 连接失败，{retry_in:.1f}s 后重试")
+        try:
+            sock = socket.create_connection(endpoint, timeout=timeout)
+        except OSError as exc:
+            with self._lock:
+                _, backoff = self._retry.get(endpoint, (0.0, 0.0))
+                backoff = min(self.retry_max, backoff * 2) if backoff else self.retry_initial
+                self._retry[endpoint] = (time.monotonic() + backoff, backoff)
+            raise ConnectionError(f"TCP {host}:{port} 连接失败: {exc}") from exc
+        with self._lock:
+            self._retry.pop(endpoint, None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if keepalive > 0:
+            try:
+                _enable_keepalive(sock, keepalive)
+            except OSError:
+                pass
+        return sock
+
+    def release(self, host: str, port: int, sock: socket.socket) -> None:
+        """归还连接；调用方须保证该连接上没有在途的应答（已到达的残留数据会被检查出来并关闭连接）。"""
+        endpoint = (host, int(port))
+        with self._lock:
+            self._expire_idle()
+            idle = self._idle.setdefault(endpoint, [])
+            if len(idle) < self.max_idle and self._usable(sock):
+                idle.append((sock, time.monotonic()))
+                return
+        _close_socket(sock)
+
+    def clear(self) -> None:
+        with self._lock:
+            socks = [sock for idle in self._idle.values() for sock, _ in idle]
+            self._idle.clear()
+            self._retry.clear()
+        for sock in socks:
+            _close_socket(sock)
+
+    def _expire_idle(self) -> None:
+        # 调用方需持有 _lock
+        limit = time.monotonic() - self.idle_timeout
+        for endpoint, idle in list(self._idle.items()):
+            keep = [(sock, since) for sock, since in idle if since >= limit]
+            for sock, since in idle:
+                if since < limit:
+                    _close_socket(sock)
+            if keep:
+                self._idle[endpoint] = keep
             else:
-                time.sleep(0.01)
-        return bytes(buf)
+                del self._idle[endpoint]
+
+    @staticmethod
+    def _usable(sock: socket.socket) -> bool:
+        # 空闲连接不应可读：可读意味着对端已关闭（EOF/RST）或有残留数据，两者都不能复用
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+
+def _close_socket(sock: socket.socket) -> None:
+    try:
+        sock.close()
+    except OSError:
+        pass
+
+
+TCP_POOL = TcpConnectionPool()
+
+
+class TcpChannel(BufferedChannel):
+    """TCP 通道：连接取自 TCP_POOL，关闭时归还；断线后自动重连。
 
+    对端关闭或发送失败时丢弃连接：发送失败立即重连并重发一次，接收侧在下一次读取时重连
+    （重连频率受连接池退避限制）。配置 pool: false 时不复用连接，keepalive 为 keep-alive 空闲秒数（0 关闭）。
+    """
+
+    RECV_SIZE = 65536
 
-class TcpChannel(BaseChannel):
     def __init__(self, cfg: Dict[str, Any]) -> None:
-        self.sock = socket.create_connection((cfg["host"], int(cfg["port"])), timeout=float(cfg.get("timeout", 2.0)))
-        self.sock.settimeout(0.2)
+        super().__init__()
+        self.host = str(cfg["host"])
+        self.port = int(cfg["port"])
+        self._io_timeout = float(cfg.get("timeout", 2.0))
+        self._keepalive = float(cfg.get("keepalive", 30.0))
+        self._pooled = bool(cfg.get("pool", True))
+        self.reconnects = 0
+        self._down_logged = False
+        # 最近一次发送之后，还没有一次 read/read_until 收齐所要的数据并读空缓冲：
+        # 应答（或其余部分）可能仍在路上，此时连接不能放回连接池
+        self._awaiting_reply = False
+        self.sock: Optional[socket.socket] = None
+        self._connect()
+
+    def _connect(self) -> socket.socket:
+        self.sock = TCP_POOL.acquire(self.host, self.port, self._io_timeout, self._keepalive)
+        self._awaiting_reply = False
+        return self.sock
+
+    def _drop(self) -> None:
+        # 连接已不可用：丢弃连接与其上的残留数据
+        if self.sock is not None:
+            _close_socket(self.sock)
+            self.sock = None
+        self._rx.clear()
+
+    def _reconnect(self) -> bool:
+        try:
+            self._connect()
+        except ConnectionError as exc:
+            # 断线期间每次读取都会尝试，只在首次失败时告警
+            if not self._down_logged:
+                logger.warning("%s", exc)
+                self._down_logged = True
+            return False
+        self._down_logged = False
+        self.reconnects += 1
+        logger.info("TCP %s:%s 已重连", self.host, self.port)
+        return True
 
     def write(self, data: bytes | str):
         payload = data.encode() if isinstance(data, str) else data
-        self.sock.sendall(payload)
+        if self.sock is not None and self._peer_closed():
+            # 空闲期间对端已断开（如网关空闲超时）：先重连再发送，避免请求发到已关闭的连接上
+            self._drop()
+            self.reconnects += 1
+        sock = self.sock or self._connect()
+        sock.settimeout(self._io_timeout)
+        self._awaiting_reply = True
+        try:
+            sock.sendall(payload)
+        except (socket.timeout, BlockingIOError):
+            raise
+        except OSError as exc:
+            # 连接已断（对端重启、网关空闲断开等）：重连后重发一次
+            logger.warning("TCP %s:%s 发送失败（%s），重连", self.host, self.port, exc)
+            self._drop()
+            sock = self._connect()
+            self.reconnects += 1
+            sock.settimeout(self._io_timeout)
+            self._awaiting_reply = True
+            sock.sendall(payload)
 
-    def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
-        deadline = time.time() + timeout
-        buf = bytearray()
-        while len(buf) < size and time.time() < deadline:
-            try:
-                chunk = self.sock.recv(size - len(buf))
-                if chunk:
-                    buf.extend(chunk)
-                else:
-                    time.sleep(0.01)
-            except socket.timeout:
-                continue
-        return bytes(buf)
+    def _peer_closed(self) -> bool:
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+            if not readable:
+                return False
+            self.sock.setblocking(False)
+            return self.sock.recv(1, socket.MSG_PEEK) == b""
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+
+    def fileno(self) -> Optional[int]:
+        return self.sock.fileno() if self.sock is not None else None
+
+    def _fill(self, timeout: Optional[float]) -> int:
+        if self.sock is None and not self._reconnect():
+            # 仍处于重连退避期：等完剩余时间，避免调用方空转
+            self._idle_wait(timeout)
+            return 0
+        sock = self.sock
+        # timeout 为 0 时做一次非阻塞读取，为 None 时阻塞到有数据
+        sock.settimeout(timeout if timeout is None or timeout > 0 else 0.0)
+        try:
+            chunk = sock.recv(self.RECV_SIZE)
+        except (socket.timeout, BlockingIOError):
+            return 0
+        except OSError as exc:
+            logger.warning("TCP %s:%s 接收失败: %s", self.host, self.port, exc)
+            chunk = b""
+        if not chunk:
+            # 对端已关闭：丢弃连接，下一次读写时重连；本次等完剩余时间，避免调用方空转
+            self._drop()
+            self._idle_wait(timeout)
+            return 0
+        self._rx.extend(chunk)
+        return len(chunk)
+
+    def _read_done(self, complete: bool) -> None:
+        # 只收到部分应答（读取超时）时保持在途状态：其余数据可能迟到，落在下一个借用者的连接上
+        if complete and not self._rx:
+            self._awaiting_reply = False
+
+    def _idle_wait(self, timeout: Optional[float]) -> None:
+        # 无连接可读：等完剩余时间；不限时（None）的读取每次等一个 I/O 超时后再尝试重连
+        time.sleep(self._io_timeout if timeout is None else timeout)
+
+    def close(self) -> None:
+        sock, self.sock = self.sock, None
+        if sock is None:
+            return
+        # 只归还事务已完整结束的连接：缓冲中无未读数据，且最后一次发送之后应答已完整读取；
+        # 超时放弃的请求（或只发不收的命令）的应答可能迟到，被下一个使用者当作自己的应答
+        if self._pooled and not self._rx and not self._awaiting_reply:
+            TCP_POOL.release(self.host, self.port, sock)
+        else:
+            _close_socket(sock)
+        self._rx.clear()
 
 
 class LoggingChannel(BaseChannel):
@@ -115,7 +469,7 @@ class LoggingChannel(BaseChannel):
         data = payload.encode() if isinstance(payload, str) else payload
         try:
             with self.log_path.open("a", encoding="utf-8") as f:
-                f.write(f"{time.time():.3f} {direction} {data.hex().upper()}\n")
+                f.write(f"{timestamp():.6f} {direction} {data.hex().upper()}\n")
         except Exception:
             # Logging failure should not block IO
             pass
@@ -124,17 +478,47 @@ class LoggingChannel(BaseChannel):
         self._log("TX", data)
         self.inner.write(data)
 
+    def fileno(self) -> Optional[int]:
+        return self.inner.fileno() if hasattr(self.inner, "fileno") else None
+
     def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
         chunk = self.inner.read(size, timeout)
         if chunk:
             self._log("RX", chunk)
         return chunk
 
+    def read_exact(self, size: int, timeout: float = 1.0) -> bytes:
+        chunk = self.inner.read_exact(size, timeout)
+        if chunk:
+            self._log("RX", chunk)
+        return chunk
+
+    def read_until(self, terminator: bytes, timeout: float = 1.0) -> bytes:
+        chunk = self.inner.read_until(terminator, timeout)
+        if chunk:
+            self._log("RX", chunk)
+        return chunk
+
+    def read_some(self, max_bytes: int = 4096, timeout: float = 0.1) -> bytes:
+        chunk = self.inner.read_some(max_bytes, timeout)
+        if chunk:
+            self._log("RX", chunk)
+        return chunk
+
+    def set_framer(self, framer: Optional[EventFramer]) -> None:
+        self.inner.set_framer(framer)
+
+    def has_pending_event(self) -> bool:
+        return self.inner.has_pending_event()
+
     def read_event(self, timeout: float = 0.1):
         evt = self.inner.read_event(timeout)
         if evt is not None:
             try:
-                raw = evt if isinstance(evt, bytes) else str(evt).encode()
+                if isinstance(evt, FramedEvent):
+                    raw = evt.raw
+                else:
+                    raw = evt if isinstance(evt, bytes) else str(evt).encode()
                 self._log("EVT", raw)
             except Exception:
                 pass
@@ -157,6 +541,9 @@ def build_channels(cfg: Dict[str, Any]) -> Dict[str, BaseChannel]:
             channels[name] = DummyChannel()
         else:
             raise ValueError(f"未知通道类型: {typ}")
+        framer = build_framer(ch_cfg.get("framer"))
+        if framer is not None:
+            channels[name].set_framer(framer)
         log_path = ch_cfg.get("log_path")
         if log_path:
             channels[name] = LoggingChannel(channels[name], log_path)
@@ -170,9 +557,13 @@ class DummyChannel(BaseChannel):
         return None
 
     def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
-        time.sleep(min(timeout, 0.01))
+        time.sleep(0.01 if timeout is None else min(timeout, 0.01))
+        return b""
+
+    def read_some(self, max_bytes: int = 4096, timeout: float = 0.1) -> bytes:
+        time.sleep(0.01 if timeout is None else min(timeout, 0.01))
         return b""
 
     def read_event(self, timeout: float = 0.1):
-        time.sleep(min(timeout, 0.01))
+        time.sleep(0.01 if timeout is None else min(timeout, 0.01))
         return None
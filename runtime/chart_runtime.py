@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import random
-import time
 from typing import Dict, Iterable, List
 
 from PySide6.QtCore import QObject, QTimer, Signal
 
+from utils.timing import timestamp
+
 
 class ChartRuntime(QObject):
     """Simple runtime bridge that emits parsed data dicts."""
@@ -31,7 +32,7 @@ class ChartRuntime(QObject):
 
     def _tick(self) -> None:
         """Emit mock data periodically (for demo)."""
-        now = time.time()
+        now = timestamp()
         payload: Dict[str, float] = {"ts": now}
         for key in self.keys:
             payload[key] = random.uniform(0, 100)
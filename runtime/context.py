@@ -2,11 +2,25 @@ from __future__ import annotations
 
 import logging
 import queue
-from typing import Any, Dict, Optional
+import select
+import socket
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from actions.registry import ActionRegistry
+from core.event_bus import DISPATCH_INLINE
 from dsl.expression import eval_expr
+from protocols.modbus_bus import ModbusBus
+from protocols.modbus_plan import PollPlan, PollPoint
+from protocols.registry import ProtocolRegistry
+from runtime.event_framers import FramedEvent
 from runtime.experiment_recorder import ExperimentRecorder, JsonlLogHandler
+from runtime.vars_view import Scope, VarsView
+from utils.file_utils import BlockFileReader
+from utils.timing import Deadline
+
+
+# 通道不支持 select 时的轮询间隔；通道可读后单次读取的超时
+_POLL_INTERVAL = 0.02
 
 
 class RuntimeContext:
@@ -29,20 +43,34 @@ class RuntimeContext:
         self._last_event: Any = None
         self._last_event_name: Optional[str] = None
         self._last_event_payload: Any = None
+        # 表达式求值使用的分层视图：事件作用域优先于普通变量，与 vars_snapshot 的覆盖顺序一致
+        self._event_scope = Scope({"event": None, "event_name": None, "event_payload": None})
+        self._vars_view = VarsView(self._event_scope, self.vars)
         self._bus = bus
         self._bus_handlers: list[tuple[str, Any]] = []
         self._event_queue: "queue.SimpleQueue[tuple[str, Any]]" = queue.SimpleQueue()
+        # 唤醒管道：总线事件入队或 wakeup() 时写入一个字节，使 next_event 中的 select 立即返回
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
         self._recorder: Optional[ExperimentRecorder] = None
         self._recorder_log_handler: Optional[JsonlLogHandler] = None
+        self._block_files: Dict[str, BlockFileReader] = {}
+        # modbus_poll 计划：(通道, 协议, 读点, max_gap) -> 计划；异常响应拆分后的结果只对该设备有效
+        self._poll_plans: Dict[Tuple[Any, str, Tuple[PollPoint, ...], int], PollPlan] = {}
         if self._bus and external_events:
             for name in external_events:
                 handler = self._make_bus_handler(name)
-                self._bus.subscribe(name, handler)
+                self._bus.subscribe(name, handler, mode=DISPATCH_INLINE)
                 self._bus_handlers.append((name, handler))
 
     def set_var(self, key: str, value: Any) -> None:
         self.vars[key] = value
 
+    def vars_view(self) -> VarsView:
+        """只读变量视图（不复制），供表达式求值；需要独立副本时使用 vars_snapshot。"""
+        return self._vars_view
+
     def vars_snapshot(self) -> Dict[str, Any]:
         snap = dict(self.vars)
         snap["event"] = self._last_event
@@ -60,11 +88,13 @@ class RuntimeContext:
 
     def eval_value(self, value: Any) -> Any:
         if isinstance(value, str) and "$" in value:
-            return eval_expr(value, self.vars_snapshot())
+            return eval_expr(value, self._vars_view)
         return value
 
-    def run_action(self, name: str, args: Dict[str, Any]) -> Any:
-        fn = ActionRegistry.get(name)
+    def run_action(self, name: str, args: Dict[str, Any], fn: Optional[Callable[..., Any]] = None) -> Any:
+        """执行动作；fn 为编译阶段预绑定的动作函数，缺省时按名称从注册表查找。"""
+        if fn is None:
+            fn = ActionRegistry.get(name)
         recorder_before = self._recorder
         if recorder_before:
             if name == "record_stop":
@@ -94,34 +124,117 @@ class RuntimeContext:
             recorder_after.record_action(name=name, args=args or {}, result=result)
         return result
 
-    def next_event(self, timeout: float = 0.1) -> Optional[str]:
+    def next_event(self, timeout: Optional[float] = 0.1) -> Optional[str]:
+        """等待下一个事件（总线事件优先），最多等待 timeout 秒；timeout=None 表示一直等待。
+
+        通道支持 fileno() 时，总线队列与通道可读性在同一个 select 中等待，任一方就绪立即返回；
+        否则退化为短超时轮询通道。被 wakeup() 唤醒且没有事件时返回 None。
+        """
+        deadline = Deadline(timeout)
+        has_fileno = hasattr(self.channel, "fileno")
+        pending = getattr(self.channel, "has_pending_event", None)
+        while True:
+            # 每轮重新取 fd：TCP 通道断线重连后描述符会变化
+            fd = self.channel.fileno() if has_fileno else None
+            name = self._next_bus_event()
+            if name is not None:
+                return name
+            if pending is not None and pending():
+                # framer 一次切分出多个事件时，剩余事件无需再等待通道可读；
+                # 缓冲中只有半帧时得不到事件，继续按下面的方式等待
+                evt = self.channel.read_event(timeout=0)
+                if evt is not None:
+                    return self._channel_event(evt)
+            remaining = deadline.remaining()
+            if fd is None:
+                wait = _POLL_INTERVAL if remaining is None else min(remaining, _POLL_INTERVAL)
+                evt = self.channel.read_event(timeout=wait)
+                if evt is not None:
+                    return self._channel_event(evt)
+            else:
+                readable, _, _ = select.select([self._wake_r, fd], [], [], remaining)
+                if self._wake_r in readable:
+                    self._drain_wakeup()
+                    name = self._next_bus_event()
+                    if name is not None:
+                        return name
+                    if fd not in readable:
+                        return None
+                if fd in readable:
+                    evt = self.channel.read_event(timeout=_POLL_INTERVAL)
+                    if evt is not None:
+                        return self._channel_event(evt)
+            if deadline.expired():
+                return None
+
+    def wakeup(self) -> None:
+        """唤醒阻塞中的 next_event（例如停止脚本时）。"""
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            # 缓冲区已满说明已有未处理的唤醒；已关闭时忽略
+            pass
+
+    def _drain_wakeup(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _next_bus_event(self) -> Optional[str]:
         try:
             name, payload = self._event_queue.get_nowait()
-            self._last_event_name = name
-            self._last_event_payload = payload
-            self._last_event = payload if payload is not None else name
-            if self._recorder:
-                self._recorder.record_event(name=str(name), payload=payload, source="bus")
-            return name
         except queue.Empty:
-            pass
+            return None
+        self._set_last_event(payload if payload is not None else name, name, payload)
+        if self._recorder:
+            self._recorder.record_event(name=str(name), payload=payload, source="bus")
+        return name
 
-        evt = self.channel.read_event(timeout=timeout)
-        if evt is not None:
-            self._last_event_name = str(evt) if not isinstance(evt, bytes) else evt.decode(errors="ignore")
-            self._last_event_payload = None
-            self._last_event = evt
+    def _channel_event(self, evt: Any) -> Any:
+        if isinstance(evt, FramedEvent):
+            self._set_last_event(evt.payload if evt.payload is not None else evt.name, evt.name, evt.payload)
             if self._recorder:
-                payload: Any = evt
-                if isinstance(evt, bytes):
-                    payload = {"text": self._last_event_name, "hex": evt.hex().upper()}
-                self._recorder.record_event(name=self._last_event_name or "event", payload=payload, source="channel")
-            return evt
-        return None
+                payload = evt.payload if evt.payload is not None else {"text": evt.name, "hex": evt.raw.hex().upper()}
+                self._recorder.record_event(name=evt.name, payload=payload, source="channel")
+            return evt.name
+        self._set_last_event(evt, str(evt) if not isinstance(evt, bytes) else evt.decode(errors="ignore"), None)
+        if self._recorder:
+            payload: Any = evt
+            if isinstance(evt, bytes):
+                payload = {"text": self._last_event_name, "hex": evt.hex().upper()}
+            self._recorder.record_event(name=self._last_event_name or "event", payload=payload, source="channel")
+        return evt
+
+    def _set_last_event(self, event: Any, name: Optional[str], payload: Any) -> None:
+        self._last_event = event
+        self._last_event_name = name
+        self._last_event_payload = payload
+        self._event_scope.names = {"event": event, "event_name": name, "event_payload": payload}
 
     def channel_write(self, data: bytes | str) -> None:
         self.channel.write(data)
 
+    def open_block_file(self, path: str, revalidate: bool = False) -> BlockFileReader:
+        """返回该路径在本次运行内复用的块读取器；revalidate 时文件被修改则重新打开。"""
+        reader = self._block_files.get(path)
+        if reader is not None and revalidate and reader.is_stale():
+            reader.close()
+            reader = None
+        if reader is None:
+            reader = BlockFileReader(path)
+            self._block_files[path] = reader
+        return reader
+
+    def poll_plan(self, channel: Any, protocol_key: str, points: Tuple[PollPoint, ...], max_gap: int) -> PollPlan:
+        """返回本次运行内该通道、协议上复用的轮询计划，轮询状态每个周期沿用同一计划。"""
+        key = (channel, protocol_key, points, max_gap)
+        plan = self._poll_plans.get(key)
+        if plan is None:
+            plan = self._poll_plans[key] = PollPlan(points, max_gap)
+        return plan
+
     @property
     def recorder(self) -> Optional[ExperimentRecorder]:
         return self._recorder
@@ -156,21 +269,30 @@ class RuntimeContext:
     def _make_bus_handler(self, name: str):
         def _handler(payload):
             self._event_queue.put((name, payload))
+            self.wakeup()
 
         return _handler
 
     def close(self) -> None:
+        for channel in self.channels.values():
+            ModbusBus.discard(channel)
+            ProtocolRegistry.discard_sessions(channel)
+        for reader in self._block_files.values():
+            reader.close()
+        self._block_files.clear()
+        self._poll_plans.clear()
         if self._recorder:
             try:
                 self._recorder.close(vars_snapshot=self.vars_snapshot())
             except Exception:
                 pass
             self.detach_recorder()
-        if not self._bus:
-            return
-        for event_name, handler in self._bus_handlers:
-            try:
-                self._bus.unsubscribe(event_name, handler)
-            except Exception:
-                pass
-        self._bus_handlers.clear()
+        if self._bus:
+            for event_name, handler in self._bus_handlers:
+                try:
+                    self._bus.unsubscribe(event_name, handler)
+                except Exception:
+                    pass
+            self._bus_handlers.clear()
+        self._wake_r.close()
+        self._wake_w.close()
@@ -0,0 +1,282 @@
+"""通道事件切分（framer）：把收到的字节流批量切分为完整事件。
+
+缺省（未配置 framer）时通道逐字节产生单字符事件；配置后按整行、分隔符、正则、
+定长或 schema 帧切分，状态机可以直接用 on_event 匹配 "OK" 或整帧。
+
+通道配置示例：
+    framer: line
+    framer: { type: delimiter, delimiter: "\\r\\n" }
+    framer: { type: regex, name: CSQ, pattern: "\\\\+CSQ: (?P<rssi>\\\\d+),\\\\d+\\r\\n" }
+    framer: { type: fixed, size: 8 }
+    framer: { type: schema, schema: config/schema.yaml, frames: [status] }
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+DEFAULT_MAX_BUFFER = 4096
+
+
+@dataclass
+class FramedEvent:
+    """切分出的事件：name 用于 on_event 匹配，payload 作为 $event 的内容，raw 为原始字节。"""
+
+    name: str
+    payload: Any = None
+    raw: bytes = b""
+
+
+def _to_bytes(value: Any) -> bytes:
+    # YAML 中的 "\r\n"、"\x06" 已是对应字符；latin-1 保证 0x00-0xFF 原样映射为字节
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return str(value).encode("latin-1")
+
+
+class EventFramer:
+    """切分器基类：feed 接收任意长度的数据，返回其中切分出的完整事件（可为空）。"""
+
+    def __init__(self, encoding: str = "utf-8", max_buffer: int = DEFAULT_MAX_BUFFER) -> None:
+        self.encoding = encoding
+        self.max_buffer = max(1, int(max_buffer))
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[Any]:
+        raise NotImplementedError()
+
+    def reset(self) -> None:
+        self._buf.clear()
+
+    def _text_event(self, raw: bytes, payload: Any = None) -> FramedEvent:
+        return FramedEvent(raw.decode(self.encoding, errors="ignore"), payload, raw)
+
+    def _trim(self, keep: int = 0) -> None:
+        # 长时间没有切分出事件时丢弃最旧的数据，避免缓冲无限增长
+        if len(self._buf) > self.max_buffer:
+            del self._buf[: len(self._buf) - max(keep, 0)]
+
+
+class ByteFramer(EventFramer):
+    """逐字节事件（与未配置 framer 时相同），但一次读取的多个字节在一次调用中批量切分。"""
+
+    def feed(self, data: bytes) -> List[Any]:
+        return [bytes((byte,)).decode(self.encoding, errors="ignore") for byte in data]
+
+
+class DelimiterFramer(EventFramer):
+    def __init__(self, delimiter: Any = b"\n", include_delimiter: bool = False, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.delimiter = _to_bytes(delimiter)
+        if not self.delimiter:
+            raise ValueError("delimiter 不能为空")
+        self.include_delimiter = include_delimiter
+
+    def feed(self, data: bytes) -> List[Any]:
+        buf = self._buf
+        buf.extend(data)
+        delim = self.delimiter
+        events: List[Any] = []
+        start = 0
+        while True:
+            idx = buf.find(delim, start)
+            if idx < 0:
+                break
+            end = idx + len(delim)
+            events.append(self._token(bytes(buf[start : end if self.include_delimiter else idx])))
+            start = end
+        if start:
+            del buf[:start]
+        self._trim(keep=len(delim) - 1)
+        return events
+
+    def _token(self, raw: bytes) -> FramedEvent:
+        return self._text_event(raw)
+
+
+class LineFramer(DelimiterFramer):
+    """按行切分（\\n 结尾），事件名不含行尾的 \\r\\n。"""
+
+    def __init__(self, **kwargs: Any) -> None:
+        kwargs.setdefault("delimiter", b"\n")
+        super().__init__(**kwargs)
+
+    def _token(self, raw: bytes) -> FramedEvent:
+        if not self.include_delimiter:
+            raw = raw.rstrip(b"\r")
+        return self._text_event(raw)
+
+
+class RegexFramer(EventFramer):
+    """按正则切分：每个匹配为一个事件，命名分组作为 payload；匹配之前的数据被丢弃。
+
+    事件名缺省为匹配到的文本，指定 name 时所有匹配都使用该事件名（便于 on_event 匹配）。
+    正则应包含结束标记（如 \\r\\n），否则可能在数据尚未收全时提前匹配。
+    """
+
+    def __init__(self, pattern: Any, name: Optional[str] = None, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.pattern = re.compile(_to_bytes(pattern))
+        self.name = name
+
+    def feed(self, data: bytes) -> List[Any]:
+        buf = self._buf
+        buf.extend(data)
+        events: List[Any] = []
+        pos = 0
+        while pos < len(buf):
+            match = self.pattern.search(buf, pos)
+            if match is None:
+                break
+            payload: Optional[Dict[str, Any]] = None
+            if self.pattern.groupindex:
+                payload = {
+                    key: val.decode(self.encoding, errors="ignore") if val is not None else None
+                    for key, val in match.groupdict().items()
+                }
+            event = self._text_event(bytes(match.group(0)), payload)
+            if self.name:
+                event.name = self.name
+            events.append(event)
+            pos = match.end() if match.end() > match.start() else match.start() + 1
+        if pos:
+            del buf[:pos]
+        self._trim()
+        return events
+
+
+class FixedFramer(EventFramer):
+    """定长切分；事件名缺省为 HEX 大写字符串，指定 encoding 时按文本解码。"""
+
+    def __init__(self, size: int, encoding: Optional[str] = None, **kwargs: Any) -> None:
+        super().__init__(encoding=encoding or "utf-8", **kwargs)
+        self.size = int(size)
+        if self.size <= 0:
+            raise ValueError("size 必须为正整数")
+        self.as_text = encoding is not None
+
+    def feed(self, data: bytes) -> List[Any]:
+        buf = self._buf
+        buf.extend(data)
+        size = self.size
+        count = len(buf) // size
+        events: List[Any] = []
+        for idx in range(count):
+            raw = bytes(buf[idx * size : (idx + 1) * size])
+            events.append(self._text_event(raw) if self.as_text else FramedEvent(raw.hex().upper(), None, raw))
+        if count:
+            del buf[: count * size]
+        return events
+
+
+class SchemaFramer(EventFramer):
+    """按 protocols.schema_runtime 的帧定义切分：以帧头同步，按帧尾或定长截取并校验。
+
+    事件名为帧名，payload 为解析出的字段；帧须有 header，且有 tail 或固定长度。
+    """
+
+    def __init__(self, schema: str, frames: Optional[List[str]] = None, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        from protocols.schema_runtime import ProtocolSchema
+
+        self.schema = ProtocolSchema.load(schema)
+        names = list(frames) if frames else list(self.schema.frames)
+        self._frames = []
+        for name in names:
+            fd = self.schema.frames.get(name)
+            if fd is None:
+                raise KeyError(f"unknown frame: {name}")
+            fixed = fd.fixed_length()
+            if not fd.header or (not fd.tail and fixed is None):
+                raise ValueError(f"schema framer 需要帧 {name} 定义 header 以及 tail 或固定长度")
+            self._frames.append((fd, fixed))
+
+    def feed(self, data: bytes) -> List[Any]:
+        buf = self._buf
+        buf.extend(data)
+        events: List[Any] = []
+        pos = 0
+        while pos < len(buf):
+            start = self._next_header(pos)
+            if start < 0:
+                # 保留可能是帧头前缀的尾部字节
+                keep = max(len(fd.header) for fd, _ in self._frames) - 1
+                pos = max(pos, len(buf) - keep)
+                break
+            result = self._try_frames(start)
+            if result is None:
+                # 帧未收全，等待更多数据
+                pos = start
+                break
+            end, event = result
+            if event is not None:
+                events.append(event)
+            pos = end
+        if pos:
+            del buf[:pos]
+        self._trim()
+        return events
+
+    def _next_header(self, pos: int) -> int:
+        found = -1
+        for fd, _ in self._frames:
+            idx = self._buf.find(fd.header, pos)
+            if idx >= 0 and (found < 0 or idx < found):
+                found = idx
+        return found
+
+    def _try_frames(self, start: int):
+        buf = self._buf
+        incomplete = False
+        for fd, fixed in self._frames:
+            if not buf.startswith(fd.header, start):
+                continue
+            if fd.tail:
+                end = buf.find(fd.tail, start + len(fd.header))
+                if end < 0:
+                    incomplete = True
+                    continue
+                end += len(fd.tail)
+            else:
+                end = start + fixed
+                if end > len(buf):
+                    incomplete = True
+                    continue
+            raw = bytes(buf[start:end])
+            try:
+                parsed = self.schema.parse(fd.name, raw)
+            except ValueError:
+                continue
+            return end, FramedEvent(fd.name, parsed, raw)
+        if incomplete:
+            return None
+        # 帧头匹配但校验失败：跳过一个字节重新同步
+        return start + 1, None
+
+
+_FRAMERS = {
+    "byte": ByteFramer,
+    "line": LineFramer,
+    "delimiter": DelimiterFramer,
+    "regex": RegexFramer,
+    "fixed": FixedFramer,
+    "schema": SchemaFramer,
+}
+
+
+def build_framer(cfg: Any) -> Optional[EventFramer]:
+    """根据通道配置中的 framer 项创建切分器；未配置时返回 None（保持逐字节读取）。"""
+    if not cfg:
+        return None
+    if isinstance(cfg, str):
+        cfg = {"type": cfg}
+    if not isinstance(cfg, dict):
+        raise ValueError(f"非法 framer 配置: {cfg}")
+    params = dict(cfg)
+    typ = str(params.pop("type", "line")).lower()
+    framer_cls = _FRAMERS.get(typ)
+    if framer_cls is None:
+        raise ValueError(f"未知 framer 类型: {typ}")
+    return framer_cls(**params)
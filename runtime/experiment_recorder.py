@@ -5,12 +5,13 @@ import logging
 import os
 import platform
 import sys
-import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from utils.timing import now_ns, timestamp
+
 
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -68,7 +69,8 @@ class ExperimentRecorder:
         script_text: Optional[str] = None,
         script_path: Optional[str] = None,
     ) -> None:
-        self.started_at = time.time()
+        self.started_at = timestamp()
+        self.started_ns = now_ns()
         self.started_at_iso = _utc_now_iso()
         self.name = name
         self.script_text = script_text
@@ -113,7 +115,7 @@ class ExperimentRecorder:
         if self._closed:
             return
         self._closed = True
-        ended_at = time.time()
+        ended_at = timestamp()
         try:
             self._append_jsonl(
                 self._fh_logs,
@@ -123,7 +125,7 @@ class ExperimentRecorder:
                     "event": "stop",
                     "started_at": self.started_at,
                     "ended_at": ended_at,
-                    "duration_s": ended_at - self.started_at,
+                    "duration_s": (now_ns() - self.started_ns) / 1e9,
                 },
             )
         except Exception:
@@ -143,7 +145,8 @@ class ExperimentRecorder:
 
     def record_log(self, record: logging.LogRecord) -> None:
         payload = {
-            "ts": time.time(),
+            "ts": timestamp(),
+            "mono_ns": now_ns(),
             "type": "log",
             "level": record.levelname,
             "logger": record.name,
@@ -152,12 +155,13 @@ class ExperimentRecorder:
         self._append_jsonl(self._fh_logs, payload)
 
     def record_state(self, name: str) -> None:
-        payload = {"ts": time.time(), "type": "state", "name": str(name)}
+        payload = {"ts": timestamp(), "mono_ns": now_ns(), "type": "state", "name": str(name)}
         self._append_jsonl(self._fh_states, payload)
 
     def record_event(self, *, name: str, payload: Any, source: str) -> None:
         evt = {
-            "ts": time.time(),
+            "ts": timestamp(),
+            "mono_ns": now_ns(),
             "type": "event",
             "name": str(name),
             "source": str(source),
@@ -167,7 +171,8 @@ class ExperimentRecorder:
 
     def record_action(self, *, name: str, args: Dict[str, Any], result: Any = None, error: Optional[BaseException] = None) -> None:
         entry: Dict[str, Any] = {
-            "ts": time.time(),
+            "ts": timestamp(),
+            "mono_ns": now_ns(),
             "type": "action",
             "name": str(name),
             "args": args,
@@ -181,7 +186,7 @@ class ExperimentRecorder:
         self._append_jsonl(self._fh_actions, entry)
 
     def record_chart(self, payload: Dict[str, Any]) -> None:
-        entry = {"ts": time.time(), "type": "chart", "payload": payload}
+        entry = {"ts": timestamp(), "mono_ns": now_ns(), "type": "chart", "payload": payload}
         self._append_jsonl(self._fh_charts, entry)
 
     def _write_meta(self) -> None:
@@ -189,6 +194,8 @@ class ExperimentRecorder:
             "name": self.name,
             "started_at": self.started_at,
             "started_at_iso": self.started_at_iso,
+            # 各条目的 ts 与 time.time() 同纪元但按单调时钟推进；mono_ns 为 perf_counter_ns，相减即为间隔
+            "started_mono_ns": self.started_ns,
             "python": {"version": sys.version, "executable": sys.executable},
             "platform": {
                 "system": platform.system(),
@@ -8,6 +8,7 @@ from actions.schema_protocol import register_schema_protocol_actions
 from actions.chart_actions import register_chart_actions
 from actions.record_actions import register_record_actions
 from actions.data_actions import register_data_actions
+from dsl.compiler import compile_state_machine
 from dsl.executor import StateMachineExecutor
 from dsl.parser import parse_script
 from runtime.channels import build_channels
@@ -28,6 +29,8 @@ def run_dsl(path: str, *, bus=None, external_events: list[str] | None = None) ->
     _register_actions()
 
     ast = parse_script(path)
+    # 先编译：脚本错误在打开任何端口之前报出
+    machine = compile_state_machine(ast)
     channels = build_channels(ast.channels)
     if not channels:
         raise ValueError("未定义任何 channel")
@@ -41,7 +44,7 @@ def run_dsl(path: str, *, bus=None, external_events: list[str] | None = None) ->
         script_path=path,
     )
 
-    executor = StateMachineExecutor(ast, ctx)
+    executor = StateMachineExecutor(ast, ctx, machine)
     executor.run()
     if hasattr(ctx, "close"):
         ctx.close()
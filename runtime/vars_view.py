@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Mapping
+
+
+class Scope(Mapping[str, Any]):
+    """变量作用域：值为 dict 的变量可用 name.key 访问，查找时按需解析而不是预先展开复制。"""
+
+    __slots__ = ("names",)
+
+    def __init__(self, names: Dict[str, Any]) -> None:
+        self.names = names
+
+    def __getitem__(self, key: str) -> Any:
+        names = self.names
+        if key in names:
+            return names[key]
+        head, sep, tail = key.partition(".")
+        if sep:
+            value = names.get(head)
+            if isinstance(value, dict) and tail in value:
+                return value[tail]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for name, value in self.names.items():
+            yield name
+            if isinstance(value, dict):
+                for key in value:
+                    if isinstance(key, str) and key.isidentifier():
+                        yield f"{name}.{key}"
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class VarsView(Mapping[str, Any]):
+    """只读分层变量视图：按层顺序查找（靠前的层优先），任何一层都不复制。
+
+    表达式求值直接使用该视图；overlay() 在最前面叠加一层临时作用域（如 item/index）。
+    """
+
+    __slots__ = ("layers",)
+
+    def __init__(self, *layers: Mapping[str, Any]) -> None:
+        self.layers: List[Mapping[str, Any]] = list(layers)
+
+    def __getitem__(self, key: str) -> Any:
+        for layer in self.layers:
+            try:
+                return layer[key]
+            except KeyError:
+                continue
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return any(key in layer for layer in self.layers)
+
+    def __iter__(self) -> Iterator[str]:
+        seen = set()
+        for layer in self.layers:
+            for key in layer:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def overlay(self, layer: Mapping[str, Any]) -> "VarsView":
+        return VarsView(layer, *self.layers)
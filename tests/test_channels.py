@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+from runtime.channels import TCP_POOL, TcpChannel
+
+
+def _serve_once(reply: bytes, delay: float):
+    """本机起一个只接受一次连接的服务端：延迟 delay 秒后发送 reply。"""
+    server = socket.create_server(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+
+    def _run() -> None:
+        conn, _ = server.accept()
+        with conn:
+            time.sleep(delay)
+            conn.sendall(reply)
+            time.sleep(0.5)
+        server.close()
+
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    return port, thread
+
+
+def test_read_without_timeout_blocks_until_data():
+    port, thread = _serve_once(b"OK\r\nDATA", delay=0.2)
+    channel = TcpChannel({"host": "127.0.0.1", "port": port, "pool": False})
+    try:
+        assert channel.read_until(b"\r\n", timeout=None) == b"OK\r\n"
+        assert channel.read(4, timeout=None) == b"DATA"
+    finally:
+        channel.close()
+    thread.join(2)
+
+
+def _pooled_after(reply: bytes, size: int) -> bool:
+    TCP_POOL.clear()
+    port, thread = _serve_once(reply, delay=0.05)
+    channel = TcpChannel({"host": "127.0.0.1", "port": port})
+    channel.write(b"Q")
+    channel.read(size, timeout=0.3)
+    channel.close()
+    pooled = bool(TCP_POOL._idle.get(("127.0.0.1", port)))
+    TCP_POOL.clear()
+    thread.join(2)
+    return pooled
+
+
+def test_connection_with_partial_reply_is_not_pooled():
+    assert not _pooled_after(b"PAR", 6)
+
+
+def test_connection_with_complete_reply_is_pooled():
+    assert _pooled_after(b"PARTIAL", 7)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from core.event_bus import DISPATCH_INLINE, DISPATCH_ORDERED, DISPATCH_POOL, EventBus
+
+
+def test_publish_batch_mixed_items_flushes_coalesced_buffer_first():
+    bus = EventBus(default_mode=DISPATCH_INLINE)
+    received = []
+    bus.subscribe("serial.rx", received.append)
+    bus.coalesce("serial.rx", window_ms=10_000)
+    try:
+        bus.publish("serial.rx", b"AB")
+        bus.publish_batch("serial.rx", [b"C", "str"])
+        assert received == [b"AB", b"C", "str"]
+    finally:
+        bus.shutdown()
+
+
+def test_pool_grows_for_burst_behind_slow_callback():
+    bus = EventBus(default_mode=DISPATCH_POOL, max_workers=4)
+    started = threading.Semaphore(0)
+    gate = threading.Event()
+
+    def slow(data):
+        started.release()
+        if data != "warmup":
+            gate.wait(5)
+
+    bus.subscribe("burst", slow)
+    try:
+        # 先让一个工作线程处于空闲状态，再连续提交
+        bus.publish("burst", "warmup")
+        assert started.acquire(timeout=2)
+        time.sleep(0.05)
+        for i in range(4):
+            bus.publish("burst", i)
+        # 四个回调应同时在四个工作线程上运行，而不是排在第一个慢回调之后
+        assert all(started.acquire(timeout=2) for _ in range(4))
+    finally:
+        gate.set()
+        bus.shutdown()
+
+
+def test_ordered_subscriber_reassembles_chunk_stream():
+    bus = EventBus(default_mode=DISPATCH_POOL, max_workers=4)
+    chunks = [i.to_bytes(4, "big") + bytes([i & 0xFF]) * (i % 61) for i in range(3000)]
+    rebuilt = bytearray()
+    done = threading.Event()
+
+    def ordered(chunk):
+        # 偶尔停顿（如落盘），其间后续数据块继续到达
+        if int.from_bytes(chunk[:4], "big") % 97 == 0:
+            time.sleep(0.001)
+        rebuilt.extend(chunk)
+        if chunk is chunks[-1]:
+            done.set()
+
+    bus.subscribe("serial.rx", lambda _chunk: time.sleep(0.0002))
+    bus.subscribe("serial.rx", ordered, mode=DISPATCH_ORDERED)
+    try:
+        for chunk in chunks:
+            bus.publish("serial.rx", chunk)
+        assert done.wait(30)
+        assert bytes(rebuilt) == b"".join(chunks)
+    finally:
+        bus.shutdown()
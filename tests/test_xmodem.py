@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+
+from protocols.async_protocols import AsyncXModem
+from protocols.xmodem import ACK, CAN, CRC_REQ, EOT, NAK, SOH, STX, XModem
+from protocols.ymodem import YModem
+
+
+class _Receiver:
+    """内存中的 XMODEM 接收端：按块号收数据，重复块只 ACK 不写入。
+
+    drop_acks：前 N 个 ACK 在线路上丢失（发送端读到超时）；nak_large：拒收所有 1K 块。
+    """
+
+    def __init__(self, drop_acks: int = 0, nak_large: bool = False) -> None:
+        self.image = bytearray()
+        self.expected = 1
+        self.drop_acks = drop_acks
+        self.nak_large = nak_large
+        self.sizes = []
+        self._replies = deque([bytes([CRC_REQ])])
+
+    def write(self, data) -> None:
+        data = bytes(data)
+        if data[0] == EOT:
+            self._reply(ACK)
+            return
+        size = 1024 if data[0] == STX else 128
+        assert data[0] in {SOH, STX} and len(data) == 3 + size + 2
+        if self.nak_large and size == 1024:
+            self._reply(NAK)
+            return
+        block_no = data[1]
+        if block_no == self.expected & 0xFF:
+            self.image.extend(data[3 : 3 + size])
+            self.sizes.append(size)
+            self.expected += 1
+        elif block_no != (self.expected - 1) & 0xFF:
+            self._reply(CAN)
+            return
+        self._reply(ACK)
+
+    def _reply(self, code: int) -> None:
+        if code == ACK and self.drop_acks:
+            self.drop_acks -= 1
+            return
+        self._replies.append(bytes([code]))
+
+    def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
+        return self._replies.popleft() if self._replies else b""
+
+
+class _AsyncReceiver(_Receiver):
+    """同一接收端的 asyncio 通道接口。"""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.lock = asyncio.Lock()
+
+    async def write(self, data) -> None:
+        _Receiver.write(self, data)
+
+    async def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
+        return _Receiver.read(self, size, timeout)
+
+
+def _send(tmp_path, receiver, payload: bytes, **kwargs):
+    path = tmp_path / "fw.bin"
+    path.write_bytes(payload)
+    result = XModem(receiver).execute(str(path), block_size=1024, **kwargs)
+    return result, bytes(receiver.image[: len(payload)])
+
+
+def test_lost_ack_on_1k_block_does_not_fall_back(tmp_path):
+    payload = bytes(range(256)) * 12  # 3072 字节，3 个 1K 块
+    receiver = _Receiver(drop_acks=3)
+    result, image = _send(tmp_path, receiver, payload, fallback_after=3)
+    assert image == payload
+    assert receiver.sizes == [1024, 1024, 1024]
+    assert result["block_size"] == 1024
+
+
+def test_nak_on_1k_block_falls_back_to_128(tmp_path):
+    payload = bytes(range(256)) * 5
+    receiver = _Receiver(nak_large=True)
+    result, image = _send(tmp_path, receiver, payload, fallback_after=3)
+    assert image == payload
+    assert result["block_size"] == 128
+
+
+def test_async_xmodem_shares_fallback_rules(tmp_path):
+    payload = bytes(range(256)) * 12
+    path = tmp_path / "fw.bin"
+    path.write_bytes(payload)
+    receiver = _AsyncReceiver(drop_acks=3)
+    result = asyncio.run(AsyncXModem(receiver).execute(str(path), block_size=1024, fallback_after=3))
+    assert bytes(receiver.image[: len(payload)]) == payload
+    assert result["block_size"] == 1024
+
+
+class _YReceiver:
+    """内存中的 YMODEM 接收端（'C' 模式，停等）。
+
+    lose_headers：前 N 个头块在线路上丢失，接收端超时后再发 'C' 请求重发；
+    未收到头块就收到数据块时取消传输。
+    """
+
+    def __init__(self, lose_headers: int = 0) -> None:
+        self.image = bytearray()
+        self.header = b""
+        self.expected = 1
+        self.lose_headers = lose_headers
+        self._replies = deque([bytes([CRC_REQ])])
+
+    def write(self, data) -> None:
+        data = bytes(data)
+        if data[0] == EOT:
+            self._replies.append(bytes([ACK]))
+            return
+        assert data[0] == STX and len(data) == 3 + 1024 + 2
+        block_no = data[1]
+        payload = data[3 : 3 + 1024]
+        if block_no == 0 and not self.header:
+            if self.lose_headers:
+                self.lose_headers -= 1
+                self._replies.append(bytes([CRC_REQ]))
+                return
+            self.header = payload.rstrip(b"\0")
+            self._replies.extend([bytes([ACK]), bytes([CRC_REQ])])
+            return
+        if block_no == 0:  # 结束时的空头块
+            self._replies.append(bytes([ACK]))
+            return
+        if not self.header:
+            self._replies.append(bytes([CAN]))
+            return
+        if block_no == self.expected & 0xFF:
+            self.image.extend(payload)
+            self.expected += 1
+        self._replies.append(bytes([ACK]))
+
+    def read(self, size: int = 1, timeout: float = 1.0) -> bytes:
+        return self._replies.popleft() if self._replies else b""
+
+
+def test_ymodem_lost_header_is_resent(tmp_path):
+    payload = bytes(range(256)) * 8
+    path = tmp_path / "fw.bin"
+    path.write_bytes(payload)
+    receiver = _YReceiver(lose_headers=2)
+    result = YModem(receiver).execute(str(path))
+    assert receiver.header.startswith(b"fw.bin\0")
+    assert bytes(receiver.image[: len(payload)]) == payload
+    assert result["blocks"] == 2
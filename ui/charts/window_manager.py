@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import time
 from typing import Dict, Iterable, List
 
 from PySide6.QtCore import QObject
@@ -9,6 +8,7 @@ from dsl.ast_nodes import ChartSpec
 from ui.charts.chart_widget import ChartWidget
 from ui.charts.chart_widget_3d import Chart3DWidget
 from ui.charts.script_window import ScriptWindow
+from utils.timing import timestamp
 
 
 class WindowManager(QObject):
@@ -57,7 +57,7 @@ class WindowManager(QObject):
 
     def handle_data(self, payload: Dict[str, float]) -> None:
         """Route incoming parsed data dict to bound charts."""
-        ts = float(payload.get("ts", time.time()))
+        ts = float(payload.get("ts", timestamp()))
         # 2D
         for key, value in payload.items():
             if key == "ts":
@@ -4,7 +4,6 @@ import logging
 import os
 import tempfile
 import threading
-import time
 
 from PySide6.QtCore import QThread, Signal
 
@@ -14,6 +13,7 @@ from actions.schema_protocol import register_schema_protocol_actions
 from actions.chart_actions import register_chart_actions
 from actions.record_actions import register_record_actions
 from actions.data_actions import register_data_actions
+from dsl.compiler import compile_state_machine
 from dsl.executor import StateMachineExecutor
 from dsl.parser import parse_script
 from runtime.channels import build_channels
@@ -38,8 +38,8 @@ class _LogHandler(logging.Handler):
 class _ObservableExecutor(StateMachineExecutor):
     """带停止标记与进度回调的执行器包装。"""
 
-    def __init__(self, ast, ctx, stop_event: threading.Event, on_state, on_progress) -> None:
-        super().__init__(ast, ctx)
+    def __init__(self, ast, ctx, stop_event: threading.Event, on_state, on_progress, machine=None) -> None:
+        super().__init__(ast, ctx, machine)
         self._stop_event = stop_event
         self._on_state = on_state
         self._on_progress = on_progress
@@ -49,44 +49,28 @@ class _ObservableExecutor(StateMachineExecutor):
     def run(self) -> None:
         if self.current:
             self._notify(self.current.name)
-        while not self.done and not self._stop_event.is_set() and self.current:
-            state = self.current
+        while not self.done and not self._stop_event.is_set() and self._state:
+            state = self._state
             self._run_actions(state)
             if self._stop_event.is_set():
                 break
             # 条件跳转
-            if state.goto:
-                if state.when:
-                    cond = bool(self.ctx.eval_value(state.when))
-                    target = state.goto if cond else state.else_goto
-                    if target:
-                        self._goto(target)
-                        continue
-                else:
-                    self._goto(state.goto)
-                    continue
+            target = self._next_by_goto(state)
+            if target is not None:
+                self._enter(target)
+                continue
             # 事件/超时
             next_state = self._wait_event_or_timeout(state)
-            if next_state:
-                self._goto(next_state)
+            if next_state is not None:
+                self._enter(next_state)
             else:
                 self.done = True
 
-    def _wait_event_or_timeout(self, state):
-        if not state.on_event and not state.timeout:
-            return None
-        deadline = time.time() + (state.timeout / 1000.0 if state.timeout else 1e9)
-        while time.time() <= deadline and not self.done and not self._stop_event.is_set():
-            evt = self.ctx.next_event(timeout=0.1)
-            if evt is None:
-                continue
-            self.ctx.logger.debug(f"  event: {evt}")
-            if evt in state.on_event:
-                return state.on_event[evt]
-        return state.on_timeout
+    def _should_stop(self) -> bool:
+        return self._stop_event.is_set()
 
-    def _goto(self, name: str) -> None:
-        super()._goto(name)
+    def _enter(self, index: int) -> None:
+        super()._enter(index)
         if self.current:
             self._notify(self.current.name)
 
@@ -110,9 +94,14 @@ class ScriptRunnerQt(QThread):
         self.bus = bus
         self.external_events = external_events or []
         self._stop_event = threading.Event()
+        self._ctx = None
 
     def stop(self) -> None:
         self._stop_event.set()
+        ctx = self._ctx
+        if ctx is not None:
+            # 打断阻塞中的事件等待，使停止立即生效
+            ctx.wakeup()
 
     def run(self) -> None:  # pragma: no cover - 线程逻辑
         handler = _LogHandler(lambda msg: self.sig_log.emit(msg))
@@ -139,6 +128,8 @@ class ScriptRunnerQt(QThread):
                 tmp.flush()
                 tmp_path = tmp.name
             ast = parse_script(tmp_path)
+            # 先编译：脚本错误在打开任何端口之前报出
+            machine = compile_state_machine(ast)
             channels = build_channels(ast.channels)
             if not channels:
                 raise ValueError("未定义 channels")
@@ -151,6 +142,7 @@ class ScriptRunnerQt(QThread):
                 external_events=self.external_events,
                 script_text=self.yaml_text,
             )
+            self._ctx = ctx
 
             executor = _ObservableExecutor(
                 ast,
@@ -158,6 +150,7 @@ class ScriptRunnerQt(QThread):
                 stop_event=self._stop_event,
                 on_state=lambda s: self.sig_state.emit(s),
                 on_progress=lambda p: self.sig_progress.emit(p),
+                machine=machine,
             )
             executor.run()
             if self._stop_event.is_set():
@@ -167,6 +160,7 @@ class ScriptRunnerQt(QThread):
         except Exception as exc:  # 报错直接显示
             self.sig_log.emit(f"[ERROR] {exc}")
         finally:
+            self._ctx = None
             if ctx is not None:
                 try:
                     ctx.close()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import binascii
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class CrcSpec:
+    """CRC 参数（Rocksoft 模型），byteorder 为帧中 CRC 的字节序。"""
+
+    name: str
+    width: int
+    poly: int
+    init: int
+    reflect: bool
+    xorout: int = 0
+    byteorder: str = "big"
+    check: Optional[int] = None  # "123456789" 的标准校验值，用于自检
+
+
+class CrcEngine:
+    """查表法 CRC：每字节一次查表；支持一次性计算与流式 update。
+
+    流式用法：
+        reg = engine.init
+        reg = engine.update(reg, chunk1)
+        reg = engine.update(reg, chunk2)
+        value = engine.finalize(reg)
+    """
+
+    def __init__(self, spec: CrcSpec, fast_update: Optional[Callable[[bytes, int], int]] = None) -> None:
+        if spec.width < 8 or spec.width % 8:
+            raise ValueError(f"CRC 宽度必须是 8 的整数倍: {spec.width}")
+        self.spec = spec
+        self.size = spec.width // 8
+        self._mask = (1 << spec.width) - 1
+        self._fast_update = fast_update
+        if spec.reflect:
+            self.init = _reflect(spec.init, spec.width)
+            self._table = self._build_reflected_table()
+        else:
+            self.init = spec.init
+            self._table = self._build_table()
+
+    def update(self, reg: int, data: bytes | bytearray | memoryview) -> int:
+        if self._fast_update is not None:
+            return self._fast_update(data, reg)
+        table = self._table
+        if self.spec.reflect:
+            for byte in data:
+                reg = (reg >> 8) ^ table[(reg ^ byte) & 0xFF]
+            return reg
+        shift = self.spec.width - 8
+        mask = self._mask
+        for byte in data:
+            reg = ((reg << 8) & mask) ^ table[((reg >> shift) ^ byte) & 0xFF]
+        return reg
+
+    def finalize(self, reg: int) -> int:
+        return (reg ^ self.spec.xorout) & self._mask
+
+    def calc(self, data: bytes | bytearray | memoryview) -> int:
+        return self.finalize(self.update(self.init, data))
+
+    def digest(self, data: bytes | bytearray | memoryview) -> bytes:
+        """计算 CRC 并按 spec.byteorder 转成帧内字节。"""
+        return self.calc(data).to_bytes(self.size, self.spec.byteorder)  # type: ignore[arg-type]
+
+    def _build_table(self) -> List[int]:
+        width, poly, mask = self.spec.width, self.spec.poly, self._mask
+        top = 1 << (width - 1)
+        table = []
+        for idx in range(256):
+            reg = idx << (width - 8)
+            for _ in range(8):
+                reg = ((reg << 1) ^ poly) if reg & top else (reg << 1)
+            table.append(reg & mask)
+        return table
+
+    def _build_reflected_table(self) -> List[int]:
+        poly = _reflect(self.spec.poly, self.spec.width)
+        table = []
+        for idx in range(256):
+            reg = idx
+            for _ in range(8):
+                reg = (reg >> 1) ^ poly if reg & 1 else reg >> 1
+            table.append(reg)
+        return table
+
+
+def _reflect(value: int, width: int) -> int:
+    result = 0
+    for _ in range(width):
+        result = (result << 1) | (value & 1)
+        value >>= 1
+    return result
+
+
+# 标准库 C 实现可直接复用的变体：binascii.crc_hqx 为非反射 0x1021，zlib.crc32 为 CRC-32
+def _crc32_update(data: bytes, reg: int) -> int:
+    # zlib.crc32 接收/返回的是已异或 xorout 的值，这里换算回寄存器值
+    return zlib.crc32(data, reg ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+
+_SPECS = [
+    CrcSpec("crc8", 8, 0x07, 0x00, False, check=0xF4),
+    CrcSpec("crc8_maxim", 8, 0x31, 0x00, True, check=0xA1),
+    CrcSpec("crc16_modbus", 16, 0x8005, 0xFFFF, True, byteorder="little", check=0x4B37),
+    CrcSpec("crc16_xmodem", 16, 0x1021, 0x0000, False, check=0x31C3),
+    CrcSpec("crc16_ccitt_false", 16, 0x1021, 0xFFFF, False, check=0x29B1),
+    CrcSpec("crc16_kermit", 16, 0x1021, 0x0000, True, byteorder="little", check=0x2189),
+    CrcSpec("crc32", 32, 0x04C11DB7, 0xFFFFFFFF, True, xorout=0xFFFFFFFF, byteorder="little", check=0xCBF43926),
+    CrcSpec("crc32c", 32, 0x1EDC6F41, 0xFFFFFFFF, True, xorout=0xFFFFFFFF, byteorder="little", check=0xE3069283),
+]
+
+_FAST_PATHS: Dict[str, Callable[[bytes, int], int]] = {
+    "crc16_xmodem": binascii.crc_hqx,
+    "crc16_ccitt_false": binascii.crc_hqx,
+    "crc32": _crc32_update,
+}
+
+_ENGINES: Dict[str, CrcEngine] = {}
+
+
+def register_crc(spec: CrcSpec, fast_update: Optional[Callable[[bytes, int], int]] = None) -> CrcEngine:
+    """注册 CRC 变体，之后可通过 get_crc(name) 按名称取用。"""
+    engine = CrcEngine(spec, fast_update)
+    _ENGINES[spec.name] = engine
+    return engine
+
+
+def get_crc(name: str) -> CrcEngine:
+    engine = _ENGINES.get(str(name).lower())
+    if engine is None:
+        raise KeyError(f"未知 CRC 类型: {name}")
+    return engine
+
+
+def list_crcs() -> List[str]:
+    return sorted(_ENGINES)
+
+
+for _spec in _SPECS:
+    register_crc(_spec, _FAST_PATHS.get(_spec.name))
+
+_CRC8 = get_crc("crc8")
+_CRC16_MODBUS = get_crc("crc16_modbus")
+
+
+def crc8(data: bytes, poly: int = 0x07, init: int = 0x00) -> int:
+    """CRC8（缺省多项式 0x07，初值 0x00）；非缺省参数时按需构建查表引擎。"""
+    if poly == 0x07 and init == 0x00:
+        return _CRC8.calc(data)
+    return _crc8_engine(poly & 0xFF, init & 0xFF).calc(data)
+
+
+@lru_cache(maxsize=16)
+def _crc8_engine(poly: int, init: int) -> CrcEngine:
+    return CrcEngine(CrcSpec(f"crc8_{poly:02x}_{init:02x}", 8, poly, init, False))
+
+
+def crc16_modbus(data: bytes) -> int:
+    """CRC16-Modbus，多项式 0xA001（反射），初始 0xFFFF。"""
+    return _CRC16_MODBUS.calc(data)
+
+
+def crc16_xmodem(data: bytes) -> int:
+    """CRC16-XMODEM，多项式 0x1021，初始 0x0000（binascii.crc_hqx）。"""
+    return binascii.crc_hqx(data, 0)
@@ -1,18 +1,27 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import Dict
+from typing import BinaryIO, Dict, Optional
 
 
-def get_file_meta(ctx) -> Dict[str, object]:
-    """从上下文获取文件路径并返回元信息（大小、块数）。"""
+def resolve_file_path(ctx) -> str:
+    """从上下文变量 file_path / file / path 中取出文件路径。"""
     path = ctx.vars.get("file_path") or ctx.vars.get("file") or ctx.vars.get("path")
+    if isinstance(path, dict):
+        # send_xmodem_block 会把元信息写回 file 变量
+        path = path.get("path")
     if not path:
         raise ValueError("未提供 file_path")
-    file_path = Path(path)
+    return str(path)
+
+
+def get_file_meta(ctx, block_size: int = 128) -> Dict[str, object]:
+    """从上下文获取文件路径并返回元信息（大小、按 block_size 计算的块数）。"""
+    file_path = Path(resolve_file_path(ctx))
     size = file_path.stat().st_size
-    block_count = (size + 127) // 128
-    return {"path": str(file_path), "size": size, "block_count": block_count}
+    block_count = (size + block_size - 1) // block_size
+    return {"path": str(file_path), "size": size, "block_count": block_count, "block_size": block_size}
 
 
 def read_block(path: str, block_no: int, block_size: int = 128) -> bytes:
@@ -26,3 +35,61 @@ def read_block(path: str, block_no: int, block_size: int = 128) -> bytes:
     if len(data) < block_size:
         data = data + b"\x1A" * (block_size - len(data))
     return data
+
+
+class BlockFileReader:
+    """按块读取文件：句柄在整个传输期间保持打开，并按 read_ahead 字节预读。
+
+    元信息（大小、mtime、块数）只在打开时获取一次；is_stale() 用于在新一轮传输
+    开始时确认文件未被替换。
+    """
+
+    def __init__(self, path: str, read_ahead: int = 64 * 1024) -> None:
+        self.path = str(path)
+        self._fh: Optional[BinaryIO] = open(self.path, "rb")
+        stat = os.fstat(self._fh.fileno())
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self._read_ahead = read_ahead
+        self._buf = b""
+        self._buf_start = 0
+        self._meta: Dict[int, Dict[str, object]] = {}
+
+    def meta(self, block_size: int = 128) -> Dict[str, object]:
+        """返回与 get_file_meta 相同结构的元信息；同一 block_size 返回同一个 dict。"""
+        meta = self._meta.get(block_size)
+        if meta is None:
+            block_count = (self.size + block_size - 1) // block_size
+            meta = {"path": self.path, "size": self.size, "block_count": block_count, "block_size": block_size}
+            self._meta[block_size] = meta
+        return meta
+
+    def is_stale(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+        return stat.st_mtime_ns != self.mtime_ns or stat.st_size != self.size
+
+    def read_block(self, block_no: int, block_size: int = 128, pad: int = 0x1A) -> bytes:
+        """读取指定块号（从1开始），不足补 pad；命中预读缓冲时不产生系统调用。"""
+        if self._fh is None:
+            raise ValueError(f"文件已关闭: {self.path}")
+        offset = (block_no - 1) * block_size
+        end = offset + block_size
+        buf_end = self._buf_start + len(self._buf)
+        if offset < self._buf_start or (end > buf_end and buf_end < self.size):
+            self._fh.seek(offset)
+            self._buf = self._fh.read(max(self._read_ahead, block_size))
+            self._buf_start = offset
+        rel = offset - self._buf_start
+        data = self._buf[rel : rel + block_size]
+        if len(data) < block_size:
+            data += bytes([pad]) * (block_size - len(data))
+        return data
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self._buf = b""
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+
+DEFAULT_PAYLOAD_LIMIT = 64
+
+
+def get_logger(name: str) -> logging.Logger:
+    """返回组件日志器；输出格式/级别由入口统一通过 logging 配置。"""
+    return logging.getLogger(name)
+
+
+def format_payload(data: Any, limit: int = DEFAULT_PAYLOAD_LIMIT) -> str:
+    """格式化载荷用于日志：bytes 输出 HEX，超过 limit 的部分只记录长度。"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        raw = bytes(data[:limit])
+        text = raw.hex(" ").upper()
+        extra = len(data) - len(raw)
+        return f"{text} ...(+{extra} bytes)" if extra > 0 else text
+    text = repr(data)
+    if len(text) > limit:
+        return f"{text[:limit]} ...(+{len(text) - limit} chars)"
+    return text
+
+
+class LazyPayload:
+    """惰性载荷：只有日志记录真正被输出时才会格式化。"""
+
+    __slots__ = ("data", "limit")
+
+    def __init__(self, data: Any, limit: int = DEFAULT_PAYLOAD_LIMIT) -> None:
+        self.data = data
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return format_payload(self.data, self.limit)
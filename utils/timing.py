@@ -0,0 +1,66 @@
+"""计时工具：基于单调时钟的截止时间与高精度时间戳。
+
+- 超时/截止时间一律用 Deadline（time.monotonic），不受系统校时（NTP、手动改时间）跳变影响；
+- 记录类时间戳用 timestamp()/now_ns()：前者与 time.time() 同一纪元便于阅读，
+  但按 perf_counter 推进，同一进程内的两个时间戳相减即可得到可信的间隔。
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+# 进程启动时锚定一次墙上时间，之后只按单调高精度时钟推进
+_WALL_ANCHOR_NS = time.time_ns()
+_PERF_ANCHOR_NS = time.perf_counter_ns()
+
+
+def now_ns() -> int:
+    """单调高精度时钟（纳秒），只用于计算间隔。"""
+    return time.perf_counter_ns()
+
+
+def timestamp_ns() -> int:
+    """与 time.time_ns() 同纪元的纳秒时间戳，按单调时钟推进。"""
+    return _WALL_ANCHOR_NS + (time.perf_counter_ns() - _PERF_ANCHOR_NS)
+
+
+def timestamp() -> float:
+    """与 time.time() 同纪元的秒数（float），按单调时钟推进。"""
+    return timestamp_ns() / 1e9
+
+
+def elapsed_ms(start_ns: int) -> float:
+    """从 now_ns() 取得的 start_ns 到现在经过的毫秒数。"""
+    return (time.perf_counter_ns() - start_ns) / 1e6
+
+
+class Deadline:
+    """单调时钟截止时间；timeout 为 None 表示永不到期。
+
+    典型用法：
+        deadline = Deadline(timeout)
+        while not deadline.expired():
+            chunk = channel.read(n, timeout=deadline.remaining())
+    """
+
+    __slots__ = ("_end",)
+
+    def __init__(self, timeout: Optional[float]) -> None:
+        self._end = None if timeout is None else time.monotonic() + max(0.0, float(timeout))
+
+    @property
+    def infinite(self) -> bool:
+        return self._end is None
+
+    def remaining(self) -> Optional[float]:
+        """剩余秒数（不小于 0）；永不到期时返回 None，可直接作为 select/wait 的超时参数。"""
+        if self._end is None:
+            return None
+        return max(0.0, self._end - time.monotonic())
+
+    def expired(self) -> bool:
+        return self._end is not None and time.monotonic() >= self._end
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining()})"